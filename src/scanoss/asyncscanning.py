@@ -0,0 +1,181 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import asyncio
+import os
+import threading
+from typing import Iterable
+
+from .asyncscanossapi import AsyncScanossApi
+from .scancheckpoint import ScanCheckpoint
+from .threadedscanning import ThreadedScanning, MAX_QUEUE_REQUESTS, MAX_QUEUE_BYTES
+
+MAX_ALLOWED_TASKS = int(os.environ.get("SCANOSS_MAX_ALLOWED_TASKS")) if os.environ.get("SCANOSS_MAX_ALLOWED_TASKS") else 500
+
+
+class AsyncScanning(ThreadedScanning):
+    """
+    asyncio based alternative to ThreadedScanning
+    WFP scan requests are posted concurrently from a single event loop, bounded by a semaphore, instead of
+    being spread across a pool of worker threads.
+    It can be driven from an existing event loop (scan) or used as a drop-in replacement for ThreadedScanning
+    (queue_add/run/complete), in which case the event loop runs in a single background thread in place of the
+    worker threads.
+    """
+
+    def __init__(self, scanapi: AsyncScanossApi, debug: bool = False, trace: bool = False, quiet: bool = False,
+                 nb_tasks: int = 100, max_queue_requests: int = MAX_QUEUE_REQUESTS,
+                 max_queue_bytes: int = MAX_QUEUE_BYTES, checkpoint: ScanCheckpoint = None
+                 ) -> None:
+        """
+        Initialise the AsyncScanning class
+        :param scanapi: Async SCANOSS API to send scan requests to
+        :param debug: enable debug (default False)
+        :param trace: enable trace (default False)
+        :param quiet: enable quiet mode (default False)
+        :param nb_tasks: Maximum number of in-flight scan requests (default 100)
+        :param max_queue_requests: Maximum number of requests waiting in the input queue (default 1000)
+        :param max_queue_bytes: Maximum size of the requests waiting in the input queue (default 64MB)
+        :param checkpoint: Checkpoint to record completed requests in/resume from (default None)
+        """
+        super().__init__(scanapi, debug=debug, trace=trace, quiet=quiet, nb_threads=1,
+                         max_queue_requests=max_queue_requests, max_queue_bytes=max_queue_bytes,
+                         checkpoint=checkpoint)
+        self.nb_tasks = nb_tasks if nb_tasks and nb_tasks > 0 else 100
+        if self.nb_tasks > MAX_ALLOWED_TASKS:
+            self.print_msg(f'Warning: Requested tasks too large: {nb_tasks}. Reducing to {MAX_ALLOWED_TASKS}')
+            self.nb_tasks = MAX_ALLOWED_TASKS
+        self._api_error = False
+        self._scan_id = 0
+
+    async def scan(self, wfps: Iterable[str]) -> bool:
+        """
+        Scan the given WFP requests from the currently running event loop
+        Results are available from the responses property once complete
+        :param wfps: iterable of WFP request blocks
+        :return: True if successful, False if error encountered
+        """
+        sem = asyncio.Semaphore(self.nb_tasks)
+        pending = set()
+        for wfp in wfps:
+            if wfp is None or wfp == '':
+                self.print_stderr(f'Warning: empty WFP. Skipping from scan...')
+                continue
+            wfp = self._pending_wfp(wfp)
+            if not wfp:
+                continue
+            await sem.acquire()
+            task = asyncio.create_task(self.__post_bounded(wfp, sem))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+        return False if self._errors else True
+
+    def _start_workers(self) -> None:
+        """
+        Start the event loop thread to process all pending (and future) queued requests
+        """
+        self.print_debug(f'Starting scan event loop ({self.nb_tasks} tasks) to process {self.inputs.qsize()}'
+                         f' requests...')
+        try:
+            t = threading.Thread(target=self.__run_loop, daemon=True)
+            self._threads.append(t)
+            t.start()
+        except Exception as e:
+            self.print_stderr(f'ERROR: Problem running async scanning: {e}')
+            self._errors = True
+
+    def __run_loop(self) -> None:
+        """
+        Run the queue dispatcher in a new event loop (in the current thread)
+        """
+        asyncio.run(self.__dispatch_queue())
+
+    async def __dispatch_queue(self) -> None:
+        """
+        Pull WFP requests off the input queue and post them concurrently until the stop sentinel is received
+        """
+        loop = asyncio.get_running_loop()
+        sem = asyncio.Semaphore(self.nb_tasks)
+        pending = set()
+        try:
+            while True:
+                wfp = await loop.run_in_executor(None, self.queue_get)
+                if wfp is None:  # Sentinel to stop processing
+                    self.inputs.task_done()
+                    break
+                await sem.acquire()
+                task = asyncio.create_task(self.__post_queued(wfp, sem))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            await self.scanapi.close()
+        self.print_trace('Scan event loop complete.')
+
+    async def __post_queued(self, wfp: str, sem: asyncio.Semaphore) -> None:
+        """
+        Post a request taken from the input queue, and mark it as done
+        """
+        try:
+            await self.__post(wfp)
+        finally:
+            sem.release()
+            self.inputs.task_done()
+
+    async def __post_bounded(self, wfp: str, sem: asyncio.Semaphore) -> None:
+        """
+        Post a request and release the semaphore slot it occupied
+        """
+        try:
+            await self.__post(wfp)
+        finally:
+            sem.release()
+
+    async def __post(self, wfp: str) -> None:
+        """
+        Send a single WFP request to the API and store the response
+        """
+        if self._api_error:  # API error encountered, so stop processing anymore requests
+            return
+        self._scan_id += 1
+        scan_id = self._scan_id
+        try:
+            self.print_trace(f'Processing input request ({scan_id})...')
+            count = self._count_files_in_wfp(wfp)
+            resp = await self.scanapi.scan(wfp, scan_id=scan_id)
+            if resp:
+                self._spool_results(resp, wfp)  # Spool the output response for later collection
+            self.update_bar(count)
+            self.print_trace(f'Request complete ({scan_id}).')
+        except Exception as e:
+            self.print_stderr(f'ERROR: Problem encountered running scan: {e}. Aborting remaining requests.')
+            self._errors = True
+            self._api_error = True  # Stop processing anymore work requests
+            self._stop_scanning.set()  # Tell the parent process to abort scanning
+
+#
+# End of AsyncScanning Class
+#
@@ -0,0 +1,227 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import asyncio
+import json
+import ssl
+import time
+import uuid
+from json.decoder import JSONDecodeError
+
+import aiohttp
+from pypac.parser import PACFile
+
+from .circuitbreaker import CIRCUIT_CLOSED, DEFAULT_FAILURE_THRESHOLD, DEFAULT_RESET_TIMEOUT
+from .resultcache import ResultCache
+from .scanarchive import ScanArchive
+from .scanossapi import ScanossApi, PROBE_TIMEOUT
+
+
+class AsyncScanossApi(ScanossApi):
+    """
+    ScanOSS asyncio REST API client class
+    Posts scan requests to the SCANOSS streaming API using a single (shared) asyncio HTTP session.
+    Retry/backoff semantics match those of ScanossApi.scan
+    """
+
+    def __init__(self, scan_type: str = None, sbom_path: str = None, scan_format: str = None, flags: str = None,
+                 url: str = None, api_key: str = None, debug: bool = False, trace: bool = False, quiet: bool = False,
+                 timeout: int = 180, ver_details: str = None, ignore_cert_errors: bool = False,
+                 proxy: str = None, ca_cert: str = None, pac: PACFile = None, retry: int = 5,
+                 cache: ResultCache = None, archive: ScanArchive = None, lb_strategy: str = None,
+                 breaker_threshold: int = DEFAULT_FAILURE_THRESHOLD, breaker_reset: int = DEFAULT_RESET_TIMEOUT,
+                 breaker_wait: int = 0, max_connections: int = 100):
+        """
+        Initialise the async SCANOSS API
+        Takes the same parameters as ScanossApi, plus:
+        :param max_connections: Maximum number of concurrent connections to keep open (default 100)
+
+        Proxy details can be supplied via the HTTP_PROXY/HTTPS_PROXY environment variables or the proxy option.
+        PAC files are not supported by the async client.
+        """
+        super().__init__(scan_type=scan_type, sbom_path=sbom_path, scan_format=scan_format, flags=flags, url=url,
+                         api_key=api_key, debug=debug, trace=trace, quiet=quiet, timeout=timeout,
+                         ver_details=ver_details, ignore_cert_errors=ignore_cert_errors, proxy=proxy,
+                         ca_cert=ca_cert, retry=retry, cache=cache, archive=archive,
+                         lb_strategy=lb_strategy, breaker_threshold=breaker_threshold,
+                         breaker_reset=breaker_reset, breaker_wait=breaker_wait)
+        if pac and not proxy:
+            self.print_stderr('Warning: PAC files are not supported by the async client. Ignoring.')
+        self.max_connections = max_connections if max_connections > 0 else 100
+        self.proxy = proxy
+        self._session = None
+        self._ssl = True
+        if self.verify is False:
+            self._ssl = False
+        elif self.verify:
+            self._ssl = ssl.create_default_context(cafile=self.verify)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Get the HTTP session, creating it in the currently running event loop if necessary
+        :return: aiohttp client session
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, ssl=self._ssl)
+            self._session = aiohttp.ClientSession(connector=connector, trust_env=True,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def close(self) -> None:
+        """
+        Close the underlying HTTP session (if open)
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def probe_async(self) -> bool:
+        """
+        Send a cheap (GET) request to check if the service is responding again, and update the circuit breaker
+        :return: True if the service responded, False otherwise
+        """
+        endpoint = self.endpoints.acquire()
+        healthy = False
+        try:
+            self.print_debug(f'Probing {endpoint.url}...')
+            async with self._get_session().get(endpoint.url, headers=self.headers, proxy=self.proxy,
+                                               timeout=aiohttp.ClientTimeout(total=PROBE_TIMEOUT)) as r:
+                healthy = r.status not in (502, 503, 504)
+        except Exception as e:
+            self.print_debug(f'Probe of {endpoint.url} failed: {e}')
+        finally:
+            self.endpoints.release(endpoint, healthy)
+            self.breaker.record(healthy, probe=True)
+        return healthy
+
+    async def scan(self, wfp: str, context: str = None, scan_id: int = None):
+        """
+        Scan the specified WFP and return the JSON object
+        :param wfp: WFP to scan
+        :param context: Context to help with identification
+        :param scan_id: ID of the scan being run (usually task number)
+        :return: JSON result object
+        """
+        cached, misses = self.cache_lookup(wfp, context)
+        if misses is not None:
+            if not misses:  # Everything was already in the cache
+                return cached
+            wfp = ''.join(block for _, block in misses.values())  # Only scan the files we have no results for
+        if self.archive and self.archive.replay:
+            return self.cache_update(self.replay_scan(wfp, context), cached, misses)
+        request_id = str(uuid.uuid4())
+        form_data = self.get_form_data(context)
+        scan_files = {'file': ("%s.wfp" % request_id, wfp)}
+        headers = dict(self.headers)
+        headers['x-request-id'] = request_id  # send a unique request id for each post
+        session = self._get_session()
+        status = None
+        text = None
+        deadline = self.breaker.deadline()  # Time to wait for the service to recover (if the circuit opens)
+        retry = 0  # Add some retry logic to cater for timeouts, etc.
+        while retry <= self.retry_limit:
+            retry += 1
+            status = None
+            text = None
+            data = aiohttp.FormData()
+            for key, value in form_data.items():
+                data.add_field(key, value)
+            data.add_field('file', wfp, filename="%s.wfp" % request_id)
+            if self.breaker.state != CIRCUIT_CLOSED:  # Wait (off the event loop) for the circuit to close
+                loop = asyncio.get_running_loop()
+                while await loop.run_in_executor(None, self.breaker.acquire, deadline):
+                    if await self.probe_async():
+                        break
+            endpoint = self.endpoints.acquire()  # Select the endpoint to send this attempt to
+            url = endpoint.url
+            healthy = False
+            start = time.monotonic()
+            try:
+                async with session.post(url, data=data, headers=headers, proxy=self.proxy) as r:
+                    status = r.status
+                    text = await r.text()
+            except (aiohttp.ClientSSLError, aiohttp.ClientProxyConnectionError) as e:
+                self.print_stderr(f'ERROR: Exception ({e.__class__.__name__}) POSTing data - {e}.')
+                raise Exception(f"ERROR: The SCANOSS API request failed for {url}") from e
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+                if retry > self.retry_limit:  # Timed out retry_limit or more times, fail
+                    self.print_stderr(f'ERROR: {e.__class__.__name__} POSTing data ({request_id}) - {e}: {scan_files}')
+                    raise Exception(f"ERROR: The SCANOSS API request timed out ({e.__class__.__name__}) for"
+                                    f" {url}") from e
+                else:
+                    self.print_stderr(f'Warning: {e.__class__.__name__} communicating with {url}. Retrying...')
+            except Exception as e:
+                self.print_stderr(f'ERROR: Exception ({e.__class__.__name__}) POSTing data ({request_id}) - {e}:'
+                                  f' {scan_files}')
+                raise Exception(f"ERROR: The SCANOSS API request failed for {url}") from e
+            else:
+                if status == 503:  # Service limits have most likely been reached
+                    self.print_stderr(f'ERROR: SCANOSS API rejected the scan request ({request_id}) due to '
+                                      f'service limits being exceeded')
+                    self.print_stderr(f'ERROR: Details: {text.strip()}')
+                    raise Exception(f"ERROR: {status} - The SCANOSS API request ({request_id}) rejected "
+                                    f"for {url} due to service limits being exceeded.")
+                elif status >= 400:
+                    healthy = status < 500  # Only server side errors count against the endpoint
+                    self.save_bad_req_wfp(scan_files, request_id, scan_id)
+                    if retry > self.retry_limit:  # No response retry_limit or more times, fail
+                        raise Exception(
+                            f"ERROR: The SCANOSS API returned the following error: HTTP {status}, "
+                            f"{text.strip()}")
+                    self.print_stderr(f'Warning: Error response code {status} ({text.strip()}) from '
+                                      f'{url}. Retrying...')
+                else:
+                    healthy = True
+                    break  # Valid response, break out of the retry loop
+            finally:
+                self.endpoints.release(endpoint, healthy, time.monotonic() - start)
+                self.breaker.record(healthy)
+            delay = self.retry_delay()  # Wait before retrying (unless there is another endpoint to fail over to)
+            if delay:
+                await asyncio.sleep(delay)
+        # End of while loop
+        if status is None or text is None:
+            self.save_bad_req_wfp(scan_files, request_id, scan_id)
+            raise Exception(f"ERROR: The SCANOSS API request response object is empty for {url}")
+        if 'xml' in self.scan_format:
+            return text
+        try:
+            json_resp = json.loads(text)
+            if self.archive:
+                self.record_scan(wfp, context, json_resp)
+            return self.cache_update(json_resp, cached, misses)
+        except (JSONDecodeError, Exception) as e:
+            self.print_stderr(f'ERROR: The SCANOSS API returned an invalid JSON '
+                              f'({e.__class__.__name__} - {request_id}): {e}')
+            self.save_bad_json_resp(scan_files, request_id, scan_id, text)
+            return None
+
+#
+# End of AsyncScanossApi Class
+#
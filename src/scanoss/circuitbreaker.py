@@ -0,0 +1,140 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import threading
+import time
+
+from .scanossbase import ScanossBase
+
+CIRCUIT_CLOSED = 'closed'
+CIRCUIT_OPEN = 'open'
+CIRCUIT_HALF_OPEN = 'half-open'
+DEFAULT_FAILURE_THRESHOLD = 5   # Consecutive failures before opening the circuit
+DEFAULT_RESET_TIMEOUT = 30      # Seconds to keep the circuit open before probing the service again
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when a request is rejected because the circuit breaker is open
+    """
+    pass
+
+
+class CircuitBreaker(ScanossBase):
+    """
+    Circuit breaker shared by all the workers talking to a service
+    After a number of consecutive failures the circuit opens and requests fail fast, instead of each worker
+    retrying on its own. After the reset timeout a single (cheap) probe is allowed through (half-open).
+    If it succeeds the circuit closes again, otherwise it re-opens.
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+                 max_wait: float = 0, debug: bool = False, trace: bool = False, quiet: bool = False):
+        """
+        Initialise the CircuitBreaker class
+        :param failure_threshold: consecutive failures before opening the circuit (default 5, 0 to disable)
+        :param reset_timeout: seconds to wait before probing an open circuit (default 30)
+        :param max_wait: maximum seconds a request should wait for an open circuit to close (default 0 - fail fast)
+        :param debug: enable debug (default False)
+        :param trace: enable trace (default False)
+        :param quiet: enable quiet mode (default False)
+        """
+        super().__init__(debug, trace, quiet)
+        self.failure_threshold = failure_threshold if failure_threshold and failure_threshold > 0 else 0
+        self.reset_timeout = reset_timeout if reset_timeout and reset_timeout > 0 else DEFAULT_RESET_TIMEOUT
+        self.max_wait = max_wait if max_wait and max_wait > 0 else 0
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._cond = threading.Condition()
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    def deadline(self) -> float:
+        """
+        :return: time until which a new request should wait for an open circuit to close
+        """
+        return time.monotonic() + self.max_wait
+
+    def acquire(self, deadline: float = None) -> bool:
+        """
+        Check if a request is allowed through, waiting (up to the deadline) for an open circuit to close
+        :param deadline: time until which to wait for the circuit to close (default: max_wait from now)
+        :return: True if the caller should send a probe first (half-open), False if the circuit is closed
+        :raises CircuitOpenError: if the circuit stays open
+        """
+        if not self.enabled:
+            return False
+        if deadline is None:
+            deadline = self.deadline()
+        with self._cond:
+            while True:
+                if self.state == CIRCUIT_CLOSED:
+                    return False
+                now = time.monotonic()
+                if self.state == CIRCUIT_OPEN and now >= self._opened_at + self.reset_timeout:
+                    self.state = CIRCUIT_HALF_OPEN
+                if self.state == CIRCUIT_HALF_OPEN and not self._probing:
+                    self._probing = True  # This caller gets to probe the service
+                    return True
+                if now >= deadline:
+                    raise CircuitOpenError(f'Circuit breaker is {self.state} after {self.failures} consecutive '
+                                           f'failures (failing fast)')
+                wait = deadline - now
+                if self.state == CIRCUIT_OPEN:
+                    wait = min(wait, self._opened_at + self.reset_timeout - now)
+                self._cond.wait(max(wait, 0.01))
+
+    def record(self, success: bool, probe: bool = False) -> None:
+        """
+        Record the outcome of a request (or probe)
+        :param success: True if the service responded successfully
+        :param probe: True if this was the half-open probe
+        """
+        if not self.enabled:
+            return
+        with self._cond:
+            if probe:
+                self._probing = False
+            if success:
+                if self.state != CIRCUIT_CLOSED:
+                    self.print_msg('Service is responding again. Closing circuit breaker.')
+                self.state = CIRCUIT_CLOSED
+                self.failures = 0
+            else:
+                self.failures += 1
+                if self.state == CIRCUIT_HALF_OPEN or \
+                        (self.state == CIRCUIT_CLOSED and self.failures >= self.failure_threshold):
+                    if self.state == CIRCUIT_CLOSED:
+                        self.print_stderr(f'Warning: {self.failures} consecutive request failures. Opening circuit '
+                                          f'breaker for {self.reset_timeout}s.')
+                    self.state = CIRCUIT_OPEN
+                    self._opened_at = time.monotonic()
+            self._cond.notify_all()
+
+#
+# End of CircuitBreaker Class
+#
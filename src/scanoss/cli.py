@@ -22,21 +22,23 @@
    THE SOFTWARE.
 """
 import argparse
+import importlib.util
 import os
 import sys
 
-import pypac
-
-from .scanner import Scanner
-from .scancodedeps import ScancodeDeps
+# Sub-command implementations (and their dependencies) are imported when the sub-command runs,
+# to keep the CLI start-up time down
 from .scantype import ScanType
-from .filecount import FileCount
-from .cyclonedx import CycloneDx
-from .spdxlite import SpdxLite
-from .csvoutput import CsvOutput
-from .components import Components
+from .endpointpool import LB_STRATEGIES, LB_LEAST_OUTSTANDING
 from . import __version__
-from .scanner import FAST_WINNOWING
+
+
+def fast_winnowing_available() -> bool:
+    """
+    Check if the fast winnowing package is installed (without loading it)
+    :return: True if available, False otherwise
+    """
+    return importlib.util.find_spec('scanoss_winnowing') is not None
 
 
 def print_stderr(*args, **kwargs):
@@ -50,7 +52,7 @@ def setup_args() -> None:
     """
     Setup all the command line arguments for processing
     """
-    parser = argparse.ArgumentParser(description=f'SCANOSS Python CLI. Ver: {__version__}, License: MIT, Fast Winnowing: {FAST_WINNOWING}')
+    parser = argparse.ArgumentParser(description=f'SCANOSS Python CLI. Ver: {__version__}, License: MIT, Fast Winnowing: {fast_winnowing_available()}')
     parser.add_argument('--version', '-v', action='store_true', help='Display version details')
 
     subparsers = parser.add_subparsers(title='Sub Commands', dest='subparser', description='valid subcommands',
@@ -104,7 +106,38 @@ def setup_args() -> None:
                         help='Scancode command and path if required (optional - default scancode).')
     p_scan.add_argument('--sc-timeout', type=int, default=600,
                         help='Timeout (in seconds) for scancode to complete (optional - default 600)')
+    p_scan.add_argument('--sc-processes', type=int, default=1,
+                        help='Number of scancode processes to run in parallel (optional - default 1)')
+    p_scan.add_argument('--native-deps', action='store_true',
+                        help='Parse dependency manifests & lockfiles natively instead of running scancode')
     p_scan.add_argument('--hpsm', '-H', action='store_true', help='Scan using High Precision Snippet Matching')
+    p_scan.add_argument('--async-scan', action='store_true',
+                        help='Post scan requests from a single asyncio event loop instead of a thread pool. '
+                             '--threads sets the number of in-flight requests (requires aiohttp)')
+    p_scan.add_argument('--queue-requests', type=int, default=1000,
+                        help='Maximum number of scan requests waiting to be posted (optional - default 1000)')
+    p_scan.add_argument('--queue-size', type=int, default=64,
+                        help='Maximum size (in megabytes) of scan requests waiting to be posted (optional - default 64)')
+    p_scan.add_argument('--cache-dir', type=str,
+                        help='Cache scan & dependency results locally in this folder and only send new/changed files & '
+                             'dependencies to the APIs')
+    p_scan.add_argument('--cache-ttl', type=int, default=168,
+                        help='Time (in hours) to keep cached scan results (optional - default 168)')
+    p_scan.add_argument('--cache-size', type=int, default=512,
+                        help='Maximum size (in megabytes) of the result cache (optional - default 512)')
+    p_scan.add_argument('--checkpoint', type=str,
+                        help='Checkpoint the scan progress to this folder so it can be resumed if interrupted')
+    p_scan.add_argument('--resume', type=str,
+                        help='Resume an interrupted scan from the specified checkpoint folder')
+    p_scan.add_argument('--shard', type=str, metavar='I/N',
+                        help='Only scan shard I of N of the files (partitioned by path), '
+                             'i.e. to spread a scan across multiple machines. Combine the results using "merge"')
+    p_scan.add_argument('--wfp-select', type=str, metavar='PATHS-FILE',
+                        help='Only scan the files listed (one path per line) in this file from the WFP file (--wfp), '
+                             'read directly using the WFP index')
+    p_scan.add_argument('--preserve-order', action='store_true',
+                        help='Output the results of a WFP file scan (--wfp) in the same order as the WFP file '
+                             '(default: sorted by file name)')
 
     # Sub-command: fingerprint
     p_wfp = subparsers.add_parser('fingerprint', aliases=['fp', 'wfp'],
@@ -122,6 +155,10 @@ def setup_args() -> None:
     p_wfp.add_argument('--all-folders', action='store_true', help='Fingerprint all folders')
     p_wfp.add_argument('--all-hidden', action='store_true', help='Fingerprint all hidden files/folders')
     p_wfp.add_argument('--hpsm', '-H', action='store_true', help='Use High Precision Snippet Matching algorithm.')
+    p_wfp.add_argument('--binary', action='store_true',
+                       help='Write a compact binary WFP container instead of a text WFP (requires --output)')
+    p_wfp.add_argument('--compress', action='store_true',
+                       help='Compress the binary WFP container with zstd (implies --binary, requires zstandard)')
 
     # Sub-command: dependency
     p_dep = subparsers.add_parser('dependencies', aliases=['dp', 'dep'],
@@ -134,6 +171,10 @@ def setup_args() -> None:
                        help='Scancode command and path if required (optional - default scancode).')
     p_dep.add_argument('--sc-timeout', type=int, default=600,
                        help='Timeout (in seconds) for scancode to complete (optional - default 600)')
+    p_dep.add_argument('--sc-processes', type=int, default=1,
+                       help='Number of scancode processes to run in parallel (optional - default 1)')
+    p_dep.add_argument('--native-deps', action='store_true',
+                       help='Parse dependency manifests & lockfiles natively instead of running scancode')
 
     # Sub-command: file_count
     p_fc = subparsers.add_parser('file_count', aliases=['fc'],
@@ -156,6 +197,16 @@ def setup_args() -> None:
     p_cnv.add_argument('--input-format', type=str, choices=['plain'], default='plain',
                        help='Input format (optional - default: plain)')
 
+    # Sub-command: merge
+    p_merge = subparsers.add_parser('merge', aliases=['mg'],
+                                    description=f'Merge scan results files (i.e. from sharded scans): {__version__}',
+                                    help='Merge scan results files')
+    p_merge.set_defaults(func=merge)
+    p_merge.add_argument('files', metavar='FILE', type=str, nargs='+', help='Plain JSON scan results files to merge')
+    p_merge.add_argument('--output', '-o', type=str, help='Output result file name (optional - default stdout).')
+    p_merge.add_argument('--format', '-f', type=str, choices=['plain', 'cyclonedx', 'spdxlite', 'csv'],
+                         help='Result output format (optional - default: plain)')
+
     # Sub-command: component
     p_comp = subparsers.add_parser('component', aliases=['comp'],
                                    description=f'SCANOSS Component commands: {__version__}',
@@ -205,6 +256,18 @@ def setup_args() -> None:
                            help='Server port number (default: 443).')
     p_c_dwnld.add_argument('--output', '-o', type=str, help='Output result file name (optional - default stdout).')
 
+    # Utils Sub-command: utils wfp-convert
+    p_wfp_cnv = utils_sub.add_parser('wfp-convert', aliases=['wfpc'],
+                                     description=f'Convert WFP files between text & binary: {__version__}',
+                                     help='Convert a text WFP file into a binary WFP container, or back')
+    p_wfp_cnv.set_defaults(func=utils_wfp_convert)
+    p_wfp_cnv.add_argument('--input', '-i', type=str, required=True,
+                           help='Input WFP file (text or binary container)')
+    p_wfp_cnv.add_argument('--output', '-o', type=str, required=True,
+                           help='Output WFP file (binary container for a text input, text otherwise)')
+    p_wfp_cnv.add_argument('--compress', action='store_true',
+                           help='Compress the binary WFP container with zstd (requires zstandard)')
+
     # Utils Sub-command: utils pac-proxy
     p_p_proxy = utils_sub.add_parser('pac-proxy', aliases=['pac'],
                                      description=f'Determine Proxy from PAC: {__version__}',
@@ -219,7 +282,17 @@ def setup_args() -> None:
     # Global Scan command options
     for p in [p_scan]:
         p.add_argument('--apiurl', type=str,
-                       help='SCANOSS API URL (optional - default: https://osskb.org/api/scan/direct)')
+                       help='SCANOSS API URL (optional - default: https://osskb.org/api/scan/direct). '
+                            'Specify a comma separated list of URLs to load balance across multiple servers')
+        p.add_argument('--lb-strategy', type=str, choices=LB_STRATEGIES, default=LB_LEAST_OUTSTANDING,
+                       help='Load balancing strategy for multiple API URLs (optional - default: least-outstanding)')
+        p.add_argument('--breaker-threshold', type=int, default=5,
+                       help='Consecutive API failures before failing fast (optional - default 5, 0 to disable)')
+        p.add_argument('--breaker-reset', type=int, default=30,
+                       help='Seconds to wait before probing a failing API again (optional - default 30)')
+        p.add_argument('--breaker-wait', type=int, default=0,
+                       help='Seconds to pause scanning while the API recovers, instead of aborting '
+                            '(optional - default 0)')
         p.add_argument('--ignore-cert-errors', action='store_true', help='Ignore certificate errors')
 
     # Global Scan/GRPC options
@@ -235,6 +308,9 @@ def setup_args() -> None:
                                                    'Can also use the environment variable '
                                                    '"REQUESTS_CA_BUNDLE=/path/to/cacert.pem" and '
                                                    '"GRPC_DEFAULT_SSL_ROOTS_FILE_PATH=/path/to/cacert.pem" for gRPC')
+        p.add_argument('--record', type=str, help='Record the API responses to the specified archive file (optional)')
+        p.add_argument('--replay', type=str, help='Replay the API responses from the specified archive file instead '
+                                                  'of contacting the API (optional)')
 
     # Global GRPC options
     for p in [p_scan, c_crypto]:
@@ -242,9 +318,13 @@ def setup_args() -> None:
                        help='SCANOSS gRPC API 2.0 URL (optional - default: https://api.osskb.org)')
         p.add_argument('--grpc-proxy', type=str, help='GRPC Proxy URL to use for connections (optional). '
                                                        'Can also use the environment variable "grcp_proxy=<ip>:<port>"')
+        p.add_argument('--grpc-threads', type=int, default=5,
+                       help='Maximum number of gRPC requests to send concurrently (optional - default 5)')
+        p.add_argument('--grpc-max-purls', type=int, default=500,
+                       help='Maximum number of purls to send in each gRPC request (optional - default 500)')
 
     # Help/Trace command options
-    for p in [p_scan, p_wfp, p_dep, p_fc, p_cnv, p_c_loc, p_c_dwnld, p_p_proxy, c_crypto]:
+    for p in [p_scan, p_wfp, p_dep, p_fc, p_cnv, p_merge, p_c_loc, p_c_dwnld, p_p_proxy, p_wfp_cnv, c_crypto]:
         p.add_argument('--debug', '-d', action='store_true', help='Enable debug messages')
         p.add_argument('--trace', '-t', action='store_true', help='Enable trace messages, including API posts')
         p.add_argument('--quiet', '-q', action='store_true', help='Enable quiet mode')
@@ -276,6 +356,7 @@ def fast(*_):
     Run the "fast" sub-command
     :param _: ignored/unused
     """
+    from .scanner import FAST_WINNOWING
     print(f'Fast Winnowing: {FAST_WINNOWING}')
 
 def file_count(parser, args):
@@ -297,6 +378,7 @@ def file_count(parser, args):
         scan_output = args.output
         open(scan_output, 'w').close()
 
+    from .filecount import FileCount
     counter = FileCount(debug=args.debug, quiet=args.quiet, trace=args.trace, scan_output=scan_output,
                         hidden_files_folders=args.all_hidden
                         )
@@ -329,10 +411,15 @@ def wfp(parser, args):
         scan_output = args.output
         open(scan_output, 'w').close()
 
+    if (args.binary or args.compress) and not scan_output:
+        print_stderr('Error: Please specify an output file (--output) for binary WFPs')
+        exit(1)
+    from .scanner import Scanner
     scan_options = 0 if args.skip_snippets else ScanType.SCAN_SNIPPETS.value  # Skip snippet generation or not
     scanner = Scanner(debug=args.debug, trace=args.trace, quiet=args.quiet, obfuscate=args.obfuscate,
                       scan_options=scan_options, all_extensions=args.all_extensions,
-                      all_folders=args.all_folders, hidden_files_folders=args.all_hidden, hpsm=args.hpsm)
+                      all_folders=args.all_folders, hidden_files_folders=args.all_hidden, hpsm=args.hpsm,
+                      wfp_binary=args.binary, wfp_compress=args.compress)
 
     if args.stdin:
         contents = sys.stdin.buffer.read()
@@ -395,6 +482,7 @@ def scan(parser, args):
         args: Namespace
             Parsed arguments
     """
+    from .scanner import Scanner
     if not args.scan_dir and not args.wfp and not args.stdin:
         print_stderr('Please specify a file/folder, fingerprint (--wfp) or STDIN (--stdin)')
         parser.parse_args([args.subparser, '-h'])
@@ -463,6 +551,10 @@ def scan(parser, args):
             print_stderr(f'Using Certificate {args.ca_cert}...')
         if args.hpsm:
             print_stderr("Setting HPSM mode...")
+        if args.async_scan:
+            print_stderr("Using async scanning...")
+        if args.cache_dir:
+            print_stderr(f'Using result cache {args.cache_dir}...')
         if flags:
             print_stderr(f'Using flags {flags}...')
     elif not args.quiet:
@@ -478,6 +570,9 @@ def scan(parser, args):
         print_stderr(f'Error: Certificate file does not exist: {args.ca_cert}.')
         exit(1)
     pac_file = get_pac_file(args.pac)
+    archive = get_archive(args)
+    checkpoint = get_checkpoint(args)
+    shard = get_shard(args.shard)
     scan_options = get_scan_options(args)   # Figure out what scanning options we have
 
     scanner = Scanner(debug=args.debug, trace=args.trace, quiet=args.quiet, api_key=args.key, url=args.apiurl,
@@ -488,16 +583,30 @@ def scan(parser, args):
                       scan_options=scan_options, sc_timeout=args.sc_timeout, sc_command=args.sc_command,
                       grpc_url=args.api2url, obfuscate=args.obfuscate,
                       ignore_cert_errors=args.ignore_cert_errors, proxy=args.proxy, grpc_proxy=args.grpc_proxy,
-                      pac=pac_file, ca_cert=args.ca_cert, retry=args.retry, hpsm=args.hpsm
+                      pac=pac_file, ca_cert=args.ca_cert, retry=args.retry, hpsm=args.hpsm,
+                      async_scan=args.async_scan, queue_requests=args.queue_requests, queue_size=args.queue_size,
+                      cache_dir=args.cache_dir, cache_ttl=args.cache_ttl, cache_size=args.cache_size,
+                      archive=archive, lb_strategy=args.lb_strategy, breaker_threshold=args.breaker_threshold,
+                      breaker_reset=args.breaker_reset, breaker_wait=args.breaker_wait, checkpoint=checkpoint,
+                      shard=shard, preserve_order=args.preserve_order, native_deps=args.native_deps,
+                      grpc_threads=args.grpc_threads, grpc_max_purls=args.grpc_max_purls,
+                      sc_processes=args.sc_processes
                       )
     if args.wfp:
         if not scanner.is_file_or_snippet_scan():
             print_stderr(f'Error: Cannot specify WFP scanning if file/snippet options are disabled ({scan_options})')
             exit(1)
+        wfp_paths = None
+        if args.wfp_select:
+            if not os.path.isfile(args.wfp_select):
+                print_stderr(f'Error: Specified --wfp-select file does not exist or is not a file: {args.wfp_select}')
+                exit(1)
+            with open(args.wfp_select) as f:
+                wfp_paths = [line.rstrip('\n') for line in f if line.strip()]
         if args.threads > 1:
-            scanner.scan_wfp_file_threaded(args.wfp)
+            scanner.scan_wfp_file_threaded(args.wfp, paths=wfp_paths)
         else:
-            scanner.scan_wfp_file(args.wfp)
+            scanner.scan_wfp_file(args.wfp, paths=wfp_paths)
     elif args.stdin:
         contents = sys.stdin.buffer.read()
         if not scanner.scan_contents(args.stdin, contents):
@@ -518,6 +627,10 @@ def scan(parser, args):
     else:
         print_stderr('No action found to process')
         exit(1)
+    if archive:
+        archive.close()
+    if checkpoint:
+        checkpoint.close()
 
 
 def dependency(parser, args):
@@ -542,9 +655,14 @@ def dependency(parser, args):
         scan_output = args.output
         open(scan_output, 'w').close()
 
-    sc_deps = ScancodeDeps(debug=args.debug, quiet=args.quiet, trace=args.trace, sc_command=args.sc_command,
-                           timeout=args.sc_timeout
-                           )
+    if args.native_deps:
+        from .manifestdeps import ManifestDeps
+        sc_deps = ManifestDeps(debug=args.debug, quiet=args.quiet, trace=args.trace)
+    else:
+        from .scancodedeps import ScancodeDeps
+        sc_deps = ScancodeDeps(debug=args.debug, quiet=args.quiet, trace=args.trace, sc_command=args.sc_command,
+                               timeout=args.sc_timeout, processes=args.sc_processes
+                               )
     if not sc_deps.get_dependencies(what_to_scan=args.scan_dir, result_output=scan_output):
         exit(1)
 
@@ -567,16 +685,19 @@ def convert(parser, args):
     if args.format == 'cyclonedx':
         if not args.quiet:
             print_stderr(f'Producing CycloneDX report...')
+        from .cyclonedx import CycloneDx
         cdx = CycloneDx(debug=args.debug, output_file=args.output)
         success = cdx.produce_from_file(args.input)
     elif args.format == 'spdxlite':
         if not args.quiet:
             print_stderr(f'Producing SPDX Lite report...')
+        from .spdxlite import SpdxLite
         spdxlite = SpdxLite(debug=args.debug, output_file=args.output)
         success = spdxlite.produce_from_file(args.input)
     elif args.format == 'csv':
         if not args.quiet:
             print_stderr(f'Producing CSV report...')
+        from .csvoutput import CsvOutput
         csvo = CsvOutput(debug=args.debug, output_file=args.output)
         success = csvo.produce_from_file(args.input)
     else:
@@ -585,6 +706,61 @@ def convert(parser, args):
         exit(1)
 
 
+def merge(parser, args):
+    """
+    Run the "merge" sub-command
+    Parameters
+    ----------
+        parser: ArgumentParser
+            command line parser object
+        args: Namespace
+            Parsed arguments
+    """
+    scan_output: str = None
+    if args.output:
+        scan_output = args.output
+        open(scan_output, 'w').close()
+    from .scanner import Scanner
+    output_format = args.format if args.format else 'plain'
+    scanner = Scanner(debug=args.debug, trace=args.trace, quiet=args.quiet, scan_output=scan_output,
+                      output_format=output_format, nb_threads=0)
+    try:
+        if not scanner.merge_results_files(args.files):
+            exit(1)
+    except Exception as e:
+        print_stderr(e)
+        exit(1)
+
+
+def utils_wfp_convert(parser, args):
+    """
+    Run the "utils wfp-convert" sub-command
+    Parameters
+    ----------
+        parser: ArgumentParser
+            command line parser object
+        args: Namespace
+            Parsed arguments
+    """
+    if not os.path.isfile(args.input):
+        print_stderr(f'Error: Specified input WFP file does not exist or is not a file: {args.input}')
+        exit(1)
+    from .wfpcontainer import WfpContainer
+    container = WfpContainer(debug=args.debug, trace=args.trace, quiet=args.quiet)
+    try:
+        if WfpContainer.is_container(args.input):
+            if not args.quiet:
+                print_stderr(f'Converting binary WFP container to text: {args.output}')
+            container.to_text(args.input, args.output)
+        else:
+            if not args.quiet:
+                print_stderr(f'Converting text WFP to binary container: {args.output}')
+            container.from_text(args.input, args.output, compress=args.compress)
+    except Exception as e:
+        print_stderr(e)
+        exit(1)
+
+
 def utils_certloc(*_):
     """
     Run the "utils certloc" sub-command
@@ -672,6 +848,7 @@ def get_pac_file(pac: str):
     """
     pac_file = None
     if pac:
+        import pypac
         if pac == 'auto':
             pac_file = pypac.get_pac()  # try to determine the PAC file
         elif pac.startswith('file://'):
@@ -689,6 +866,69 @@ def get_pac_file(pac: str):
     return pac_file
 
 
+def get_archive(args):
+    """
+    Get an API record/replay archive if requested
+    :param args: Parsed arguments
+    :return: ScanArchive object or None
+    """
+    if args.record and args.replay:
+        print_stderr('Error: Please specify only one of --record or --replay.')
+        exit(1)
+    if args.replay:
+        if not os.path.isfile(args.replay):
+            print_stderr(f'Error: Replay archive does not exist: {args.replay}.')
+            exit(1)
+        from .scanarchive import ScanArchive
+        return ScanArchive(args.replay, replay=True, debug=args.debug, trace=args.trace, quiet=args.quiet)
+    if args.record:
+        from .scanarchive import ScanArchive
+        return ScanArchive(args.record, debug=args.debug, trace=args.trace, quiet=args.quiet)
+    return None
+
+
+def get_shard(shard: str):
+    """
+    Parse the requested scan shard (I/N)
+    :param shard: shard specification string
+    :return: tuple of (shard index, shard count) or None
+    """
+    if not shard:
+        return None
+    index, _, count = shard.partition('/')
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        index, count = 0, 0
+    if count < 1 or not 1 <= index <= count:
+        print_stderr(f'Error: Invalid shard (--shard): {shard}. Should be I/N, with I from 1 to N.')
+        exit(1)
+    return index, count
+
+
+def get_checkpoint(args):
+    """
+    Get a scan checkpoint (new or resumed) if requested
+    :param args: Parsed arguments
+    :return: ScanCheckpoint object or None
+    """
+    if args.checkpoint and args.resume:
+        print_stderr('Error: Please specify only one of --checkpoint or --resume.')
+        exit(1)
+    checkpoint_dir = args.resume if args.resume else args.checkpoint
+    if not checkpoint_dir:
+        return None
+    target = args.wfp if args.wfp else args.scan_dir
+    from .scancheckpoint import ScanCheckpoint
+    try:
+        return ScanCheckpoint(checkpoint_dir, resume=bool(args.resume),
+                              target=os.path.abspath(target) if target else None,
+                              debug=args.debug, trace=args.trace, quiet=args.quiet)
+    except Exception as e:
+        print_stderr(e)
+        exit(1)
+
+
 def comp_crypto(parser, args):
     """
     Run the "component crypto" sub-command
@@ -706,12 +946,17 @@ def comp_crypto(parser, args):
     if args.ca_cert and not os.path.exists(args.ca_cert):
         print_stderr(f'Error: Certificate file does not exist: {args.ca_cert}.')
         exit(1)
+    from .components import Components  # Only load the gRPC client modules when needed
     pac_file = get_pac_file(args.pac)
+    archive = get_archive(args)
     comps = Components(debug=args.debug, trace=args.trace, quiet=args.quiet, grpc_url=args.api2url, api_key=args.key,
                            ca_cert=args.ca_cert, proxy=args.proxy, grpc_proxy=args.grpc_proxy, pac=pac_file,
-                       timeout=args.timeout)
+                       timeout=args.timeout, archive=archive, grpc_threads=args.grpc_threads,
+                       grpc_max_purls=args.grpc_max_purls)
     if not comps.get_crypto_details(args.input, args.purl, args.output):
         exit(1)
+    if archive:
+        archive.close()
 def main():
     """
     Run the ScanOSS CLI
@@ -30,6 +30,7 @@ from pypac.parser import PACFile
 
 from .scanner import Scanner
 from .scanossbase import ScanossBase
+from .scanarchive import ScanArchive
 from .scanossgrpc import ScanossGrpc
 
 
@@ -40,7 +41,8 @@ class Components(ScanossBase):
 
     def __init__(self, debug: bool = False, trace: bool = False, quiet: bool = False,
                  grpc_url: str = None, api_key: str = None, timeout: int = 600,
-                 proxy: str = None, grpc_proxy: str = None, ca_cert: str = None, pac: PACFile = None
+                 proxy: str = None, grpc_proxy: str = None, ca_cert: str = None, pac: PACFile = None,
+                 archive: ScanArchive = None, grpc_threads: int = 5, grpc_max_purls: int = 500
                  ):
         """
         Handle all component style requests
@@ -55,12 +57,16 @@ class Components(ScanossBase):
         :param grpc_proxy: Specific gRPC proxy (optional)
         :param ca_cert: TLS client certificate (optional)
         :param pac: Proxy Auto-Config file (optional)
+        :param archive: Archive to record/replay API traffic (optional)
+        :param grpc_threads: Maximum number of requests to send concurrently (default 5)
+        :param grpc_max_purls: Maximum number of purls to send in each request (default 500)
         """
         super().__init__(debug, trace, quiet)
         ver_details = Scanner.version_details()
         self.grpc_api = ScanossGrpc(url=grpc_url, debug=debug, quiet=quiet, trace=trace, api_key=api_key,
                                     ver_details=ver_details, ca_cert=ca_cert, proxy=proxy, pac=pac,
-                                    grpc_proxy=grpc_proxy, timeout=timeout)
+                                    grpc_proxy=grpc_proxy, timeout=timeout, archive=archive, nb_threads=grpc_threads,
+                                    max_purls=grpc_max_purls)
 
     def load_purls(self, json_file: str = None, purls: [] = None) -> dict:
         """
@@ -0,0 +1,143 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import List
+
+from .scanossbase import ScanossBase
+
+LB_LEAST_OUTSTANDING = 'least-outstanding'
+LB_POWER_OF_TWO = 'p2c'
+LB_STRATEGIES = [LB_LEAST_OUTSTANDING, LB_POWER_OF_TWO]
+ENDPOINT_COOLDOWN = 5         # Seconds to avoid an endpoint after its first failure (doubles with each failure)
+MAX_ENDPOINT_COOLDOWN = 60    # Maximum seconds to avoid a failing endpoint
+LATENCY_WEIGHT = 0.2          # Weight given to the latest request latency in the moving average
+
+
+@dataclass
+class Endpoint:
+    """
+    Scanning endpoint and its health/load details
+    """
+    url: str
+    outstanding: int = 0      # Number of requests currently in flight
+    requests: int = 0         # Total number of requests sent
+    errors: int = 0           # Total number of failed requests
+    failures: int = 0         # Number of consecutive failures
+    down_until: float = 0.0   # Time until which the endpoint should be avoided
+    latency: float = 0.0      # Moving average of the request latency (seconds)
+
+    def healthy(self, now: float) -> bool:
+        return self.down_until <= now
+
+
+class EndpointPool(ScanossBase):
+    """
+    Client side load balancing and failover across multiple scanning endpoints
+    Requests go to the healthy endpoint with the least outstanding requests (or the best of two random choices).
+    Endpoints that fail are avoided for an increasing cooldown period, while the others take over their load.
+    """
+
+    def __init__(self, urls: List[str], strategy: str = LB_LEAST_OUTSTANDING, debug: bool = False,
+                 trace: bool = False, quiet: bool = False):
+        """
+        Initialise the EndpointPool class
+        :param urls: list of endpoint URLs
+        :param strategy: load balancing strategy: least-outstanding (default) or p2c (power of two choices)
+        :param debug: enable debug (default False)
+        :param trace: enable trace (default False)
+        :param quiet: enable quiet mode (default False)
+        """
+        super().__init__(debug, trace, quiet)
+        if not urls:
+            raise Exception('ERROR: Please specify at least one endpoint URL')
+        if strategy and strategy not in LB_STRATEGIES:
+            raise Exception(f'ERROR: Unknown load balancing strategy: {strategy}. Should be one of {LB_STRATEGIES}')
+        self.strategy = strategy if strategy else LB_LEAST_OUTSTANDING
+        self.endpoints = [Endpoint(url) for url in dict.fromkeys(urls)]  # Remove duplicates, but keep the order
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def acquire(self) -> Endpoint:
+        """
+        Select the endpoint to send the next request to (and count it as outstanding)
+        If all endpoints are unhealthy, the one that is due to recover first is used
+        :return: selected endpoint
+        """
+        with self._lock:
+            now = time.monotonic()
+            candidates = [e for e in self.endpoints if e.healthy(now)]
+            if not candidates:
+                endpoint = min(self.endpoints, key=lambda e: e.down_until)
+            elif len(candidates) == 1:
+                endpoint = candidates[0]
+            elif self.strategy == LB_POWER_OF_TWO:
+                endpoint = min(random.sample(candidates, 2), key=lambda e: (e.outstanding, e.latency))
+            else:
+                least = min(e.outstanding for e in candidates)
+                endpoint = random.choice([e for e in candidates if e.outstanding == least])
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint, success: bool, elapsed: float = None) -> None:
+        """
+        Record the outcome of a request sent to the given endpoint
+        :param endpoint: endpoint the request was sent to
+        :param success: True if the endpoint responded successfully
+        :param elapsed: request latency in seconds (optional)
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+            if elapsed is not None:
+                endpoint.latency = elapsed if not endpoint.latency else \
+                    LATENCY_WEIGHT * elapsed + (1 - LATENCY_WEIGHT) * endpoint.latency
+            if success:
+                endpoint.failures = 0
+                endpoint.down_until = 0.0
+                return
+            endpoint.errors += 1
+            endpoint.failures += 1
+            cooldown = min(ENDPOINT_COOLDOWN * 2 ** (endpoint.failures - 1), MAX_ENDPOINT_COOLDOWN)
+            endpoint.down_until = time.monotonic() + cooldown
+        if len(self.endpoints) > 1:
+            self.print_debug(f'Endpoint {endpoint.url} failed ({endpoint.failures} in a row). '
+                             f'Avoiding it for {cooldown}s.')
+
+    def has_healthy(self) -> bool:
+        """
+        Check if there is currently a healthy endpoint to fail over to
+        :return: True if at least one endpoint is healthy
+        """
+        with self._lock:
+            now = time.monotonic()
+            return any(e.healthy(now) for e in self.endpoints)
+
+#
+# End of EndpointPool Class
+#
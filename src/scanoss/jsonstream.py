@@ -0,0 +1,210 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import json
+import re
+from typing import IO, Iterator
+
+JSON_CHUNK_SIZE = 1024 * 1024  # Amount of JSON text to read at a time (1MB)
+JSON_WHITESPACE = ' \t\n\r'
+_STRUCTURE = re.compile(r'["{}\[\]]')      # Characters changing the nesting (outside of strings)
+_STRING_END = re.compile(r'["\\]')         # Characters ending (or escaping inside) a string
+_SCALAR_END = re.compile(r'[,}\]\s]')      # Characters ending a number/true/false/null
+_DECODER = json.JSONDecoder()
+
+
+class JsonStream:
+    """
+    Incremental reader of the elements of an array inside a (large) JSON document
+    The document is read a chunk at a time and only one element of the requested array is decoded at a time,
+    all other values are skipped without being decoded or held in memory. i.e. iterate over the 'files' of
+    a multi hundred megabyte scancode results file using a (roughly) constant amount of memory.
+    """
+
+    def __init__(self, fp: IO[str], chunk_size: int = JSON_CHUNK_SIZE):
+        """
+        Initialise the JsonStream class
+        :param fp: text file object to read the JSON document from
+        :param chunk_size: amount of JSON text to read at a time (default 1MB)
+        """
+        self.fp = fp
+        self.chunk_size = chunk_size if chunk_size and chunk_size > 0 else JSON_CHUNK_SIZE
+        self._buf = ''
+        self._pos = 0  # Position of the next unconsumed character in the buffer
+        self._eof = False
+
+    def iter_array(self, key: str) -> Iterator[object]:
+        """
+        Iterate over the (decoded) elements of the array of the given key of the top level JSON object
+        :param key: top level key of the array (i.e. 'files')
+        :return: iterator of the array elements (nothing if the key is not present or not an array)
+        """
+        self.__expect('{')
+        if self.__peek() == '}':
+            return
+        found = False
+        while True:
+            name = self.__read_value()
+            self.__expect(':')
+            if name == key and not found and self.__peek() == '[':
+                found = True
+                self.__expect('[')
+                if self.__peek() == ']':
+                    self.__expect(']')
+                else:
+                    while True:
+                        yield self.__read_value()
+                        if self.__expect(',]') == ']':
+                            break
+            else:
+                self.__skip_value()
+            if self.__expect(',}') == '}':
+                return
+
+    def __fill(self) -> bool:
+        """
+        Read the next chunk of the document into the buffer (dropping the consumed text)
+        :return: True if more text was read, False at the end of the document
+        """
+        if self._eof:
+            return False
+        data = self.fp.read(self.chunk_size)
+        if not data:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def __peek(self) -> str:
+        """
+        Skip any whitespace and return the next character (without consuming it)
+        :return: next character
+        """
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in JSON_WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self.__fill():
+                raise ValueError('Unexpected end of JSON document')
+
+    def __expect(self, chars: str) -> str:
+        """
+        Consume the next (non-whitespace) character, which must be one of those given
+        :param chars: allowed characters
+        :return: character consumed
+        """
+        c = self.__peek()
+        if c not in chars:
+            raise ValueError(f'Expected one of {chars!r} but found {c!r} in JSON document')
+        self._pos += 1
+        return c
+
+    def __value_end(self, keep: bool = True) -> int:
+        """
+        Find the end of the JSON value at the current position, reading more of the document as required
+        :param keep: keep the text of the value in the buffer (False to discard it while skipping)
+        :return: buffer position after the end of the value
+        """
+        first = self.__peek()
+        offset = 1  # Scanning offset from the current position
+        if first not in '{["':
+            while True:
+                m = _SCALAR_END.search(self._buf, self._pos + offset)
+                if m:
+                    return m.start()
+                offset = len(self._buf) - self._pos
+                if not self.__fill():
+                    return len(self._buf)
+        depth = 0 if first == '"' else 1
+        in_string = first == '"'
+        while True:
+            i = self._pos + offset
+            while True:
+                if in_string:
+                    m = _STRING_END.search(self._buf, i)
+                    if not m:
+                        i = len(self._buf)
+                        break
+                    if m.group() == '\\':
+                        if m.end() >= len(self._buf):  # Escaped character not read yet
+                            i = m.start()
+                            break
+                        i = m.end() + 1
+                        continue
+                    in_string = False
+                    i = m.end()
+                    if depth == 0:
+                        return i
+                    continue
+                m = _STRUCTURE.search(self._buf, i)
+                if not m:
+                    i = len(self._buf)
+                    break
+                c = m.group()
+                i = m.end()
+                if c == '"':
+                    in_string = True
+                elif c in '{[':
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        return i
+            if not keep:
+                self._pos = i  # Nothing before the scan position is needed
+            offset = i - self._pos
+            if not self.__fill():
+                raise ValueError('Unexpected end of JSON document')
+
+    def __read_value(self) -> object:
+        """
+        Consume and decode the JSON value at the current position
+        Values already completely in the buffer are decoded directly, otherwise the end of the value is found
+        (reading more of the document) before decoding it
+        :return: decoded value
+        """
+        first = self.__peek()
+        try:
+            value, end = _DECODER.raw_decode(self._buf, self._pos)
+            # A number is only complete if followed by a delimiter (it might continue in the next chunk)
+            if first in '{["' or _SCALAR_END.match(self._buf, end):
+                self._pos = end
+                return value
+        except ValueError:
+            pass  # Not completely read yet (any genuine errors are raised decoding the complete value below)
+        end = self.__value_end()
+        value = json.loads(self._buf[self._pos:end])
+        self._pos = end
+        return value
+
+    def __skip_value(self) -> None:
+        """
+        Consume the JSON value at the current position, without keeping it
+        """
+        self._pos = self.__value_end(keep=False)
+
+#
+# End of JsonStream Class
+#
@@ -0,0 +1,457 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import configparser
+import json
+import os
+import re
+import xml.etree.ElementTree as ElementTree
+from fnmatch import fnmatch
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+from .scancodedeps import ScancodeDeps
+
+TOML_AVAILABLE = False
+try:
+    import tomllib as toml_lib  # Python 3.11+
+
+    TOML_AVAILABLE = True
+except ImportError:
+    try:
+        import tomli as toml_lib
+
+        TOML_AVAILABLE = True
+    except ImportError:
+        toml_lib = None
+
+# Manifest/lockfile name patterns and the parser (method name) to use for them
+MANIFEST_PARSERS = [
+    ('package.json', '_parse_package_json'),
+    ('package-lock.json', '_parse_package_lock'),
+    ('npm-shrinkwrap.json', '_parse_package_lock'),
+    ('requirements*.txt', '_parse_requirements'),
+    ('pyproject.toml', '_parse_pyproject'),
+    ('setup.cfg', '_parse_setup_cfg'),
+    ('pom.xml', '_parse_pom'),
+    ('go.mod', '_parse_go_mod'),
+    ('go.sum', '_parse_go_sum'),
+    ('Cargo.toml', '_parse_cargo_toml'),
+    ('Cargo.lock', '_parse_cargo_lock'),
+    ('Gemfile.lock', '_parse_gemfile_lock'),
+    ('composer.json', '_parse_composer'),
+]
+SKIP_DIRS = {'.git', '.hg', '.svn', 'node_modules', '__pycache__', '.venv', 'venv', '.tox'}
+PEP508_RE = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*(\(?([^;@()]*)\)?)?')
+PYPI_PIN_RE = re.compile(r'^===?\s*([^,*\s]+)$')
+GO_REQUIRE_RE = re.compile(r'^(\S+)\s+(v\S+)')
+GEM_SPEC_RE = re.compile(r'^ {4}([^\s(]+) \(([^)]+)\)$')
+POM_PROPERTY_RE = re.compile(r'\$\{([^}]+)\}')
+
+
+def manifest_parser(filename: str) -> Optional[str]:
+    """
+    Get the name of the parser for the given manifest/lockfile
+    :param filename: file name (without path)
+    :return: parser method name or None if not a supported manifest
+    """
+    for pattern, parser in MANIFEST_PARSERS:
+        if fnmatch(filename, pattern):
+            return parser
+    return None
+
+
+def is_manifest(path: str) -> bool:
+    """
+    Check if the given file is a natively parsed dependency manifest/lockfile (outside of vendored/tool folders)
+    :param path: file path (relative to the scan root)
+    :return: True if it is a manifest, False otherwise
+    """
+    parts = path.replace(os.sep, '/').split('/')
+    if any(part in SKIP_DIRS for part in parts[:-1]):
+        return False
+    return manifest_parser(parts[-1]) is not None
+
+
+class ManifestDeps(ScancodeDeps):
+    """
+    SCANOSS native dependency extraction class
+    Parses the common package manifests & lockfiles directly (instead of running scancode), producing the same
+    dependency summary as ScancodeDeps.produce_from_json: {'files': [{'file': <path>, 'purls': [...]}]}
+    """
+
+    def __init__(self, debug: bool = False, quiet: bool = False, trace: bool = False, scan_output: str = None,
+                 hidden_files_folders: bool = False):
+        """
+        Initialise ManifestDeps class
+        :param hidden_files_folders: search hidden files/folders for manifests (default False)
+        """
+        super().__init__(debug=debug, quiet=quiet, trace=trace, scan_output=scan_output)
+        self.hidden_files_folders = hidden_files_folders
+
+    def find_manifests(self, what_to_scan: str) -> List[str]:
+        """
+        Search the given file/folder for supported manifests & lockfiles
+        :param what_to_scan: file or folder to search
+        :return: list of manifest file paths
+        """
+        if os.path.isfile(what_to_scan):
+            return [what_to_scan] if manifest_parser(os.path.basename(what_to_scan)) else []
+        manifests = []
+        for root, dirs, files in os.walk(what_to_scan):
+            dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and
+                             (self.hidden_files_folders or not d.startswith('.')))
+            for f in sorted(files):
+                if is_manifest(f) and (self.hidden_files_folders or not f.startswith('.')):
+                    manifests.append(os.path.join(root, f))
+        return manifests
+
+    def produce_from_manifests(self, manifests: List[str], root: str = None) -> dict:
+        """
+        Parse the given manifest/lockfiles into SCANOSS dependency data
+        :param manifests: list of manifest file paths
+        :param root: folder to report the manifest paths relative to (default: the parent of each manifest)
+        :return: Dependency dictionary
+        """
+        files = []
+        for manifest in manifests:
+            parser = manifest_parser(os.path.basename(manifest))
+            if not parser:
+                self.print_debug(f'Ignoring unsupported manifest: {manifest}')
+                continue
+            try:
+                with open(manifest, 'r', encoding='utf-8', errors='replace') as f:
+                    purls = getattr(self, parser)(f.read())
+            except Exception as e:
+                self.print_stderr(f'Warning: Problem parsing dependency manifest {manifest}: {e}')
+                continue
+            if purls:
+                path = os.path.relpath(manifest, root) if root else os.path.basename(manifest)
+                self.print_debug(f'Path: {path}, Dependencies: {len(purls)}')
+                files.append({'file': path.replace(os.sep, '/'), 'purls': purls})
+        return {'files': files}
+
+    def produce_from_scan(self, what_to_scan: str, output_file: str = None, manifests: List[str] = None) -> dict:
+        """
+        Search the given file/folder for manifests & lockfiles and return their dependencies
+        :param what_to_scan: file or folder to scan
+        :param output_file: ignored (no interim file is required)
+        :param manifests: manifests already found in the folder (optional - default search the folder)
+        :return: Dependency dictionary or None on failure
+        """
+        if not what_to_scan or not os.path.exists(what_to_scan):
+            self.print_stderr(f'ERROR: Specified file/folder does not exist: {what_to_scan}')
+            return None
+        root = what_to_scan if os.path.isdir(what_to_scan) else None
+        if manifests is None:
+            manifests = self.find_manifests(what_to_scan)
+        return self.produce_from_manifests(manifests, root)
+
+    @staticmethod
+    def _purl(purl_type: str, name: str, version: str = None, requirement: str = None) -> dict:
+        """
+        Build a dependency purl entry (matching the scancode summary conventions)
+        :param purl_type: purl type (npm, pypi, etc.)
+        :param name: package name (including namespace)
+        :param version: exact version (optional)
+        :param requirement: version requirement (optional)
+        :return: purl dictionary
+        """
+        purl = f'pkg:{purl_type}/{quote(name, safe="/")}'
+        if version:
+            purl = f'{purl}@{quote(version, safe="")}'
+        dep = {'purl': purl}
+        if requirement:
+            requirement = requirement.strip()
+            if requirement and not purl.endswith(requirement) and not requirement.startswith('file:'):
+                dep['requirement'] = requirement
+        return dep
+
+    @staticmethod
+    def _pypi_name(name: str) -> str:
+        """
+        Normalise a PyPI package name (PEP 503)
+        """
+        return re.sub(r'[-_.]+', '-', name).lower()
+
+    @staticmethod
+    def _pypi_dependency(spec: str) -> Optional[dict]:
+        """
+        Parse a PEP 508 requirement string into a PyPI purl entry
+        :param spec: requirement (i.e. requests[socks]>=2.0; python_version < "3.8")
+        :return: purl dictionary or None
+        """
+        match = PEP508_RE.match(spec)
+        if not match:
+            return None
+        name = ManifestDeps._pypi_name(match.group(1))
+        requirement = (match.group(4) or '').strip().replace(' ', '')
+        pinned = PYPI_PIN_RE.match(requirement)
+        if pinned:
+            return ManifestDeps._purl('pypi', name, version=pinned.group(1))
+        return ManifestDeps._purl('pypi', name, requirement=requirement)
+
+    def _parse_package_json(self, contents: str) -> List[dict]:
+        """
+        Parse npm package.json (dependencies, dev, peer & optional)
+        :param contents: file contents
+        :return: list of purl dictionaries
+        """
+        data = json.loads(contents)
+        purls = []
+        for section in ('dependencies', 'devDependencies', 'peerDependencies', 'optionalDependencies'):
+            for name, requirement in (data.get(section) or {}).items():
+                purls.append(self._purl('npm', name, requirement=requirement if isinstance(requirement, str) else None))
+        return purls
+
+    def _parse_package_lock(self, contents: str) -> List[dict]:
+        """
+        Parse npm package-lock.json/npm-shrinkwrap.json (lockfile versions 1-3)
+        :param contents: file contents
+        :return: list of purl dictionaries
+        """
+        data = json.loads(contents)
+        purls = []
+        packages = data.get('packages')
+        if packages:  # lockfile version 2+
+            for path, details in packages.items():
+                if not path or details.get('link') or not details.get('version'):
+                    continue  # Skip the root project & linked (workspace) packages
+                name = details.get('name') or path.rsplit('node_modules/', 1)[-1]
+                purls.append(self._purl('npm', name, version=details['version']))
+        else:  # lockfile version 1 (nested dependencies)
+            pending = list((data.get('dependencies') or {}).items())
+            while pending:
+                name, details = pending.pop(0)
+                if details.get('version'):
+                    purls.append(self._purl('npm', name, version=details['version']))
+                pending.extend((details.get('dependencies') or {}).items())
+        return purls
+
+    def _parse_requirements(self, contents: str) -> List[dict]:
+        """
+        Parse pip requirements*.txt
+        :param contents: file contents
+        :return: list of purl dictionaries
+        """
+        purls = []
+        for line in contents.replace('\\\n', ' ').splitlines():
+            line = line.split(' #', 1)[0].strip()
+            if not line or line.startswith(('#', '-', 'http:', 'https:', 'git+', 'file:', '.', '/')):
+                continue  # Skip comments, options (-r, -e, --hash, etc.) & direct references
+            dep = self._pypi_dependency(line.split(' --', 1)[0])
+            if dep:
+                purls.append(dep)
+        return purls
+
+    def _parse_pyproject(self, contents: str) -> List[dict]:
+        """
+        Parse Python pyproject.toml (PEP 621 & Poetry dependencies)
+        :param contents: file contents
+        :return: list of purl dictionaries
+        """
+        data = self.__load_toml(contents)
+        purls = []
+        project = data.get('project') or {}
+        for spec in project.get('dependencies') or []:
+            dep = self._pypi_dependency(spec)
+            if dep:
+                purls.append(dep)
+        poetry = (data.get('tool') or {}).get('poetry') or {}
+        for name, requirement in (poetry.get('dependencies') or {}).items():
+            if name.lower() == 'python':
+                continue
+            if isinstance(requirement, dict):
+                requirement = requirement.get('version')
+            if not isinstance(requirement, str) or requirement == '*':
+                requirement = None
+            purls.append(self._purl('pypi', self._pypi_name(name), requirement=requirement))
+        return purls
+
+    def _parse_setup_cfg(self, contents: str) -> List[dict]:
+        """
+        Parse Python setup.cfg (install_requires)
+        :param contents: file contents
+        :return: list of purl dictionaries
+        """
+        config = configparser.ConfigParser(interpolation=None)
+        config.read_string(contents)
+        purls = []
+        if config.has_option('options', 'install_requires'):
+            for line in config.get('options', 'install_requires').splitlines():
+                line = line.split('#', 1)[0].strip()
+                dep = self._pypi_dependency(line) if line else None
+                if dep:
+                    purls.append(dep)
+        return purls
+
+    def _parse_pom(self, contents: str) -> List[dict]:
+        """
+        Parse Maven pom.xml (resolving ${property} versions from the pom properties)
+        :param contents: file contents
+        :return: list of purl dictionaries
+        """
+        root = ElementTree.fromstring(contents)
+        ns = root.tag[:root.tag.index('}') + 1] if root.tag.startswith('{') else ''
+        properties = {}
+        props = root.find(f'{ns}properties')
+        if props is not None:
+            for prop in props:
+                properties[prop.tag[len(ns):]] = (prop.text or '').strip()
+        version = root.findtext(f'{ns}version')
+        if version:
+            properties.setdefault('project.version', version.strip())
+        purls = []
+        deps = root.find(f'{ns}dependencies')
+        for dep in deps if deps is not None else []:
+            group = (dep.findtext(f'{ns}groupId') or '').strip()
+            artifact = (dep.findtext(f'{ns}artifactId') or '').strip()
+            if not group or not artifact:
+                continue
+            version = POM_PROPERTY_RE.sub(lambda m: properties.get(m.group(1), m.group(0)),
+                                          (dep.findtext(f'{ns}version') or '').strip())
+            if version and '${' not in version and not version.startswith(('[', '(')):
+                purls.append(self._purl('maven', f'{group}/{artifact}', version=version))
+            else:
+                purls.append(self._purl('maven', f'{group}/{artifact}', requirement=version))
+        return purls
+
+    def _parse_go_mod(self, contents: str) -> List[dict]:
+        """
+        Parse Go go.mod (require directives)
+        :param contents: file contents
+        :return: list of purl dictionaries
+        """
+        purls = []
+        in_require = False
+        for line in contents.splitlines():
+            line = line.split('//', 1)[0].strip()
+            if in_require:
+                if line == ')':
+                    in_require = False
+                    continue
+            elif line.startswith('require ('):
+                in_require = True
+                continue
+            elif line.startswith('require '):
+                line = line[len('require '):].strip()
+            else:
+                continue
+            match = GO_REQUIRE_RE.match(line)
+            if match:
+                purls.append(self._purl('golang', match.group(1), version=match.group(2)))
+        return purls
+
+    def _parse_go_sum(self, contents: str) -> List[dict]:
+        """
+        Parse Go go.sum
+        :param contents: file contents
+        :return: list of purl dictionaries
+        """
+        purls = []
+        seen = set()
+        for line in contents.splitlines():
+            parts = line.split()
+            if len(parts) < 2 or parts[1].endswith('/go.mod') or (parts[0], parts[1]) in seen:
+                continue
+            seen.add((parts[0], parts[1]))
+            purls.append(self._purl('golang', parts[0], version=parts[1]))
+        return purls
+
+    def _parse_cargo_toml(self, contents: str) -> List[dict]:
+        """
+        Parse Rust Cargo.toml (dependencies, dev & build)
+        :param contents: file contents
+        :return: list of purl dictionaries
+        """
+        data = self.__load_toml(contents)
+        purls = []
+        for section in ('dependencies', 'dev-dependencies', 'build-dependencies'):
+            for name, requirement in (data.get(section) or {}).items():
+                if isinstance(requirement, dict):
+                    name = requirement.get('package', name)
+                    requirement = requirement.get('version')
+                purls.append(self._purl('cargo', name, requirement=requirement if isinstance(requirement, str)
+                                        else None))
+        return purls
+
+    def _parse_cargo_lock(self, contents: str) -> List[dict]:
+        """
+        Parse Rust Cargo.lock (registry & git packages)
+        :param contents: file contents
+        :return: list of purl dictionaries
+        """
+        data = self.__load_toml(contents)
+        purls = []
+        for package in data.get('package') or []:
+            if package.get('name') and package.get('version') and package.get('source'):  # Skip local crates
+                purls.append(self._purl('cargo', package['name'], version=package['version']))
+        return purls
+
+    def _parse_gemfile_lock(self, contents: str) -> List[dict]:
+        """
+        Parse Ruby Gemfile.lock (top level specs)
+        :param contents: file contents
+        :return: list of purl dictionaries
+        """
+        purls = []
+        in_specs = False
+        for line in contents.splitlines():
+            if not line.startswith(' '):
+                in_specs = False  # New section
+            elif line.strip() == 'specs:':
+                in_specs = True
+            elif in_specs:
+                match = GEM_SPEC_RE.match(line)
+                if match:
+                    purls.append(self._purl('gem', match.group(1), version=match.group(2)))
+        return purls
+
+    def _parse_composer(self, contents: str) -> List[dict]:
+        """
+        Parse PHP composer.json (require & require-dev)
+        :param contents: file contents
+        :return: list of purl dictionaries
+        """
+        data = json.loads(contents)
+        purls = []
+        for section in ('require', 'require-dev'):
+            for name, requirement in (data.get(section) or {}).items():
+                if '/' not in name:
+                    continue  # Skip platform requirements (php, ext-*, etc.)
+                purls.append(self._purl('composer', name, requirement=requirement))
+        return purls
+
+    def __load_toml(self, contents: str) -> Dict:
+        """
+        Parse the given TOML contents
+        :param contents: TOML string
+        :return: TOML data
+        """
+        if not TOML_AVAILABLE:
+            raise Exception('No TOML parser available. Please install tomli (pip3 install tomli)')
+        return toml_lib.loads(contents)
+
+#
+# End of ManifestDeps Class
+#
@@ -0,0 +1,391 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from concurrent import futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import grpc
+
+from .api.common.v2.scanoss_common_pb2 import EchoResponse, StatusResponse, StatusCode
+from .api.cryptography.v2.scanoss_cryptography_pb2 import AlgorithmResponse
+from .api.cryptography.v2.scanoss_cryptography_pb2_grpc import (CryptographyServicer,
+                                                                 add_CryptographyServicer_to_server)
+from .api.dependencies.v2.scanoss_dependencies_pb2 import DependencyResponse
+from .api.dependencies.v2.scanoss_dependencies_pb2_grpc import (DependenciesServicer,
+                                                                 add_DependenciesServicer_to_server)
+from .api.vulnerabilities.v2.scanoss_vulnerabilities_pb2 import VulnerabilityResponse
+from .api.vulnerabilities.v2.scanoss_vulnerabilities_pb2_grpc import (VulnerabilitiesServicer,
+                                                                       add_VulnerabilitiesServicer_to_server)
+from .scanossbase import ScanossBase
+
+SCAN_PATH = '/api/scan/direct'
+WFP_FILE_RE = re.compile(rb'^file=([0-9a-fA-F]+),(\d+),(.+?)\r?$', re.MULTILINE)
+
+
+def latency_distribution(spec: str):
+    """
+    Parse a latency distribution specification (all values in milliseconds):
+        fixed:<ms>, uniform:<min>:<max>, normal:<mean>:<stddev>, exp:<mean>
+    :param spec: latency specification (a plain number is treated as fixed)
+    :return: function returning the next latency (in seconds)
+    """
+    if not spec:
+        return lambda: 0.0
+    parts = str(spec).split(':')
+    if len(parts) == 1:
+        parts.insert(0, 'fixed')
+    kind = parts[0]
+    values = [float(v) / 1000.0 for v in parts[1:]]
+    if kind == 'fixed' and len(values) == 1:
+        return lambda: values[0]
+    if kind == 'uniform' and len(values) == 2:
+        return lambda: random.uniform(values[0], values[1])
+    if kind == 'normal' and len(values) == 2:
+        return lambda: max(0.0, random.gauss(values[0], values[1]))
+    if kind == 'exp' and len(values) == 1 and values[0] > 0:
+        return lambda: random.expovariate(1.0 / values[0])
+    raise ValueError(f'Unknown latency distribution: {spec}')
+
+
+class MockScanossServer(ScanossBase):
+    """
+    Local stand-in for the SCANOSS scanning (REST) and Dependencies/Cryptography (gRPC) APIs
+    Used for load/throughput testing of the client without a real server. Latency, error/503 injection and
+    the size of the responses are all configurable.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', http_port: int = 0, grpc_port: int = 0, latency: str = None,
+                 error_rate: float = 0.0, busy_rate: float = 0.0, match_rate: float = 1.0,
+                 results_per_file: int = 1, payload_size: int = 0, grpc_workers: int = 10,
+                 debug: bool = False, trace: bool = False, quiet: bool = False):
+        """
+        Initialise the MockScanossServer class
+        :param host: host/interface to listen on (default 127.0.0.1)
+        :param http_port: REST port to listen on (default 0 - pick a free port)
+        :param grpc_port: gRPC port to listen on (default 0 - pick a free port, None - disable gRPC)
+        :param latency: latency distribution to add to each request (see latency_distribution)
+        :param error_rate: fraction of requests to fail with a (retryable) HTTP 500/gRPC UNAVAILABLE (default 0)
+        :param busy_rate: fraction of scan requests to reject with HTTP 503 - service limits exceeded (default 0)
+        :param match_rate: fraction of files to report as matched (default 1.0)
+        :param results_per_file: number of results to return for each matched file (default 1)
+        :param payload_size: extra bytes of padding to add to each result (default 0)
+        :param grpc_workers: number of gRPC server worker threads (default 10)
+        :param debug: enable debug (default False)
+        :param trace: enable trace (default False)
+        :param quiet: enable quiet mode (default False)
+        """
+        super().__init__(debug, trace, quiet)
+        self.host = host
+        self.http_port = http_port
+        self.grpc_port = grpc_port
+        self.latency = latency_distribution(latency)
+        self.error_rate = error_rate
+        self.busy_rate = busy_rate
+        self.match_rate = match_rate
+        self.results_per_file = results_per_file if results_per_file > 0 else 1
+        self.padding = 'x' * payload_size if payload_size > 0 else None
+        self.grpc_workers = grpc_workers
+        self.stats = {'requests': 0, 'files': 0, 'errors': 0, 'busy': 0, 'grpc_requests': 0}
+        self._lock = threading.Lock()
+        self._http_server = None
+        self._http_thread = None
+        self._grpc_server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        """
+        :return: REST scanning URL of the mock server
+        """
+        return f'http://{self.host}:{self.http_port}{SCAN_PATH}'
+
+    @property
+    def grpc_url(self) -> str:
+        """
+        :return: gRPC URL of the mock server
+        """
+        return f'http://{self.host}:{self.grpc_port}'
+
+    def start(self) -> None:
+        """
+        Start the REST (and gRPC) servers in the background
+        """
+        handler = type('MockScanHandler', (MockScanHandler,), {'mock': self})
+        self._http_server = MockHTTPServer((self.host, self.http_port), handler)
+        self.http_port = self._http_server.server_address[1]
+        self._http_thread = threading.Thread(target=self._http_server.serve_forever, daemon=True)
+        self._http_thread.start()
+        self.print_debug(f'Mock scanning API listening on {self.url}')
+        if self.grpc_port is not None:
+            self._grpc_server = grpc.server(futures.ThreadPoolExecutor(max_workers=self.grpc_workers))
+            add_DependenciesServicer_to_server(MockDependencies(self), self._grpc_server)
+            add_CryptographyServicer_to_server(MockCryptography(self), self._grpc_server)
+            add_VulnerabilitiesServicer_to_server(MockVulnerabilities(self), self._grpc_server)
+            self.grpc_port = self._grpc_server.add_insecure_port(f'{self.host}:{self.grpc_port}')
+            self._grpc_server.start()
+            self.print_debug(f'Mock gRPC API listening on {self.grpc_url}')
+
+    def stop(self) -> None:
+        """
+        Stop the servers
+        """
+        if self._http_server:
+            self._http_server.shutdown()
+            self._http_server.server_close()
+            self._http_server = None
+        if self._grpc_server:
+            self._grpc_server.stop(grace=None)
+            self._grpc_server = None
+
+    def count(self, stat: str, amount: int = 1) -> None:
+        """
+        Increment the given statistic
+        """
+        with self._lock:
+            self.stats[stat] += amount
+
+    def inject(self) -> str:
+        """
+        Wait for the configured latency and decide if the request should fail
+        :return: 'busy', 'error' or None (process the request)
+        """
+        delay = self.latency()
+        if delay > 0:
+            time.sleep(delay)
+        draw = random.random()
+        if draw < self.busy_rate:
+            return 'busy'
+        if draw < self.busy_rate + self.error_rate:
+            return 'error'
+        return None
+
+    def scan_results(self, wfp: bytes) -> dict:
+        """
+        Produce mock scan results for each file in the given WFP
+        :param wfp: WFP request body
+        :return: scan results dictionary
+        """
+        results = {}
+        for file_hash, size, path in WFP_FILE_RE.findall(wfp):
+            file_hash = file_hash.decode('utf-8')
+            path = path.decode('utf-8', errors='replace')
+            if random.random() >= self.match_rate:
+                results[path] = [{'id': 'none', 'server': {'version': 'mock'}}]
+                continue
+            matches = []
+            for i in range(self.results_per_file):
+                name = hashlib.md5(f'{path}{i}'.encode('utf-8')).hexdigest()[:8]
+                match = {'id': 'file', 'lines': 'all', 'oss_lines': 'all', 'matched': '100%',
+                         'file_hash': file_hash, 'source_hash': file_hash, 'file': path, 'file_url': '',
+                         'vendor': 'mock', 'component': f'mock-{name}', 'version': '1.0.0', 'latest': '1.0.0',
+                         'url': f'https://example.com/mock/{name}', 'purl': [f'pkg:generic/mock/{name}@1.0.0'],
+                         'release_date': '2023-01-01', 'status': 'pending',
+                         'licenses': [{'name': 'MIT', 'source': 'component_declared'}],
+                         'server': {'version': 'mock', 'kb_version': {'monthly': 'mock', 'daily': 'mock'}}}
+                if self.padding:
+                    match['padding'] = self.padding
+                matches.append(match)
+            results[path] = matches
+        return results
+
+#
+# End of MockScanossServer Class
+#
+
+
+class MockHTTPServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server with a listen backlog large enough for lots of concurrent client connections
+    """
+    daemon_threads = True
+    request_queue_size = 1024  # Must be set before the server starts listening
+
+
+class MockScanHandler(BaseHTTPRequestHandler):
+    """
+    Mock SCANOSS scanning API request handler
+    """
+    protocol_version = 'HTTP/1.1'
+    mock: MockScanossServer = None
+
+    def do_GET(self):
+        if self.mock.inject():
+            self.__respond(503, 'text/plain', b'Service unavailable (mock)')
+        else:
+            self.__respond(200, 'application/json', b'{"alive": true}')
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path.split('?')[0] != SCAN_PATH:
+            self.__respond(404, 'text/plain', b'Not found')
+            return
+        self.mock.count('requests')
+        action = self.mock.inject()
+        if action == 'busy':
+            self.mock.count('busy')
+            self.__respond(503, 'text/plain', b'Service limits exceeded (mock)')
+            return
+        if action == 'error':
+            self.mock.count('errors')
+            self.__respond(500, 'text/plain', b'Internal server error (mock)')
+            return
+        results = self.mock.scan_results(body)
+        self.mock.count('files', len(results))
+        self.__respond(200, 'application/json', json.dumps(results).encode('utf-8'))
+
+    def __respond(self, status: int, content_type: str, data: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.mock.trace:
+            self.mock.print_trace(f'Mock API: {format % args}')
+
+
+class MockDependencies(DependenciesServicer):
+    """
+    Mock SCANOSS Dependencies gRPC service
+    """
+
+    def __init__(self, mock: MockScanossServer):
+        self.mock = mock
+
+    def Echo(self, request, context):
+        return EchoResponse(message=request.message)
+
+    def GetDependencies(self, request, context):
+        self.mock.count('grpc_requests')
+        if self.mock.inject():
+            self.mock.count('errors')
+            context.abort(grpc.StatusCode.UNAVAILABLE, 'Service unavailable (mock)')
+        resp = DependencyResponse(status=StatusResponse(status=StatusCode.SUCCESS, message='Success'))
+        for file in request.files:
+            dep_file = resp.files.add(file=file.file, id='dependency', status='pending')
+            for purl in file.purls:
+                version = purl.requirement.lstrip('^~=<>! ') or '1.0.0'
+                dep = dep_file.dependencies.add(component=purl.purl.split('/')[-1].split('@')[0], purl=purl.purl,
+                                                version=version, url=f'https://example.com/{purl.purl}')
+                dep.licenses.add(name='MIT', spdx_id='MIT', is_spdx_approved=True,
+                                 url='https://spdx.org/licenses/MIT.html')
+        return resp
+
+
+class MockCryptography(CryptographyServicer):
+    """
+    Mock SCANOSS Cryptography gRPC service
+    """
+
+    def __init__(self, mock: MockScanossServer):
+        self.mock = mock
+
+    def Echo(self, request, context):
+        return EchoResponse(message=request.message)
+
+    def GetAlgorithms(self, request, context):
+        self.mock.count('grpc_requests')
+        if self.mock.inject():
+            self.mock.count('errors')
+            context.abort(grpc.StatusCode.UNAVAILABLE, 'Service unavailable (mock)')
+        resp = AlgorithmResponse(status=StatusResponse(status=StatusCode.SUCCESS, message='Success'))
+        for purl in request.purls:
+            item = resp.purls.add(purl=purl.purl, version=purl.requirement or '1.0.0')
+            item.algorithms.add(algorithm='sha256', strength='None')
+        return resp
+
+
+class MockVulnerabilities(VulnerabilitiesServicer):
+    """
+    Mock SCANOSS Vulnerabilities gRPC service
+    """
+
+    def __init__(self, mock: MockScanossServer):
+        self.mock = mock
+
+    def Echo(self, request, context):
+        return EchoResponse(message=request.message)
+
+    def GetVulnerabilities(self, request, context):
+        self.mock.count('grpc_requests')
+        if self.mock.inject():
+            self.mock.count('errors')
+            context.abort(grpc.StatusCode.UNAVAILABLE, 'Service unavailable (mock)')
+        resp = VulnerabilityResponse(status=StatusResponse(status=StatusCode.SUCCESS, message='Success'))
+        for purl in request.purls:
+            item = resp.purls.add(purl=purl.purl)
+            item.vulnerabilities.add(id='CVE-0000-0000', cve='CVE-0000-0000', severity='Low', source='mock')
+        return resp
+
+
+def main():
+    """
+    Run a standalone mock SCANOSS server
+    """
+    parser = argparse.ArgumentParser(description='Mock SCANOSS API server (for load & throughput testing)')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Host to listen on (default 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8080, help='REST port (default 8080)')
+    parser.add_argument('--grpc-port', type=int, default=50051, help='gRPC port (default 50051)')
+    parser.add_argument('--latency', type=str,
+                        help='Latency distribution in ms: fixed:<ms>, uniform:<min>:<max>, normal:<mean>:<sd>, '
+                             'exp:<mean>')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests to fail with HTTP 500')
+    parser.add_argument('--busy-rate', type=float, default=0.0, help='Fraction of requests to reject with HTTP 503')
+    parser.add_argument('--match-rate', type=float, default=1.0, help='Fraction of files to match (default 1.0)')
+    parser.add_argument('--results', type=int, default=1, help='Number of results per matched file (default 1)')
+    parser.add_argument('--payload-size', type=int, default=0, help='Bytes of padding to add to each result')
+    parser.add_argument('--debug', '-d', action='store_true', help='Enable debug messages')
+    parser.add_argument('--trace', '-t', action='store_true', help='Enable trace messages')
+    args = parser.parse_args()
+    server = MockScanossServer(host=args.host, http_port=args.port, grpc_port=args.grpc_port, latency=args.latency,
+                               error_rate=args.error_rate, busy_rate=args.busy_rate, match_rate=args.match_rate,
+                               results_per_file=args.results, payload_size=args.payload_size,
+                               debug=args.debug, trace=args.trace)
+    server.start()
+    server.print_stderr(f'Mock SCANOSS API: {server.url} (gRPC: {server.grpc_url}). Press Ctrl-C to stop.')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        server.print_stderr(f'Stats: {server.stats}')
+
+
+if __name__ == '__main__':
+    main()
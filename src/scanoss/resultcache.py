@@ -0,0 +1,174 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Tuple
+
+from .scanossbase import ScanossBase
+
+CACHE_FILE = 'scanoss-cache.db'
+DEFAULT_CACHE_TTL = 7 * 24 * 60 * 60        # Keep cached entries for 7 days (in seconds)
+DEFAULT_CACHE_SIZE = 512 * 1024 * 1024      # Maximum size of the cached entries (512MB)
+
+
+class ResultCache(ScanossBase):
+    """
+    Local (SQLite backed) cache of JSON results
+    Entries expire after a TTL, and the least recently used entries are evicted once the cache exceeds its size cap.
+    The cache file can be shared between processes (and pipelines) pointing at the same cache directory.
+    """
+
+    def __init__(self, cache_dir: str, ttl: int = DEFAULT_CACHE_TTL, max_size: int = DEFAULT_CACHE_SIZE,
+                 debug: bool = False, trace: bool = False, quiet: bool = False):
+        """
+        Initialise the ResultCache class
+        :param cache_dir: directory to store the cache in (created if missing)
+        :param ttl: time (seconds) to keep cached entries for (default 7 days). 0 means never expire
+        :param max_size: maximum size (bytes) of the cached entries (default 512MB)
+        :param debug: enable debug (default False)
+        :param trace: enable trace (default False)
+        :param quiet: enable quiet mode (default False)
+        """
+        super().__init__(debug, trace, quiet)
+        if not cache_dir:
+            raise Exception('ERROR: Please specify a cache directory')
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_file = os.path.join(cache_dir, CACHE_FILE)
+        self.ttl = ttl if ttl and ttl > 0 else 0
+        self.max_size = max_size if max_size and max_size > 0 else DEFAULT_CACHE_SIZE
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.cache_file, timeout=30, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL,'
+                         ' size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+        self._db.commit()
+        self._size = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        self.print_debug(f'Using result cache {self.cache_file} ({self._size} bytes)')
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """
+        Look up multiple entries in the cache (refreshing their last access time)
+        :param keys: keys to look up
+        :return: dictionary of the (unexpired) entries found
+        """
+        keys = list(keys)
+        found = {}
+        if not keys:
+            return found
+        now = time.time()
+        expired = []
+        with self._lock:
+            for key in keys:
+                row = self._db.execute('SELECT value, created FROM results WHERE key = ?', (key,)).fetchone()
+                if row is None:
+                    continue
+                if self.ttl and now - row[1] > self.ttl:
+                    expired.append((key,))
+                    continue
+                found[key] = json.loads(row[0])
+            if expired:
+                self._db.executemany('DELETE FROM results WHERE key = ?', expired)
+            if found:
+                self._db.executemany('UPDATE results SET accessed = ? WHERE key = ?', [(now, k) for k in found])
+            self._db.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: str):
+        """
+        Look up an entry in the cache
+        :param key: key to look up
+        :return: cached value or None
+        """
+        return self.get_many([key]).get(key)
+
+    def put_many(self, entries: Iterable[Tuple[str, object]]) -> None:
+        """
+        Store multiple entries in the cache, evicting the least recently used ones if it is full
+        :param entries: (key, value) pairs to store. Values must be JSON serialisable
+        """
+        now = time.time()
+        rows = []
+        for key, value in entries:
+            data = json.dumps(value, separators=(',', ':'))
+            rows.append((key, data, len(data), now, now))
+        if not rows:
+            return
+        with self._lock:
+            self._db.executemany('INSERT OR REPLACE INTO results (key, value, size, created, accessed)'
+                                 ' VALUES (?, ?, ?, ?, ?)', rows)
+            self._db.commit()
+            self._size += sum(row[2] for row in rows)
+            if self._size > self.max_size:
+                self.__evict()
+
+    def put(self, key: str, value) -> None:
+        """
+        Store an entry in the cache
+        :param key: key to store
+        :param value: JSON serialisable value
+        """
+        self.put_many([(key, value)])
+
+    def __evict(self) -> None:
+        """
+        Remove expired entries, then the least recently used ones, until the cache is back under 90% of its size cap
+        Must be called with the lock held
+        """
+        if self.ttl:
+            self._db.execute('DELETE FROM results WHERE created < ?', (time.time() - self.ttl,))
+        self._size = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        target = int(self.max_size * 0.9)
+        if self._size > target:
+            remove = []
+            for key, size in self._db.execute('SELECT key, size FROM results ORDER BY accessed'):
+                if self._size <= target:
+                    break
+                remove.append((key,))
+                self._size -= size
+            self._db.executemany('DELETE FROM results WHERE key = ?', remove)
+            self.print_debug(f'Evicted {len(remove)} entries from the result cache')
+        self._db.commit()
+
+    def close(self) -> None:
+        """
+        Close the cache database
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+        if self.hits or self.misses:
+            self.print_debug(f'Result cache hits: {self.hits}, misses: {self.misses}')
+
+#
+# End of ResultCache Class
+#
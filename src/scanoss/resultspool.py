@@ -0,0 +1,165 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import json
+import os
+import tempfile
+from typing import Iterator, Tuple
+
+from .scanresults import ScanResults
+
+
+class ResultSpool(ScanResults):
+    """
+    Disk backed spool of scan results (drop-in replacement for the in-memory ScanResults model)
+    Each file result is appended to a temporary JSON Lines file as soon as it arrives, keeping only an index of
+    file names (and their location in the spool) in memory.
+    The final (sorted) output is then produced by reading back one result at a time.
+    If a spool file is specified, it is kept on close and any results already in it are loaded (resumed).
+    """
+
+    def __init__(self, debug: bool = False, trace: bool = False, quiet: bool = False, spool_dir: str = None,
+                 spool_file: str = None):
+        """
+        Initialise the ResultSpool class
+        :param debug: enable debug (default False)
+        :param trace: enable trace (default False)
+        :param quiet: enable quiet mode (default False)
+        :param spool_dir: directory to create the spool file in (default: system temp directory)
+        :param spool_file: persistent spool file to use/resume instead of a temporary file (default None)
+        """
+        super().__init__(debug, trace, quiet)
+        self.spool_dir = spool_dir
+        self.spool_file = spool_file
+        self._file = None
+        self._size = 0
+        self._index = {}  # file name -> (offset, length) of its latest result in the spool
+        if spool_file:
+            with self._lock:
+                self.__open()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def __open(self):
+        """
+        Open the spool file (if not already open)
+        """
+        if self._file is None:
+            if self.spool_file:
+                self._file = open(self.spool_file, 'a+b')
+                self.__load()
+            else:
+                self._file = tempfile.TemporaryFile(mode='w+b', prefix='scanoss-results-', suffix='.jsonl',
+                                                    dir=self.spool_dir)
+            self.print_trace(f'Opened result spool: {self._file.name}')
+        return self._file
+
+    def __load(self) -> None:
+        """
+        Rebuild the index from the results already in the (persistent) spool file
+        A partially written last entry (i.e. interrupted run) is discarded
+        """
+        f = self._file
+        f.seek(0)
+        offset = 0
+        for line in f:
+            try:
+                if not line.endswith(b'\n'):
+                    raise ValueError('incomplete entry')
+                key = json.loads(line)[0]
+            except ValueError as e:
+                self.print_debug(f'Warning: Discarding corrupt result spool entry at {offset}: {e}')
+                f.truncate(offset)
+                break
+            self._index[key] = (offset, len(line))
+            offset += len(line)
+        self._size = offset
+        if self._index:
+            self.print_debug(f'Loaded {len(self._index)} results from spool: {self.spool_file}')
+
+    def flush(self, sync: bool = False) -> None:
+        """
+        Flush any buffered results to the spool file
+        :param sync: also force the spool file contents to disk (default False)
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                if sync:
+                    os.fsync(self._file.fileno())
+
+    def add(self, scan_resp: dict, file_map: dict = None) -> None:
+        """
+        Append the results of a scan response to the spool
+        Later results for the same file replace earlier ones
+        :param scan_resp: scan response dictionary (file name -> results)
+        :param file_map: mapping of obfuscated files back into originals (optional)
+        """
+        if not scan_resp:
+            return
+        lines = []
+        for key, value in scan_resp.items():
+            if file_map:  # We have a map for obfuscated files. Check if we can revert it
+                key = file_map.get(key, key)
+            lines.append((key, (json.dumps([key, value], separators=(',', ':')) + '\n').encode('utf-8')))
+        with self._lock:
+            f = self.__open()
+            f.seek(0, os.SEEK_END)
+            for key, line in lines:
+                f.write(line)
+                self._index[key] = (self._size, len(line))
+                self._size += len(line)
+
+    def items(self) -> Iterator[Tuple[str, list]]:
+        """
+        Iterate over all spooled results (in output order), reading one entry at a time
+        :return: iterator of (file name, results) tuples
+        """
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.flush()
+            for key in self._sorted_keys(self._index):
+                offset, length = self._index[key]
+                self._file.seek(offset)
+                yield key, json.loads(self._file.read(length))[1]
+
+    def close(self) -> None:
+        """
+        Close (and remove, unless persistent) the spool file
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._index = {}
+            self._order = None
+            self._size = 0
+
+#
+# End of ResultSpool Class
+#
@@ -0,0 +1,184 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import hashlib
+import json
+import threading
+from typing import Dict, Iterable, Tuple
+
+from .scanossbase import ScanossBase
+from . import __version__
+
+ARCHIVE_VERSION = 1
+
+
+class ScanArchive(ScanossBase):
+    """
+    Record/replay archive of SCANOSS API traffic
+    In record mode, the results of every scan request (per file) and gRPC call are written to a JSON Lines archive.
+    In replay mode, the archive is loaded and used to answer the same requests locally, without any network access.
+    """
+
+    def __init__(self, archive_file: str, replay: bool = False, debug: bool = False, trace: bool = False,
+                 quiet: bool = False):
+        """
+        Initialise the ScanArchive class
+        :param archive_file: archive file to record to/replay from
+        :param replay: replay the archive (default False - record a new archive)
+        :param debug: enable debug (default False)
+        :param trace: enable trace (default False)
+        :param quiet: enable quiet mode (default False)
+        """
+        super().__init__(debug, trace, quiet)
+        if not archive_file:
+            raise Exception('ERROR: Please specify an archive file')
+        self.archive_file = archive_file
+        self.replay = replay
+        self._scans = {}
+        self._grpc = {}
+        self._lock = threading.Lock()
+        self._file = None
+        if replay:
+            self.__load()
+        else:
+            self.print_debug(f'Recording API traffic to {archive_file}...')
+            self._file = open(archive_file, 'w')
+            self.__write([{'type': 'header', 'version': ARCHIVE_VERSION, 'client': __version__}])
+
+    def __load(self) -> None:
+        """
+        Load the recorded entries from the archive file
+        """
+        self.print_debug(f'Loading API archive {self.archive_file}...')
+        with open(self.archive_file) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                entry_type = entry.get('type')
+                if entry_type == 'scan':
+                    self._scans[entry['key']] = entry['result']
+                elif entry_type == 'grpc':
+                    self._grpc[entry['key']] = entry['response']
+                elif entry_type == 'header' and entry.get('version') != ARCHIVE_VERSION:
+                    raise Exception(f'ERROR: Unsupported archive version {entry.get("version")}: {self.archive_file}')
+        self.print_debug(f'Loaded {len(self._scans)} scan results and {len(self._grpc)} gRPC responses.')
+
+    def __write(self, entries: list) -> None:
+        """
+        Append the given entries to the archive file
+        :param entries: list of entries to write
+        """
+        with self._lock:
+            for entry in entries:
+                self._file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+            self._file.flush()
+
+    def add_scans(self, results: Iterable[Tuple[str, str, list]]) -> None:
+        """
+        Record scan results
+        :param results: (key, file name, results) tuples
+        """
+        self.__write([{'type': 'scan', 'key': key, 'file': file, 'result': result} for key, file, result in results])
+
+    def get_scans(self, keys: Iterable[str]) -> Dict[str, list]:
+        """
+        Get the recorded scan results for the given keys
+        :param keys: keys to look up
+        :return: dictionary of the recorded results found
+        """
+        return {key: self._scans[key] for key in keys if key in self._scans}
+
+    def add_grpc(self, key: str, method: str, response: dict) -> None:
+        """
+        Record a gRPC response
+        :param key: request key
+        :param method: gRPC method called
+        :param response: response message (as a dictionary)
+        """
+        self.__write([{'type': 'grpc', 'key': key, 'method': method, 'response': response}])
+
+    def get_grpc(self, key: str) -> dict:
+        """
+        Get the recorded gRPC response for the given key
+        :param key: request key
+        :return: response message dictionary or None
+        """
+        return self._grpc.get(key)
+
+    def close(self) -> None:
+        """
+        Close the archive file (if recording)
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+#
+# End of ScanArchive Class
+#
+
+
+class ArchiveStub:
+    """
+    Wrapper around a gRPC service stub to record its calls to (or replay them from) a ScanArchive
+    """
+
+    def __init__(self, archive: ScanArchive, service: str, stub, responses: dict):
+        """
+        Initialise the ArchiveStub class
+        :param archive: archive to record to/replay from
+        :param service: gRPC service name
+        :param stub: gRPC service stub to wrap
+        :param responses: map of method name to response message class
+        """
+        self.archive = archive
+        self.service = service
+        self.stub = stub
+        self.responses = responses
+
+    def __getattr__(self, method: str):
+        if method not in self.responses:
+            raise AttributeError(f'{self.service} has no archived method: {method}')
+        response_class = self.responses[method]
+        name = f'{self.service}/{method}'
+
+        def call(request, **kwargs):
+            from google.protobuf.json_format import MessageToDict, ParseDict  # Only needed for gRPC traffic
+            key = hashlib.sha256(name.encode('utf-8') + b'\n' +
+                                 request.SerializeToString(deterministic=True)).hexdigest()
+            if self.archive.replay:
+                resp = self.archive.get_grpc(key)
+                if resp is None:
+                    raise Exception(f'No recorded response for {name} in {self.archive.archive_file}')
+                return ParseDict(resp, response_class())
+            resp = getattr(self.stub, method)(request, **kwargs)
+            if resp is not None:
+                self.archive.add_grpc(key, name, MessageToDict(resp, preserving_proto_field_name=True))
+            return resp
+        return call
+
+#
+# End of ArchiveStub Class
+#
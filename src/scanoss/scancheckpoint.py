@@ -0,0 +1,193 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import json
+import os
+import threading
+import time
+
+from .resultspool import ResultSpool
+from .scanossbase import ScanossBase
+from . import __version__
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_INFO = 'checkpoint.json'     # Details of the scan being checkpointed
+CHECKPOINT_RESULTS = 'results.jsonl'    # Spool of the scan results received so far
+CHECKPOINT_COMPLETED = 'completed.txt'  # md5,path of each file with results in the spool
+CHECKPOINT_SYNC_INTERVAL = 30           # Seconds between forcing the checkpoint to disk
+
+
+class ScanCheckpoint(ScanossBase):
+    """
+    Checkpoint of a (long running) threaded scan, allowing it to be resumed after an interruption
+    The checkpoint folder holds a persistent spool of the results received so far and the list of files (md5 & path)
+    those results cover, both appended to as each scan request completes.
+    On resume, files already completed (with unchanged contents) are not sent to the API again and the final output
+    is produced from the combined spool.
+    """
+
+    def __init__(self, checkpoint_dir: str, resume: bool = False, target: str = None,
+                 sync_interval: int = CHECKPOINT_SYNC_INTERVAL, debug: bool = False, trace: bool = False,
+                 quiet: bool = False):
+        """
+        Initialise the ScanCheckpoint class
+        :param checkpoint_dir: folder to store the checkpoint in
+        :param resume: resume from an existing checkpoint (default False - start a new checkpoint)
+        :param target: description of what is being scanned (used to validate the resumed checkpoint)
+        :param sync_interval: seconds between forcing the checkpoint to disk (default 30)
+        :param debug: enable debug (default False)
+        :param trace: enable trace (default False)
+        :param quiet: enable quiet mode (default False)
+        """
+        super().__init__(debug, trace, quiet)
+        if not checkpoint_dir:
+            raise Exception('ERROR: Please specify a checkpoint folder')
+        self.checkpoint_dir = checkpoint_dir
+        self.sync_interval = sync_interval
+        self.skipped = 0
+        self._completed = set()
+        self._lock = threading.Lock()
+        self._last_sync = time.monotonic()
+        info_file = os.path.join(checkpoint_dir, CHECKPOINT_INFO)
+        completed_file = os.path.join(checkpoint_dir, CHECKPOINT_COMPLETED)
+        if resume:
+            if not os.path.isfile(info_file):
+                raise Exception(f'ERROR: No scan checkpoint found in: {checkpoint_dir}')
+            with open(info_file) as f:
+                info = json.load(f)
+            if info.get('version') != CHECKPOINT_VERSION:
+                raise Exception(f'ERROR: Unsupported scan checkpoint version: {info.get("version")}')
+            if target and info.get('target') != target:
+                self.print_stderr(f'Warning: Checkpoint was created scanning {info.get("target")}, not {target}')
+            self.__load_completed(completed_file)
+        else:
+            if os.path.isfile(info_file):
+                raise Exception(f'ERROR: Scan checkpoint already exists in: {checkpoint_dir}. Please resume it.')
+            os.makedirs(checkpoint_dir, exist_ok=True)
+            for name in (CHECKPOINT_RESULTS, CHECKPOINT_COMPLETED):  # Clear out any left over (partial) checkpoint
+                if os.path.isfile(os.path.join(checkpoint_dir, name)):
+                    os.remove(os.path.join(checkpoint_dir, name))
+            with open(info_file, 'w') as f:
+                json.dump({'version': CHECKPOINT_VERSION, 'client': __version__, 'target': target}, f)
+        self.results = ResultSpool(debug, trace, quiet, spool_file=os.path.join(checkpoint_dir, CHECKPOINT_RESULTS))
+        self._file = open(completed_file, 'a', encoding='utf-8')
+
+    def __load_completed(self, completed_file: str) -> None:
+        """
+        Load the list of completed files from the checkpoint
+        :param completed_file: file containing the completed md5,path entries
+        """
+        if not os.path.isfile(completed_file):
+            return
+        with open(completed_file, 'r+b') as f:
+            offset = 0
+            for line in f:
+                if not line.endswith(b'\n'):  # Partially written entry (interrupted run), so drop it
+                    f.truncate(offset)
+                    break
+                offset += len(line)
+                md5, _, path = line.decode('utf-8').rstrip('\n').partition(',')
+                if path:
+                    self._completed.add((md5, path))
+        self.print_msg(f'Resuming scan from checkpoint {self.checkpoint_dir} ({len(self._completed)} files complete)')
+
+    @property
+    def completed(self) -> int:
+        """
+        Number of files already completed in the checkpoint
+        """
+        return len(self._completed)
+
+    @staticmethod
+    def __wfp_files(wfp: str, file_map: dict = None):
+        """
+        Split a WFP request into its file blocks
+        :param wfp: WFP request
+        :param file_map: mapping of obfuscated files back into originals (optional)
+        :return: list of ((md5, path), block) tuples
+        """
+        blocks = []
+        for block in wfp.split('\nfile=') if wfp else []:
+            if not block.startswith('file='):
+                block = 'file=' + block
+            header, _, _ = block.partition('\n')
+            md5, _, rest = header[5:].partition(',')
+            path = rest.partition(',')[2]
+            if file_map:
+                path = file_map.get(path, path)
+            blocks.append(((md5, path), block if block.endswith('\n') else block + '\n'))
+        return blocks
+
+    def pending(self, wfp: str, file_map: dict = None) -> str:
+        """
+        Remove the files already completed in the checkpoint from the given WFP request
+        :param wfp: WFP request
+        :param file_map: mapping of obfuscated files back into originals (optional)
+        :return: WFP of the files still to be scanned (empty if none)
+        """
+        if not self._completed:
+            return wfp
+        blocks = ScanCheckpoint.__wfp_files(wfp, file_map)
+        remaining = [block for key, block in blocks if key not in self._completed]
+        with self._lock:
+            self.skipped += len(blocks) - len(remaining)
+        return ''.join(remaining)
+
+    def add(self, scan_resp: dict, wfp: str, file_map: dict = None) -> None:
+        """
+        Record the results of a completed scan request in the checkpoint
+        The results are written out before the files are marked as complete
+        :param scan_resp: scan response dictionary (file name -> results)
+        :param wfp: WFP request the response was for
+        :param file_map: mapping of obfuscated files back into originals (optional)
+        """
+        self.results.add(scan_resp, file_map)
+        sync = False
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_sync >= self.sync_interval:
+                sync = True
+                self._last_sync = now
+        self.results.flush(sync)
+        lines = ''.join(f'{key[0]},{key[1]}\n' for key, _ in ScanCheckpoint.__wfp_files(wfp, file_map))
+        with self._lock:
+            self._file.write(lines)
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """
+        Close the checkpoint (the checkpoint folder is left in place)
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        self.results.close()
+        if self.skipped:
+            self.print_debug(f'Skipped {self.skipped} files already completed in the checkpoint.')
+
+#
+# End of ScanCheckpoint Class
+#
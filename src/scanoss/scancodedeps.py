@@ -25,7 +25,9 @@
 import json
 import os.path
 import subprocess
+import tempfile
 
+from .jsonstream import JsonStream
 from .scanossbase import ScanossBase
 
 
@@ -34,9 +36,11 @@ class ScancodeDeps(ScanossBase):
     SCANOSS dependency scanning class
     """
     def __init__(self, debug: bool = False, quiet: bool = False, trace: bool = False, output_file: str = None,
-                 scan_output: str = None, timeout: int = 600, sc_command: str = None):
+                 scan_output: str = None, timeout: int = 600, sc_command: str = None, processes: int = 1):
         """
         Initialise ScancodeDeps class
+        :param output_file: scancode interim output file (optional - default a unique temporary file per scan)
+        :param processes: number of scancode processes to run in parallel (default 1)
         """
         super().__init__(debug, trace, quiet)
         self.quiet = quiet
@@ -45,7 +49,9 @@ class ScancodeDeps(ScanossBase):
         self.timeout = timeout
         self.scan_output = scan_output
         self.sc_command = sc_command if sc_command else 'scancode'
-        self.output_file = output_file if output_file else 'scancode-dependencies.json'
+        self.output_file = output_file
+        self.processes = processes if processes and processes > 1 else 1
+        self._interim_file = None  # Temporary interim file of the last run_scan (if no output file was specified)
 
     def __log_result(self, string, outfile=None):
         """
@@ -64,15 +70,27 @@ class ScancodeDeps(ScanossBase):
         Remove the temporary Scancode interim file
         :param output_file: filename to remove (optional)
         """
-        if not output_file and self.output_file:
-            output_file = self.output_file
-        if os.path.isfile(output_file):
+        if not output_file:
+            output_file = self.output_file if self.output_file else self._interim_file
+        if output_file and output_file == self._interim_file:
+            self._interim_file = None
+        if output_file and os.path.isfile(output_file):
             try:
                 self.print_trace(f'Cleaning temporary scancode files...')
                 os.remove(output_file)
             except Exception as e:
                 self.print_stderr(f'Warning: Failed to remove temporary file {output_file}: {e}')
 
+    @staticmethod
+    def __temp_file() -> str:
+        """
+        Create a unique temporary file for the scancode interim results (so concurrent scans do not clash)
+        :return: temporary file path
+        """
+        fd, path = tempfile.mkstemp(prefix='scancode-deps-', suffix='.json')
+        os.close(fd)
+        return path
+
     def produce_from_json(self, data: json) -> dict:
         """
         Parse the given input JSON string and return Dependency summary
@@ -89,66 +107,86 @@ class ScancodeDeps(ScanossBase):
                 files_details = data.get(t)
                 if not files_details or files_details == '':
                     continue
-                # print(f'File: {t}: {file_details}')
                 for fd in files_details:
-                    # print(f'FD: {fd}')
-                    f_path = fd.get('path')
-                    if not f_path or f_path == '':
-                        continue
-                    f_type = fd.get('type')
-                    if not f_type or f_type == '' or f_type != 'file':  # Only process files
-                        continue
-                    f_packages = fd.get('package_data')  # scancode format 2.0
-                    if not f_packages or f_packages == '':
-                        f_packages = fd.get('packages')  # scancode formate 1.0
-                        if not f_packages or f_packages == '':
-                            continue
-                    self.print_debug(f'Path: {f_path}, Packages: {len(f_packages)}')
-                    purls = []
-                    for pkgs in f_packages:
-                        pk_deps = pkgs.get('dependencies')
-                        if not pk_deps or pk_deps == '':
-                            continue
-                        self.print_debug(f'Path: {f_path}, Dependencies: {len(pk_deps)}')
-                        for d in pk_deps:
-                            dp = d.get('purl')
-                            if not dp or dp == '':
-                                continue
-                            dp = dp.replace('"', '').replace('%22', '')  # remove unwanted quotes on purls
-                            dp_data = {'purl': dp}
-                            rq = d.get('extracted_requirement')  # scancode format 2.0
-                            if not rq or rq == '':
-                                rq = d.get('requirement')        # scancode format 1.0
-                            # skip requirement if it ends with the purl (i.e. exact version) or if it's local (file)
-                            if rq and rq != '' and not dp.endswith(rq) and not rq.startswith('file:'):
-                                dp_data['requirement'] = rq
-                            purls.append(dp_data)
-                        # self.print_stderr(f'Path: {f_path}, Purls: {purls}')
-                    if len(purls) > 0:
-                        files.append({'file': f_path, 'purls': purls})
-                    # End packages
+                    file_deps = self.__file_dependencies(fd)
+                    if file_deps:
+                        files.append(file_deps)
                 # End file details
         # End dependencies json
         deps = {'files': files}
         # self.print_debug(f'Dep Data: {deps}')
         return deps
 
+    def __file_dependencies(self, fd: dict) -> dict:
+        """
+        Extract the dependency purls of a single scancode file entry
+        :param fd: scancode 'files' entry
+        :return: Dependency file dictionary or None if it has no dependencies
+        """
+        if not isinstance(fd, dict):
+            return None
+        f_path = fd.get('path')
+        if not f_path or f_path == '':
+            return None
+        f_type = fd.get('type')
+        if not f_type or f_type == '' or f_type != 'file':  # Only process files
+            return None
+        f_packages = fd.get('package_data')  # scancode format 2.0
+        if not f_packages or f_packages == '':
+            f_packages = fd.get('packages')  # scancode formate 1.0
+            if not f_packages or f_packages == '':
+                return None
+        self.print_debug(f'Path: {f_path}, Packages: {len(f_packages)}')
+        purls = []
+        for pkgs in f_packages:
+            pk_deps = pkgs.get('dependencies')
+            if not pk_deps or pk_deps == '':
+                continue
+            self.print_debug(f'Path: {f_path}, Dependencies: {len(pk_deps)}')
+            for d in pk_deps:
+                dp = d.get('purl')
+                if not dp or dp == '':
+                    continue
+                dp = dp.replace('"', '').replace('%22', '')  # remove unwanted quotes on purls
+                dp_data = {'purl': dp}
+                rq = d.get('extracted_requirement')  # scancode format 2.0
+                if not rq or rq == '':
+                    rq = d.get('requirement')        # scancode format 1.0
+                # skip requirement if it ends with the purl (i.e. exact version) or if it's local (file)
+                if rq and rq != '' and not dp.endswith(rq) and not rq.startswith('file:'):
+                    dp_data['requirement'] = rq
+                purls.append(dp_data)
+        if len(purls) > 0:
+            return {'file': f_path, 'purls': purls}
+        return None
+
     def produce_from_file(self, json_file: str = None) -> json:
         """
         Parse input JSON dependencies file and produce SCANOSS dependency JSON output
+        The scancode 'files' are streamed from the file one at a time, rather than loading the whole document
         :param json_file:
         :return: SCANOSS dependency JSON
         """
-        if not json_file and self.output_file:
-            json_file = self.output_file
+        if not json_file:
+            json_file = self.output_file if self.output_file else self._interim_file
         if not json_file:
             self.print_stderr('ERROR: No JSON file provided to parse.')
             return None
         if not os.path.isfile(json_file):
             self.print_stderr(f'ERROR: JSON file does not exist or is not a file: {json_file}')
             return None
-        with open(json_file, 'r') as f:
-            return self.produce_from_str(f.read())
+        self.print_debug(f'Processing Scancode results into Dependency data...')
+        files = []
+        try:
+            with open(json_file, 'r') as f:
+                for fd in JsonStream(f).iter_array('files'):
+                    file_deps = self.__file_dependencies(fd)
+                    if file_deps:
+                        files.append(file_deps)
+        except Exception as e:
+            self.print_stderr(f'ERROR: Problem parsing input JSON: {e}')
+            return None
+        return {'files': files}
 
     def produce_from_str(self, json_str: str) -> dict:
         """
@@ -175,16 +213,29 @@ class ScancodeDeps(ScanossBase):
         :return: True on success, False otherwise
         """
         self.print_msg('Searching for dependencies...')
-        if not self.run_scan(output_file, what_to_scan):
-            return False
-        self.print_msg('Producing summary...')
-        deps = self.produce_from_file(output_file)
-        self.remove_interim_file(output_file)
+        deps = self.produce_from_scan(what_to_scan, output_file)
         if not deps:
             return False
         self.__log_result(json.dumps(deps, indent=2, sort_keys=True), outfile=result_output)
         return True
 
+    def produce_from_scan(self, what_to_scan: str, output_file: str = None) -> dict:
+        """
+        Run a dependency scan of the specified file/folder and produce the SCANOSS dependency data
+        :param what_to_scan: file/directory to scan
+        :param output_file: temporary scancode output filename (optional)
+        :return: Dependency dictionary or None on failure
+        """
+        if not output_file:
+            output_file = self.output_file if self.output_file else ScancodeDeps.__temp_file()
+        try:
+            if not self.run_scan(output_file, what_to_scan):
+                return None
+            self.print_msg('Producing summary...')
+            return self.produce_from_file(output_file)
+        finally:
+            self.remove_interim_file(output_file)
+
     def run_scan(self, output_file: str = None, what_to_scan: str = None) -> bool:
         """
         Run a scan of the specified file/folder and output the results to temporary file
@@ -192,14 +243,17 @@ class ScancodeDeps(ScanossBase):
         :param what_to_scan: file/directory to scan
         :return: True on success, False otherwise
         """
-        if not output_file and self.output_file:
+        if not output_file:
             output_file = self.output_file
+        if not output_file:
+            output_file = self._interim_file = ScancodeDeps.__temp_file()
         try:
             open(output_file, 'w').close()
-            self.print_trace(f'About to execute {self.sc_command} -p --only-findings --quiet --json {output_file}'
-                             f' {what_to_scan}')
-            result = subprocess.run([self.sc_command, '-p', '--only-findings', '--quiet', '--strip-root', '--json',
-                                     output_file, what_to_scan],
+            options = ['-n', str(self.processes)] if self.processes > 1 else []  # Let scancode parallelise the scan
+            self.print_trace(f'About to execute {self.sc_command} -p --only-findings --quiet {" ".join(options)}'
+                             f' --json {output_file} {what_to_scan}')
+            result = subprocess.run([self.sc_command, '-p', '--only-findings', '--quiet', '--strip-root'] + options +
+                                    ['--json', output_file, what_to_scan],
                                     cwd=os.getcwd(), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
                                     text=True, timeout=self.timeout
                                     )
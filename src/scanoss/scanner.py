@@ -25,20 +25,10 @@ import json
 import os
 import sys
 import datetime
-import pkg_resources
-
-from progress.bar import Bar
-from progress.spinner import Spinner
-from pypac.parser import PACFile
-
-from .scanossapi import ScanossApi
-from .cyclonedx import CycloneDx
-from .spdxlite import SpdxLite
-from .csvoutput import CsvOutput
-from .threadedscanning import ThreadedScanning
-from .scancodedeps import ScancodeDeps
-from .threadeddependencies import ThreadedDependencies
-from .scanossgrpc import ScanossGrpc
+import zlib
+from typing import TYPE_CHECKING, List, Tuple
+
+from .datafiles import read_data_file
 from .scantype import ScanType
 from .scanossbase import ScanossBase
 
@@ -53,6 +43,12 @@ except ModuleNotFoundError or ImportError:
 
 from . import __version__
 
+if TYPE_CHECKING:  # Only loaded when required (i.e. by the API clients or the scan/WFP file processing)
+    from pypac.parser import PACFile
+    from .scanarchive import ScanArchive
+    from .scancheckpoint import ScanCheckpoint
+    from .scanresults import ScanResults
+
 FILTERED_DIRS = {  # Folders to skip
     "nbproject", "nbbuild", "nbdist", "__pycache__", "venv", "_yardoc", "eggs", "wheels", "htmlcov", "__pypackages__"
 }
@@ -101,10 +97,35 @@ class Scanner(ScanossBase):
                  all_extensions: bool = False, all_folders: bool = False, hidden_files_folders: bool = False,
                  scan_options: int = 7, sc_timeout: int = 600, sc_command: str = None, grpc_url: str = None,
                  obfuscate: bool = False, ignore_cert_errors: bool = False, proxy: str = None, grpc_proxy: str = None,
-                 ca_cert: str = None, pac: PACFile = None, retry: int = 5, hpsm: bool = False
+                 ca_cert: str = None, pac: 'PACFile' = None, retry: int = 5, hpsm: bool = False,
+                 async_scan: bool = False, queue_requests: int = 0, queue_size: int = 0,
+                 cache_dir: str = None, cache_ttl: int = 168, cache_size: int = 512, archive: 'ScanArchive' = None,
+                 lb_strategy: str = None, breaker_threshold: int = 5, breaker_reset: int = 30, breaker_wait: int = 0,
+                 checkpoint: 'ScanCheckpoint' = None, shard: Tuple[int, int] = None, preserve_order: bool = False,
+                 wfp_binary: bool = False, wfp_compress: bool = False, native_deps: bool = False,
+                 grpc_threads: int = 5, grpc_max_purls: int = 500, sc_processes: int = 1
                  ):
         """
-        Initialise scanning class, including Winnowing, ScanossApi and ThreadedScanning
+        Initialise scanning class, including Winnowing (ScanossApi and ThreadedScanning are created on first use)
+        :param queue_requests: Maximum number of scan requests waiting to be posted (default 1000)
+        :param queue_size: Maximum size (MB) of scan requests waiting to be posted (default 64)
+        :param cache_dir: Folder to cache scan results in (default None - no caching)
+        :param cache_ttl: Time (hours) to keep cached scan results (default 168)
+        :param cache_size: Maximum size (MB) of the result cache (default 512)
+        :param archive: Archive to record the API traffic to, or replay it from (default None)
+        :param lb_strategy: Load balancing strategy across multiple scanning URLs (default least-outstanding)
+        :param breaker_threshold: Consecutive API failures before failing fast (default 5, 0 disables)
+        :param breaker_reset: Seconds before probing the API again after failing fast (default 30)
+        :param breaker_wait: Seconds to pause scanning waiting for the API to recover, instead of aborting (default 0)
+        :param checkpoint: Checkpoint to record threaded scan progress in/resume from (default None)
+        :param shard: Only scan the files in this shard (index, count) of the file set, index from 1 (default None)
+        :param preserve_order: Output WFP file scan results in the same order as the WFP file (default False - sorted)
+        :param wfp_binary: Write fingerprints to a binary WFP container instead of a text WFP file (default False)
+        :param wfp_compress: Compress the binary WFP container with zstd (default False)
+        :param native_deps: Parse dependency manifests natively instead of running scancode (default False)
+        :param grpc_threads: Maximum number of dependency requests to send concurrently (default 5)
+        :param grpc_max_purls: Maximum number of purls to send in each dependency request (default 500)
+        :param sc_processes: Number of scancode processes to run in parallel for dependency scanning (default 1)
         """
         super().__init__(debug, trace, quiet)
         self.wfp = wfp if wfp else "scanner_output.wfp"
@@ -118,33 +139,102 @@ class Scanner(ScanossBase):
         self.scan_options = scan_options
         self._skip_snippets = True if not scan_options & ScanType.SCAN_SNIPPETS.value else False
         self.hpsm = hpsm
+        self.preserve_order = preserve_order
+        self.wfp_binary = wfp_binary or wfp_compress
+        self.wfp_compress = wfp_compress
+        self.shard_index, self.shard_count = shard if shard else (1, 1)
+        if self.shard_count < 1 or not 1 <= self.shard_index <= self.shard_count:
+            raise Exception(f'ERROR: Invalid scan shard: {self.shard_index}/{self.shard_count}')
         ver_details = Scanner.version_details()
+        self.result_cache = None
+        if cache_dir:
+            from .resultcache import ResultCache  # Only load sqlite3 if caching
+            self.result_cache = ResultCache(cache_dir, ttl=cache_ttl * 60 * 60, max_size=cache_size * 1024 * 1024,
+                                            debug=debug, trace=trace, quiet=quiet)
 
         self.winnowing = Winnowing(debug=debug, quiet=quiet, skip_snippets=self._skip_snippets,
                                    all_extensions=all_extensions, obfuscate=obfuscate, hpsm=self.hpsm
                                    )
-        self.scanoss_api = ScanossApi(debug=debug, trace=trace, quiet=quiet, api_key=api_key, url=url,
-                                      sbom_path=sbom_path, scan_type=scan_type, flags=flags, timeout=timeout,
-                                      ver_details=ver_details, ignore_cert_errors=ignore_cert_errors,
-                                      proxy=proxy, ca_cert=ca_cert, pac=pac, retry=retry
-                                      )
-        sc_deps = ScancodeDeps(debug=debug, quiet=quiet, trace=trace, timeout=sc_timeout, sc_command=sc_command)
-        grpc_api = ScanossGrpc(url=grpc_url, debug=debug, quiet=quiet, trace=trace, api_key=api_key,
-                               ver_details=ver_details, ca_cert=ca_cert, proxy=proxy, pac=pac, grpc_proxy=grpc_proxy
-                               )
-        self.threaded_deps = ThreadedDependencies(sc_deps, grpc_api, debug=debug, quiet=quiet, trace=trace)
+        # The scanning API client & threads (and the HTTP modules) are only set up on first use
+        self._scanoss_api = None
+        self._threaded_scan = None
+        self._api_args = {'api_key': api_key, 'url': url, 'sbom_path': sbom_path, 'scan_type': scan_type,
+                          'flags': flags, 'timeout': timeout, 'ver_details': ver_details,
+                          'ignore_cert_errors': ignore_cert_errors, 'proxy': proxy, 'ca_cert': ca_cert, 'pac': pac,
+                          'retry': retry, 'cache': self.result_cache, 'archive': archive, 'lb_strategy': lb_strategy,
+                          'breaker_threshold': breaker_threshold, 'breaker_reset': breaker_reset,
+                          'breaker_wait': breaker_wait}
+        self._scan_args = {'max_queue_requests': queue_requests, 'max_queue_bytes': queue_size * 1024 * 1024,
+                           'checkpoint': checkpoint}
+        self.async_scan = async_scan
+        # Dependency scanning (scancode & gRPC) is only set up on first use
+        self._threaded_deps = None
+        self.native_deps = native_deps
+        self._manifests = None  # Dependency manifests collected while walking the scan folder
+        self._sc_deps_args = {'timeout': sc_timeout, 'sc_command': sc_command, 'processes': sc_processes}
+        self._grpc_args = {'url': grpc_url, 'api_key': api_key, 'ver_details': ver_details, 'ca_cert': ca_cert,
+                           'proxy': proxy, 'pac': pac, 'grpc_proxy': grpc_proxy, 'archive': archive,
+                           'cache': self.result_cache, 'nb_threads': grpc_threads, 'max_purls': grpc_max_purls}
         self.nb_threads = nb_threads
-        if nb_threads and nb_threads > 0:
-            self.threaded_scan = ThreadedScanning(self.scanoss_api, debug=debug, trace=trace, quiet=quiet,
-                                                  nb_threads=nb_threads
-                                                  )
-        else:
-            self.threaded_scan = None
+        if not (nb_threads and nb_threads > 0) and checkpoint:
+            self.print_stderr('Warning: Scan checkpoints are only supported when threaded scanning. Ignoring.')
         self.max_post_size = post_size * 1024 if post_size > 0 else MAX_POST_SIZE  # Set the max post size (default 64k)
         self.post_file_count = post_size if post_size > 0 else 32  # Max number of files for any given POST (default 32)
         if self._skip_snippets:
             self.max_post_size = 8 * 1024  # 8k Max post size if we're skipping snippets
 
+    @property
+    def scanoss_api(self):
+        """
+        Get the SCANOSS API client, creating it on first use
+        :return: ScanossApi object
+        """
+        if self._scanoss_api is None:
+            from .scanossapi import ScanossApi  # Only load the HTTP client modules when scanning
+            self._scanoss_api = ScanossApi(debug=self.debug, trace=self.trace, quiet=self.quiet, **self._api_args)
+        return self._scanoss_api
+
+    @property
+    def threaded_scan(self):
+        """
+        Get the threaded (or async) scanner, creating it on first use
+        :return: ThreadedScanning/AsyncScanning object or None if not scanning with threads
+        """
+        if self._threaded_scan is None and self.nb_threads and self.nb_threads > 0:
+            if self.async_scan:
+                from .asyncscanossapi import AsyncScanossApi  # Only load the async HTTP client if requested
+                from .asyncscanning import AsyncScanning
+                async_api = AsyncScanossApi(debug=self.debug, trace=self.trace, quiet=self.quiet,
+                                            max_connections=self.nb_threads, **self._api_args)
+                self._threaded_scan = AsyncScanning(async_api, debug=self.debug, trace=self.trace, quiet=self.quiet,
+                                                    nb_tasks=self.nb_threads, **self._scan_args)
+            else:
+                from .threadedscanning import ThreadedScanning
+                self._threaded_scan = ThreadedScanning(self.scanoss_api, debug=self.debug, trace=self.trace,
+                                                       quiet=self.quiet, nb_threads=self.nb_threads, **self._scan_args)
+        return self._threaded_scan
+
+    @property
+    def threaded_deps(self):
+        """
+        Get the threaded dependency scanner, creating it (and its gRPC client) on first use
+        :return: ThreadedDependencies object
+        """
+        if self._threaded_deps is None:
+            from .scanossgrpc import ScanossGrpc  # Only load the dependency/gRPC modules when needed
+            from .threadeddependencies import ThreadedDependencies
+            if self.native_deps:
+                from .manifestdeps import ManifestDeps
+                sc_deps = ManifestDeps(debug=self.debug, quiet=self.quiet, trace=self.trace,
+                                       hidden_files_folders=self.hidden_files_folders)
+            else:
+                from .scancodedeps import ScancodeDeps
+                sc_deps = ScancodeDeps(debug=self.debug, quiet=self.quiet, trace=self.trace, **self._sc_deps_args)
+            grpc_api = ScanossGrpc(debug=self.debug, quiet=self.quiet, trace=self.trace, **self._grpc_args)
+            self._threaded_deps = ThreadedDependencies(sc_deps, grpc_api, debug=self.debug, quiet=self.quiet,
+                                                       trace=self.trace)
+        return self._threaded_deps
+
     def __filter_files(self, files: list) -> list:
         """
         Filter which files should be considered for processing
@@ -210,22 +300,16 @@ class Scanner(ScanossBase):
             path = path[length:]
         return path
 
-    @staticmethod
-    def __count_files_in_wfp_file(wfp_file: str):
+    def __in_shard(self, path: str) -> bool:
         """
-        Count the number of files in the WFP that need to be processed
-        Parameters
-        ----------
-            wfp_file: str
-                WFP file to process
+        Check if the given (relative) file path belongs to the shard being scanned
+        Files are partitioned deterministically by a hash of their path
+        :param path: file path
+        :return: True if the file should be scanned, False otherwise
         """
-        count = 0
-        if wfp_file:
-            with open(wfp_file) as f:
-                for line in f:
-                    if WFP_FILE_START in line:
-                        count += 1
-        return count
+        if self.shard_count <= 1:
+            return True
+        return zlib.crc32(path.encode('utf-8')) % self.shard_count == self.shard_index - 1
 
     @staticmethod
     def valid_json_file(json_file: str) -> bool:
@@ -256,9 +340,7 @@ class Scanner(ScanossBase):
         """
         data = None
         try:
-            f_name = pkg_resources.resource_filename(__name__, 'data/build_date.txt')
-            with open(f_name, 'r') as f:
-                data = f.read().rstrip()
+            data = read_data_file('data/build_date.txt').rstrip()
         except Exception as e:
             Scanner.print_stderr(f'Warning: Problem loading build time details: {e}')
         if not data or len(data) == 0:
@@ -266,17 +348,45 @@ class Scanner(ScanossBase):
             data = f'date: {now.strftime("%Y%m%d%H%M%S")}, utime: {int(now.timestamp())}'
         return f'tool: scanoss-py, version: {__version__}, {data}'
 
-    def __log_result(self, string, outfile=None):
+    def __log_results(self, results: 'ScanResults', outfile=None):
         """
-        Logs result to file or STDOUT
+        Stream the scan results (as JSON) to file or STDOUT
         """
         if not outfile and self.scan_output:
             outfile = self.scan_output
         if outfile:
             with open(outfile, "a") as rf:
-                rf.write(string + '\n')
+                results.write_json(rf)
+                rf.write('\n')
+        else:
+            results.write_json(sys.stdout)
+            sys.stdout.write('\n')
+
+    def __output_results(self, results: 'ScanResults') -> bool:
+        """
+        Produce the requested output format directly from the scan results model
+        :param results: scan results to output
+        :return: True if successful, False otherwise
+        """
+        success = True
+        if self.output_format == 'plain':
+            self.__log_results(results)
+        elif self.output_format == 'cyclonedx':
+            from .cyclonedx import CycloneDx  # Only load the requested output formatter
+            cdx = CycloneDx(self.debug, self.scan_output)
+            success = cdx.produce_from_json(results.get_results())
+        elif self.output_format == 'spdxlite':
+            from .spdxlite import SpdxLite
+            spdxlite = SpdxLite(self.debug, self.scan_output)
+            success = spdxlite.produce_from_json(results.get_results())
+        elif self.output_format == 'csv':
+            from .csvoutput import CsvOutput
+            csvo = CsvOutput(self.debug, self.scan_output)
+            success = csvo.produce_from_json(results.get_results())
         else:
-            print(string)
+            self.print_stderr(f'ERROR: Unknown output format: {self.output_format}')
+            success = False
+        return success
 
     def is_file_or_snippet_scan(self):
         """
@@ -331,14 +441,25 @@ class Scanner(ScanossBase):
 
         if self.scan_output:
             self.print_msg(f'Writing results to {self.scan_output}...')
-        if self.is_dependency_scan():
-            if not self.threaded_deps.run(what_to_scan=scan_dir, wait=False):  # Kick off a background dependency scan
+        if self.threaded_scan:
+            self.threaded_scan.file_map = file_map  # Revert obfuscated file names as results arrive
+        scan_deps = self.is_dependency_scan() and self.shard_index == 1  # Only the first shard scans the dependencies
+        native_deps = scan_deps and self.native_deps
+        if scan_deps and not native_deps:  # Kick off a background scancode dependency scan (of the whole tree)
+            if not self.threaded_deps.run(what_to_scan=scan_dir, wait=False):
                 success = False
         if self.is_file_or_snippet_scan():
+            self._manifests = [] if native_deps else None  # Collect the native manifests while fingerprinting
             if not self.scan_folder(scan_dir):
                 success = False
+        elif native_deps:
+            self._manifests = self.__find_manifests(scan_dir)
+        if native_deps:  # Kick off a background dependency scan of the manifests found
+            if not self.threaded_deps.run(what_to_scan=scan_dir, wait=False, manifests=self._manifests):
+                success = False
+            self._manifests = None
         if self.threaded_scan:
-            if not self.__finish_scan_threaded(file_map):
+            if not self.__finish_scan_threaded():
                 success = False
         return success
 
@@ -360,6 +481,7 @@ class Scanner(ScanossBase):
         self.print_msg(f'Searching {scan_dir} for files to fingerprint...')
         spinner = None
         if not self.quiet and self.isatty:
+            from progress.spinner import Spinner  # Only load the progress display on a terminal
             spinner = Spinner('Fingerprinting ')
         save_wfps_for_print = not self.no_wfp_file or not self.threaded_scan
         wfp_list = []
@@ -375,6 +497,8 @@ class Scanner(ScanossBase):
                 self.print_stderr('Warning: Aborting fingerprinting as the scanning service is not available.')
                 break
             dirs[:] = self.__filter_dirs(dirs)  # Strip out unwanted directories
+            if self._manifests is not None:
+                self.__collect_manifests(scan_dir, scan_dir_len, root, files)
             filtered_files = self.__filter_files(files)  # Strip out unwanted files
             self.print_debug(f'F Root: {root}, Dirs: {dirs}, Files {filtered_files}')
             for file in filtered_files:  # Cycle through each filtered file
@@ -386,10 +510,13 @@ class Scanner(ScanossBase):
                     self.print_trace(
                         f'Ignoring missing symlink file: {file} ({e})')  # Can fail if there is a broken symlink
                 if f_size > 0:  # Ignore broken links and empty files
+                    file_path = Scanner.__strip_dir(scan_dir, scan_dir_len, path)
+                    if not self.__in_shard(file_path):
+                        continue
                     self.print_trace(f'Fingerprinting {path}...')
                     if spinner:
                         spinner.next()
-                    wfp = self.winnowing.wfp_for_file(path, Scanner.__strip_dir(scan_dir, scan_dir_len, path))
+                    wfp = self.winnowing.wfp_for_file(path, file_path)
                     if wfp is None or wfp == '':
                         self.print_stderr(f'Warning: No WFP returned for {path}')
                         continue
@@ -428,8 +555,7 @@ class Scanner(ScanossBase):
         if file_count > 0:
             if save_wfps_for_print:  # Write a WFP file if no threading is requested
                 self.print_debug(f'Writing fingerprints to {self.wfp}')
-                with open(self.wfp, 'w') as f:
-                    f.write(''.join(wfp_list))
+                self.__write_wfp_file(self.wfp, wfp_list)
             else:
                 self.print_debug(f'Skipping writing WFP file {self.wfp}')
             if self.threaded_scan:
@@ -438,6 +564,36 @@ class Scanner(ScanossBase):
             Scanner.print_stderr(f'Warning: No files found to scan in folder: {scan_dir}')
         return success
 
+    def __collect_manifests(self, scan_dir: str, scan_dir_len: int, root: str, files: list) -> None:
+        """
+        Record the dependency manifests/lockfiles in the given (walked) folder
+        Manifests are matched before the file extension filters (which would exclude most of them)
+        :param scan_dir: root folder being scanned
+        :param scan_dir_len: length of the root folder path
+        :param root: current folder
+        :param files: files in the current folder
+        """
+        from .manifestdeps import is_manifest
+        for file in files:
+            if file.startswith('.') and not self.hidden_files_folders:
+                continue
+            path = os.path.join(root, file)
+            if is_manifest(Scanner.__strip_dir(scan_dir, scan_dir_len, path)) and os.path.isfile(path):
+                self._manifests.append(path)
+
+    def __find_manifests(self, scan_dir: str) -> List[str]:
+        """
+        Walk the given folder (using the same folder/hidden file rules as fingerprinting) for dependency manifests
+        :param scan_dir: folder to search
+        :return: list of manifest paths
+        """
+        self._manifests = []
+        scan_dir_len = len(scan_dir) if scan_dir.endswith(os.path.sep) else len(scan_dir) + 1
+        for root, dirs, files in os.walk(scan_dir):
+            dirs[:] = self.__filter_dirs(dirs)  # Strip out unwanted directories
+            self.__collect_manifests(scan_dir, scan_dir_len, root, files)
+        return self._manifests
+
     def __run_scan_threaded(self, scan_started: bool, file_count: int) -> bool:
         """
         Start scanning the filtered files but do not wait for it to complete
@@ -453,94 +609,39 @@ class Scanner(ScanossBase):
                 success = False
         return success
 
-    def __finish_scan_threaded(self, file_map: dict = None) -> bool:
+    def __finish_scan_threaded(self) -> bool:
         """
-        Wait for the threaded scans to complete
-        :param file_map: mapping of obfuscated files back into originals
+        Wait for the threaded scans to complete and produce the output
         :return: True if successful, False otherwise
         """
         success = True
-        responses = None
         dep_responses = None
+        results = self.threaded_scan.results  # Results are spooled to disk as they arrive
         if self.is_file_or_snippet_scan():
             if not self.threaded_scan.complete():  # Wait for the scans to complete
                 self.print_stderr(f'Warning: Scanning analysis ran into some trouble.')
                 success = False
             self.threaded_scan.complete_bar()
-            responses = self.threaded_scan.responses
-        if self.is_dependency_scan():
+        if self.is_dependency_scan() and self._threaded_deps:  # Only if a dependency scan was started
             self.print_msg('Retrieving dependency data...')
             if not self.threaded_deps.complete():
                 self.print_stderr(f'Warning: Dependency analysis ran into some trouble.')
                 success = False
             dep_responses = self.threaded_deps.responses
             # self.print_stderr(f'Dep Data: {dep_responses}')
-        # TODO change to dictionary
-        raw_output = "{\n"
-        # TODO look into merging the two dictionaries. See https://favtutor.com/blogs/merge-dictionaries-python
-        if responses or dep_responses:
-            first = True
-            if responses:
-                for scan_resp in responses:
-                    if scan_resp is not None:
-                        for key, value in scan_resp.items():
-                            if file_map:  # We have a map for obfuscated files. Check if we can revert it
-                                fm = file_map.get(key)
-                                if fm:
-                                    key = fm  # Replace the obfuscated filename
-                            if first:
-                                raw_output += "  \"%s\":%s" % (key, json.dumps(value, indent=2))
-                                first = False
-                            else:
-                                raw_output += ",\n  \"%s\":%s" % (key, json.dumps(value, indent=2))
-                # End for loop
-            if dep_responses:
-                dep_files = dep_responses.get("files")
-                if dep_files and len(dep_files) > 0:
-                    for dep_file in dep_files:
-                        file = dep_file.pop("file", None)
-                        if file is not None:
-                            if first:
-                                raw_output += "  \"%s\":[%s]" % (file, json.dumps(dep_file, indent=2))
-                                first = False
-                            else:
-                                raw_output += ",\n  \"%s\":[%s]" % (file, json.dumps(dep_file, indent=2))
-                    # End for loop
-        else:
+        if dep_responses:
+            dep_files = dep_responses.get("files")
+            if dep_files and len(dep_files) > 0:
+                for dep_file in dep_files:
+                    file = dep_file.pop("file", None)
+                    if file is not None:
+                        results.add({file: [dep_file]})
+        if len(results) == 0 and not dep_responses:
             success = False
-        raw_output += "\n}"
-        parsed_json = None
-        try:
-            parsed_json = json.loads(raw_output)
-        except Exception as e:
-            self.print_stderr(f'Warning: Problem decoding parsed json: {e}')
 
-        if self.output_format == 'plain':
-            if parsed_json:
-                self.__log_result(json.dumps(parsed_json, indent=2, sort_keys=True))
-            else:
-                self.__log_result(raw_output)
-        elif self.output_format == 'cyclonedx':
-            cdx = CycloneDx(self.debug, self.scan_output)
-            if parsed_json:
-                success = cdx.produce_from_json(parsed_json)
-            else:
-                success = cdx.produce_from_str(raw_output)
-        elif self.output_format == 'spdxlite':
-            spdxlite = SpdxLite(self.debug, self.scan_output)
-            if parsed_json:
-                success = spdxlite.produce_from_json(parsed_json)
-            else:
-                success = spdxlite.produce_from_str(raw_output)
-        elif self.output_format == 'csv':
-            csvo = CsvOutput(self.debug, self.scan_output)
-            if parsed_json:
-                success = csvo.produce_from_json(parsed_json)
-            else:
-                success = csvo.produce_from_str(raw_output)
-        else:
-            self.print_stderr(f'ERROR: Unknown output format: {self.output_format}')
+        if not self.__output_results(results):
             success = False
+        results.close()
         return success
 
     def scan_file_with_options(self, file: str, file_map: dict = None) -> bool:
@@ -560,6 +661,8 @@ class Scanner(ScanossBase):
 
         if self.scan_output:
             self.print_msg(f'Writing results to {self.scan_output}...')
+        if self.threaded_scan:
+            self.threaded_scan.file_map = file_map  # Revert obfuscated file names as results arrive
         if self.is_dependency_scan():
             if not self.threaded_deps.run(what_to_scan=file, wait=False):  # Kick off a background dependency scan
                 success = False
@@ -567,7 +670,7 @@ class Scanner(ScanossBase):
             if not self.scan_file(file):
                 success = False
         if self.threaded_scan:
-            if not self.__finish_scan_threaded(file_map):
+            if not self.__finish_scan_threaded():
                 success = False
         return success
 
@@ -626,163 +729,128 @@ class Scanner(ScanossBase):
                 success = False
         return success
 
-    def scan_wfp_file(self, file: str = None) -> bool:
+    def scan_wfp_file(self, file: str = None, paths: List[str] = None) -> bool:
         """
         Scan the contents of the specified WFP file (in the current process)
         :param file: Scan the contents of the specified WFP file (in the current process)
+        :param paths: only scan these files from the WFP (optional - read using the WFP index)
         :return: True if successful, False otherwise
         """
         success = True
         wfp_file = file if file else self.wfp  # If a WFP file is specified, use it, otherwise us the default
         if not os.path.exists(wfp_file) or not os.path.isfile(wfp_file):
             raise Exception(f"ERROR: Specified WFP file does not exist or is not a file: {wfp_file}")
-        file_count = Scanner.__count_files_in_wfp_file(wfp_file)
+        from .scanresults import ScanResults
+        from .wfpreader import WfpReader
+        reader = WfpReader(wfp_file, debug=self.debug, trace=self.trace, quiet=self.quiet, paths=paths)
+        file_count = reader.count()
         cur_files = 0
-        cur_size = 0
-        batch_files = 0
-        wfp = ''
         max_component = {'name': '', 'hits': 0}
         components = {}
         self.print_debug(f'Found {file_count} files to process.')
-        raw_output = "{\n"
-        file_print = ''
+        results = ScanResults(self.debug, self.trace, self.quiet)
         bar = None
         if not self.quiet and self.isatty:
+            from progress.bar import Bar
             bar = Bar('Scanning', max=file_count)
             bar.next(0)
-        with open(wfp_file) as f:
-            for line in f:
-                if line.startswith(WFP_FILE_START):
-                    if file_print:
-                        wfp += file_print  # Store the WFP for the current file
-                        cur_size = len(wfp.encode("utf-8"))
-                    file_print = line  # Start storing the next file
-                    cur_files += 1
-                    batch_files += 1
-                else:
-                    file_print += line  # Store the rest of the WFP for this file
-                l_size = cur_size + len(file_print.encode('utf-8'))
-                # Hit the max post size, so sending the current batch and continue processing
-                if l_size >= self.max_post_size and wfp:
-                    self.print_debug(f'Sending {batch_files} ({cur_files}) of'
-                                     f' {file_count} ({len(wfp.encode("utf-8"))} bytes) files to the ScanOSS API.')
-                    if self.debug and cur_size > self.max_post_size:
-                        Scanner.print_stderr(f'Warning: Post size {cur_size} greater than limit {self.max_post_size}')
-                    scan_resp = self.scanoss_api.scan(wfp, max_component['name'])  # Scan current WFP and store
-                    if bar:
-                        bar.next(batch_files)
-                    if scan_resp is not None:
-                        for key, value in scan_resp.items():
-                            raw_output += "  \"%s\":%s," % (key, json.dumps(value, indent=2))
-                            for v in value:
-                                if hasattr(v, 'get'):
-                                    if v.get('id') != 'none':
-                                        vcv = '%s:%s:%s' % (v.get('vendor'), v.get('component'), v.get('version'))
-                                        components[vcv] = components[vcv] + 1 if vcv in components else 1
-                                        if max_component['hits'] < components[vcv]:
-                                            max_component['name'] = v.get('component')
-                                            max_component['hits'] = components[vcv]
-                                else:
-                                    Scanner.print_stderr(f'Warning: Unknown value: {v}')
-                    else:
-                        success = False
-                    batch_files = 0
-                    wfp = ''
-        if file_print:
-            wfp += file_print  # Store the WFP for the current file
-        if wfp:
+        for wfp, batch_paths in reader.batches(self.max_post_size, include=self.__in_shard):
+            batch_files = len(batch_paths)
+            cur_files += batch_files
+            if self.preserve_order:
+                results.add_order(batch_paths)
             self.print_debug(f'Sending {batch_files} ({cur_files}) of'
                              f' {file_count} ({len(wfp.encode("utf-8"))} bytes) files to the ScanOSS API.')
             scan_resp = self.scanoss_api.scan(wfp, max_component['name'])  # Scan current WFP and store
             if bar:
                 bar.next(batch_files)
-            first = True
             if scan_resp is not None:
-                for key, value in scan_resp.items():
-                    if first:
-                        raw_output += "  \"%s\":%s" % (key, json.dumps(value, indent=2))
-                        first = False
-                    else:
-                        raw_output += ",\n  \"%s\":%s" % (key, json.dumps(value, indent=2))
+                results.add(scan_resp)
+                for value in scan_resp.values():
+                    for v in value:
+                        if hasattr(v, 'get'):
+                            if v.get('id') != 'none':
+                                vcv = '%s:%s:%s' % (v.get('vendor'), v.get('component'), v.get('version'))
+                                components[vcv] = components[vcv] + 1 if vcv in components else 1
+                                if max_component['hits'] < components[vcv]:
+                                    max_component['name'] = v.get('component')
+                                    max_component['hits'] = components[vcv]
+                        else:
+                            Scanner.print_stderr(f'Warning: Unknown value: {v}')
             else:
                 success = False
-        raw_output += "\n}"
         if bar:
             bar.finish()
-        if self.output_format == 'plain':
-            self.__log_result(raw_output)
-        elif self.output_format == 'cyclonedx':
-            cdx = CycloneDx(self.debug, self.scan_output)
-            cdx.produce_from_str(raw_output)
-        elif self.output_format == 'spdxlite':
-            spdxlite = SpdxLite(self.debug, self.scan_output)
-            success = spdxlite.produce_from_str(raw_output)
-        elif self.output_format == 'csv':
-            csvo = CsvOutput(self.debug, self.scan_output)
-            csvo.produce_from_str(raw_output)
-        else:
-            self.print_stderr(f'ERROR: Unknown output format: {self.output_format}')
+        if not self.__output_results(results):
             success = False
-
         return success
 
-    def scan_wfp_file_threaded(self, file: str = None, file_map: dict = None) -> bool:
+    def scan_wfp_file_threaded(self, file: str = None, file_map: dict = None, paths: List[str] = None) -> bool:
         """
         Scan the contents of the specified WFP file (threaded)
+        The WFP is streamed from disk into the (bounded) scanning queue, one request at a time
         :param file: WFP file to scan (optional)
         :param file_map: mapping of obfuscated files back into originals (optional)
+        :param paths: only scan these files from the WFP (optional - read using the WFP index)
         return: True if successful, False otherwise
         """
         success = True
         wfp_file = file if file else self.wfp  # If a WFP file is specified, use it, otherwise us the default
         if not os.path.exists(wfp_file) or not os.path.isfile(wfp_file):
             raise Exception(f"ERROR: Specified WFP file does not exist or is not a file: {wfp_file}")
-        cur_size = 0
+        self.threaded_scan.file_map = file_map  # Revert obfuscated file names as results arrive
+        from .wfpreader import WfpReader
+        reader = WfpReader(wfp_file, debug=self.debug, trace=self.trace, quiet=self.quiet, paths=paths)
+        results = self.threaded_scan.results
         queue_size = 0
         file_count = 0  # count all files fingerprinted
-        wfp_file_count = 0  # count number of files in each queue post
         scan_started = False
-        wfp = ''
-        scan_block = ''
-        with open(wfp_file) as f:  # Parse the WFP file
-            for line in f:
-                if line.startswith(WFP_FILE_START):
-                    if scan_block:
-                        wfp += scan_block  # Store the WFP for the current file
-                        cur_size = len(wfp.encode("utf-8"))
-                    scan_block = line  # Start storing the next file
-                    file_count += 1
-                    wfp_file_count += 1
-                else:
-                    scan_block += line  # Store the rest of the WFP for this file
-                l_size = cur_size + len(scan_block.encode('utf-8'))
-                # Hit the max post size, so sending the current batch and continue processing
-                if (wfp_file_count > self.post_file_count or l_size >= self.max_post_size) and wfp:
-                    if self.debug and cur_size > self.max_post_size:
-                        Scanner.print_stderr(f'Warning: Post size {cur_size} greater than limit {self.max_post_size}')
-                    self.threaded_scan.queue_add(wfp)
-                    queue_size += 1
-                    wfp = ''
-                    wfp_file_count = 0
-                    if not scan_started and queue_size > self.nb_threads:  # Start scanning if we have something to do
-                        scan_started = True
-                        if not self.threaded_scan.run(wait=False):
-                            self.print_stderr(
-                                f'Warning: Some errors encounted while scanning. Results might be incomplete.')
-                            success = False
-            # End for loop
-        if scan_block:
-            wfp += scan_block  # Store the WFP for the current file
-        if wfp:
+        for wfp, batch_paths in reader.batches(self.max_post_size, self.post_file_count, include=self.__in_shard):
+            file_count += len(batch_paths)
+            if self.preserve_order:  # Output the results in the same order as the WFP file
+                results.add_order([file_map.get(path, path) for path in batch_paths] if file_map else batch_paths)
             self.threaded_scan.queue_add(wfp)
             queue_size += 1
-
+            if not scan_started and queue_size > self.nb_threads:  # Start scanning if we have something to do
+                scan_started = True
+                if not self.threaded_scan.run(wait=False):
+                    self.print_stderr(f'Warning: Some errors encounted while scanning. Results might be incomplete.')
+                    success = False
         if not self.__run_scan_threaded(scan_started, file_count):
             success = False
-        elif not self.__finish_scan_threaded(file_map):
+        elif not self.__finish_scan_threaded():
             success = False
         return success
 
+    def merge_results_files(self, files: List[str]) -> bool:
+        """
+        Merge the given (plain JSON) scan results files, i.e. from sharded scans, into a single output
+        :param files: list of results files to merge
+        :return: True if successful, False otherwise
+        """
+        if not files:
+            raise Exception(f"ERROR: Please specify results files to merge")
+        from .scanresults import ScanResults
+        results = ScanResults(self.debug, self.trace, self.quiet)
+        for file in files:
+            if not os.path.exists(file) or not os.path.isfile(file):
+                raise Exception(f"ERROR: Specified results file does not exist or is not a file: {file}")
+            self.print_debug(f'Merging results from {file}...')
+            try:
+                with open(file) as f:
+                    file_results = json.load(f)
+            except Exception as e:
+                self.print_stderr(f'ERROR: Problem parsing results file {file}: {e}')
+                return False
+            if not isinstance(file_results, dict):
+                self.print_stderr(f'ERROR: Results file is not in plain JSON format: {file}')
+                return False
+            overlap = sum(1 for key in file_results if key in results)
+            if overlap:
+                self.print_stderr(f'Warning: {overlap} files in {file} already merged from another results file')
+            results.add(file_results)
+        return self.__output_results(results)
+
     def scan_wfp(self, wfp: str) -> bool:
         """
         Send the specified (single) WFP to ScanOSS for identification
@@ -794,31 +862,42 @@ class Scanner(ScanossBase):
         success = True
         if not wfp:
             raise Exception(f"ERROR: Please specify a WFP to scan")
-        raw_output = "{\n"
+        from .scanresults import ScanResults
+        results = ScanResults(self.debug, self.trace, self.quiet)
         scan_resp = self.scanoss_api.scan(wfp)
         if scan_resp is not None:
-            for key, value in scan_resp.items():
-                raw_output += "  \"%s\":%s" % (key, json.dumps(value, indent=2))
+            results.add(scan_resp)
         else:
             success = False
-        raw_output += "\n}"
-        if self.output_format == 'plain':
-            self.__log_result(raw_output)
-        elif self.output_format == 'cyclonedx':
-            cdx = CycloneDx(self.debug, self.scan_output)
-            cdx.produce_from_str(raw_output)
-        elif self.output_format == 'spdxlite':
-            spdxlite = SpdxLite(self.debug, self.scan_output)
-            success = spdxlite.produce_from_str(raw_output)
-        elif self.output_format == 'csv':
-            csvo = CsvOutput(self.debug, self.scan_output)
-            csvo.produce_from_str(raw_output)
-        else:
-            self.print_stderr(f'ERROR: Unknown output format: {self.output_format}')
+        if not self.__output_results(results):
             success = False
-
         return success
 
+    def __write_wfp_file(self, wfp_file: str, wfps: List[str]) -> None:
+        """
+        Write the given fingerprints to a WFP file, along with its (sidecar) index
+        or to a binary WFP container (if requested)
+        :param wfp_file: WFP file to write
+        :param wfps: list of file fingerprints (one per file)
+        """
+        if self.wfp_binary:
+            from .wfpcontainer import WfpContainer
+            WfpContainer(self.debug, self.trace, self.quiet).write(wfp_file, wfps, compress=self.wfp_compress)
+            return
+        from .wfpindex import WfpIndex
+        index = WfpIndex(wfp_file, self.debug, self.trace, self.quiet)
+        offset = 0
+        with open(wfp_file, 'wb') as f:
+            for wfp in wfps:
+                block = wfp.encode('utf-8')
+                f.write(block)
+                index.add(offset, block)
+                offset += len(block)
+        try:
+            index.write()
+        except OSError as e:
+            self.print_debug(f'Warning: Failed to write WFP index {index.index_file}: {e}')
+
     def wfp_contents(self, filename: str, contents: bytes, wfp_file: str = None):
         """
         Fingerprint the specified contents as a file
@@ -838,8 +917,7 @@ class Scanner(ScanossBase):
         if wfp:
             if wfp_file:
                 self.print_stderr(f'Writing fingerprints to {wfp_file}')
-                with open(wfp_file, 'w') as f:
-                    f.write(wfp)
+                self.__write_wfp_file(wfp_file, [wfp])
             else:
                 print(wfp)
         else:
@@ -859,8 +937,7 @@ class Scanner(ScanossBase):
         if wfp:
             if wfp_file:
                 self.print_stderr(f'Writing fingerprints to {wfp_file}')
-                with open(wfp_file, 'w') as f:
-                    f.write(wfp)
+                self.__write_wfp_file(wfp_file, [wfp])
             else:
                 print(wfp)
         else:
@@ -874,11 +951,12 @@ class Scanner(ScanossBase):
             raise Exception(f"ERROR: Please specify a folder to fingerprint")
         if not os.path.exists(scan_dir) or not os.path.isdir(scan_dir):
             raise Exception(f"ERROR: Specified folder does not exist or is not a folder: {scan_dir}")
-        wfps = ''
+        wfps = []
         scan_dir_len = len(scan_dir) if scan_dir.endswith(os.path.sep) else len(scan_dir) + 1
         self.print_msg(f'Searching {scan_dir} for files to fingerprint...')
         spinner = None
         if not self.quiet and self.isatty:
+            from progress.spinner import Spinner  # Only load the progress display on a terminal
             spinner = Spinner('Fingerprinting ')
         for root, dirs, files in os.walk(scan_dir):
             dirs[:] = self.__filter_dirs(dirs)  # Strip out unwanted directories
@@ -896,16 +974,17 @@ class Scanner(ScanossBase):
                     self.print_debug(f'Fingerprinting {path}...')
                     if spinner:
                         spinner.next()
-                    wfps += self.winnowing.wfp_for_file(path, Scanner.__strip_dir(scan_dir, scan_dir_len, path))
+                    wfp = self.winnowing.wfp_for_file(path, Scanner.__strip_dir(scan_dir, scan_dir_len, path))
+                    if wfp:
+                        wfps.append(wfp)
         if spinner:
             spinner.finish()
         if wfps:
             if wfp_file:
                 self.print_stderr(f'Writing fingerprints to {wfp_file}')
-                with open(wfp_file, 'w') as f:
-                    f.write(wfps)
+                self.__write_wfp_file(wfp_file, wfps)
             else:
-                print(wfps)
+                print(''.join(wfps))
         else:
             Scanner.print_stderr(f'Warning: No files found to fingerprint in folder: {scan_dir}')
 
@@ -21,8 +21,11 @@
    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
    THE SOFTWARE.
 """
+import hashlib
+import json
 import logging
 import os
+import re
 import sys
 import time
 from json.decoder import JSONDecodeError
@@ -30,10 +33,15 @@ import requests
 import uuid
 import http.client as http_client
 import urllib3
+from typing import Dict, Tuple
 
 from pypac import PACSession
 from pypac.parser import PACFile
 from urllib3.exceptions import InsecureRequestWarning
+from .circuitbreaker import CircuitBreaker, DEFAULT_FAILURE_THRESHOLD, DEFAULT_RESET_TIMEOUT
+from .endpointpool import EndpointPool
+from .resultcache import ResultCache
+from .scanarchive import ScanArchive
 from .scanossbase import ScanossBase
 from . import __version__
 
@@ -42,6 +50,9 @@ DEFAULT_URL = "https://osskb.org/api/scan/direct"  # default free service URL
 DEFAULT_URL2 = "https://scanoss.com/api/scan/direct"  # default premium service URL
 SCANOSS_SCAN_URL = os.environ.get("SCANOSS_SCAN_URL") if os.environ.get("SCANOSS_SCAN_URL") else DEFAULT_URL
 SCANOSS_API_KEY = os.environ.get("SCANOSS_API_KEY") if os.environ.get("SCANOSS_API_KEY") else ''
+RETRY_DELAY = 5  # Seconds to wait before retrying a failed request
+PROBE_TIMEOUT = 10  # Seconds to wait for a circuit breaker probe response
+WFP_FILE_RE = re.compile(r'^file=', re.MULTILINE)
 
 
 class ScanossApi(ScanossBase):
@@ -53,18 +64,28 @@ class ScanossApi(ScanossBase):
     def __init__(self, scan_type: str = None, sbom_path: str = None, scan_format: str = None, flags: str = None,
                  url: str = None, api_key: str = None, debug: bool = False, trace: bool = False, quiet: bool = False,
                  timeout: int = 180, ver_details: str = None, ignore_cert_errors: bool = False,
-                 proxy: str = None, ca_cert: str = None, pac: PACFile = None, retry: int = 5):
+                 proxy: str = None, ca_cert: str = None, pac: PACFile = None, retry: int = 5,
+                 cache: ResultCache = None, archive: ScanArchive = None, lb_strategy: str = None,
+                 breaker_threshold: int = DEFAULT_FAILURE_THRESHOLD, breaker_reset: int = DEFAULT_RESET_TIMEOUT,
+                 breaker_wait: int = 0):
         """
         Initialise the SCANOSS API
         :param scan_type: Scan type (default identify)
         :param sbom_path: Input SBOM file to match scan type (default None)
         :param scan_format: Scan format (default plain)
         :param flags: Scanning flags (default None)
-        :param url: API URL (default https://osskb.org/api/scan/direct)
+        :param url: API URL, or comma separated list of URLs to load balance across
+                    (default https://osskb.org/api/scan/direct)
         :param api_key: API Key (default None)
         :param debug: Enable debug (default False)
         :param trace: Enable trace (default False)
         :param quiet: Enable quite mode (default False)
+        :param cache: Local result cache to only send unchanged files to the API once (default None)
+        :param archive: Archive to record the API results to, or replay them from (default None)
+        :param lb_strategy: Load balancing strategy across multiple (comma separated) URLs (default least-outstanding)
+        :param breaker_threshold: Consecutive failures before failing fast (circuit breaker) (default 5, 0 disables)
+        :param breaker_reset: Seconds before probing the service again once the circuit is open (default 30)
+        :param breaker_wait: Seconds a request should wait for the service to recover, instead of failing (default 0)
 
         To set a custom certificate use:
             REQUESTS_CA_BUNDLE=/path/to/cert.pem
@@ -73,10 +94,15 @@ class ScanossApi(ScanossBase):
             HTTPS_PROXY='http://<ip>:<port>'
         """
         super().__init__(debug, trace, quiet)
-        self.url = url if url else SCANOSS_SCAN_URL
         self.api_key = api_key if api_key else SCANOSS_API_KEY
-        if self.api_key and not url and not os.environ.get("SCANOSS_SCAN_URL"):
-            self.url = DEFAULT_URL2  # API key specific and no alternative URL, so use the default premium
+        if not url:
+            url = SCANOSS_SCAN_URL
+            if self.api_key and not os.environ.get("SCANOSS_SCAN_URL"):
+                url = DEFAULT_URL2  # API key specific and no alternative URL, so use the default premium
+        self.urls = [u.strip() for u in url.split(',') if u.strip()]
+        self.url = self.urls[0]
+        self.endpoints = EndpointPool(self.urls, lb_strategy, debug, trace, quiet)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset, breaker_wait, debug, trace, quiet)
         self.scan_type = scan_type
         self.scan_format = scan_format if scan_format else 'plain'
         self.sbom_path = sbom_path
@@ -94,6 +120,9 @@ class ScanossApi(ScanossBase):
         self.headers['user-agent'] = f'scanoss-py/{__version__}'
         self.sbom = None
         self.load_sbom()  # Load an input SBOM if one is specified
+        self.cache = cache
+        self.archive = archive
+        self._request_context = json.dumps([self.scan_type, self.sbom, self.scan_format, self.flags])
         if self.trace:
             logging.basicConfig(stream=sys.stderr, level=logging.DEBUG)
             http_client.HTTPConnection.debuglevel = 1
@@ -134,27 +163,33 @@ class ScanossApi(ScanossBase):
         :param scan_id: ID of the scan being run (usually thread id)
         :return: JSON result object
         """
+        cached, misses = self.cache_lookup(wfp, context)
+        if misses is not None:
+            if not misses:  # Everything was already in the cache
+                return cached
+            wfp = ''.join(block for _, block in misses.values())  # Only scan the files we have no results for
+        if self.archive and self.archive.replay:
+            return self.cache_update(self.replay_scan(wfp, context), cached, misses)
         request_id = str(uuid.uuid4())
-        form_data = {}
-        if self.sbom:
-            form_data['type'] = self.scan_type
-            form_data['assets'] = self.sbom
-        if self.scan_format:
-            form_data['format'] = self.scan_format
-        if self.flags:
-            form_data['flags'] = self.flags
-        if context:
-            form_data['context'] = context
+        form_data = self.get_form_data(context)
         scan_files = {'file': ("%s.wfp" % request_id, wfp)}
         headers = self.headers
         headers['x-request-id'] = request_id  # send a unique request id for each post
         r = None
+        deadline = self.breaker.deadline()  # Time to wait for the service to recover (if the circuit opens)
         retry = 0  # Add some retry logic to cater for timeouts, etc.
         while retry <= self.retry_limit:
             retry += 1
+            while self.breaker.acquire(deadline):  # Circuit half-open, so check the service is back before sending
+                if self.probe():
+                    break
+            endpoint = self.endpoints.acquire()  # Select the endpoint to send this attempt to
+            url = endpoint.url
+            healthy = False
+            start = time.monotonic()
             try:
                 r = None
-                r = self.session.post(self.url, files=scan_files, data=form_data, headers=self.headers,
+                r = self.session.post(url, files=scan_files, data=form_data, headers=self.headers,
                                       timeout=self.timeout
                                       )
                 # r = requests.post(self.url, files=scan_files, data=form_data, headers=self.headers,
@@ -162,35 +197,34 @@ class ScanossApi(ScanossBase):
                 #                   )
             except (requests.exceptions.SSLError, requests.exceptions.ProxyError) as e:
                 self.print_stderr(f'ERROR: Exception ({e.__class__.__name__}) POSTing data - {e}.')
-                raise Exception(f"ERROR: The SCANOSS API request failed for {self.url}") from e
+                raise Exception(f"ERROR: The SCANOSS API request failed for {url}") from e
             except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
                 if retry > self.retry_limit:  # Timed out retry_limit or more times, fail
                     self.print_stderr(f'ERROR: {e.__class__.__name__} POSTing data ({request_id}) - {e}: {scan_files}')
                     raise Exception(f"ERROR: The SCANOSS API request timed out ({e.__class__.__name__}) for"
-                                    f" {self.url}") from e
+                                    f" {url}") from e
                 else:
-                    self.print_stderr(f'Warning: {e.__class__.__name__} communicating with {self.url}. Retrying...')
-                    time.sleep(5)
+                    self.print_stderr(f'Warning: {e.__class__.__name__} communicating with {url}. Retrying...')
             except Exception as e:
                 self.print_stderr(f'ERROR: Exception ({e.__class__.__name__}) POSTing data ({request_id}) - {e}:'
                                   f' {scan_files}')
-                raise Exception(f"ERROR: The SCANOSS API request failed for {self.url}") from e
+                raise Exception(f"ERROR: The SCANOSS API request failed for {url}") from e
             else:
                 if r is None:
                     if retry > self.retry_limit:  # No response retry_limit or more times, fail
                         self.save_bad_req_wfp(scan_files, request_id, scan_id)
                         raise Exception(f"ERROR: The SCANOSS API request ({request_id}) response object is empty "
-                                        f"for {self.url}")
+                                        f"for {url}")
                     else:
-                        self.print_stderr(f'Warning: No response received from {self.url}. Retrying...')
-                        time.sleep(5)
+                        self.print_stderr(f'Warning: No response received from {url}. Retrying...')
                 elif r.status_code == 503:  # Service limits have most likely been reached
                     self.print_stderr(f'ERROR: SCANOSS API rejected the scan request ({request_id}) due to '
                                       f'service limits being exceeded')
                     self.print_stderr(f'ERROR: Details: {r.text.strip()}')
                     raise Exception(f"ERROR: {r.status_code} - The SCANOSS API request ({request_id}) rejected "
-                                    f"for {self.url} due to service limits being exceeded.")
+                                    f"for {url} due to service limits being exceeded.")
                 elif r.status_code >= 400:
+                    healthy = r.status_code < 500  # Only server side errors count against the endpoint
                     if retry > self.retry_limit:  # No response retry_limit or more times, fail
                         self.save_bad_req_wfp(scan_files, request_id, scan_id)
                         raise Exception(
@@ -199,35 +233,195 @@ class ScanossApi(ScanossBase):
                     else:
                         self.save_bad_req_wfp(scan_files, request_id, scan_id)
                         self.print_stderr(f'Warning: Error response code {r.status_code} ({r.text.strip()}) from '
-                                          f'{self.url}. Retrying...')
-                        time.sleep(5)
+                                          f'{url}. Retrying...')
                 else:
+                    healthy = True
                     break  # Valid response, break out of the retry loop
+            finally:
+                self.endpoints.release(endpoint, healthy, time.monotonic() - start)
+                self.breaker.record(healthy)
+            self.retry_wait()  # Wait before retrying (unless there is another endpoint to fail over to)
         # End of while loop
         if r is None:
             self.save_bad_req_wfp(scan_files, request_id, scan_id)
-            raise Exception(f"ERROR: The SCANOSS API request response object is empty for {self.url}")
+            raise Exception(f"ERROR: The SCANOSS API request response object is empty for {url}")
         try:
             if 'xml' in self.scan_format:  # TODO remove XML parsing option?
                 return r.text
             json_resp = r.json()
-            return json_resp
+            if self.archive:
+                self.record_scan(wfp, context, json_resp)
+            return self.cache_update(json_resp, cached, misses)
         except (JSONDecodeError, Exception) as e:
             self.print_stderr(f'ERROR: The SCANOSS API returned an invalid JSON '
                               f'({e.__class__.__name__} - {request_id}): {e}')
-            bad_json_file = f'bad_json-{scan_id}-{request_id}.txt' if scan_id else f'bad_json-{request_id}.txt'
-            self.print_stderr(f'Ignoring result. Please look in "{bad_json_file}" for more details.')
-            try:
-                with open(bad_json_file, 'w') as f:
-                    f.write(f"---Request ID Begin---\n{request_id}\n---Request ID End---\n")
-                    f.write(f"---WFP Begin---\n{scan_files}\n---WFP End---\n---Bad JSON Begin---\n")
-                    f.write(r.text)
-                    f.write("---Bad JSON End---\n")
-            except Exception as ee:
-                self.print_stderr(f'Warning: Issue writing bad json file - {bad_json_file} ({ee.__class__.__name__}):'
-                                  f' {ee}')
+            self.save_bad_json_resp(scan_files, request_id, scan_id, r.text)
             return None
 
+    def probe(self) -> bool:
+        """
+        Send a cheap (GET) request to check if the service is responding again, and update the circuit breaker
+        Any response other than a gateway/service unavailable error means the service is up
+        :return: True if the service responded, False otherwise
+        """
+        endpoint = self.endpoints.acquire()
+        healthy = False
+        try:
+            self.print_debug(f'Probing {endpoint.url}...')
+            r = self.session.get(endpoint.url, headers=self.headers, timeout=min(self.timeout, PROBE_TIMEOUT))
+            healthy = r.status_code not in (502, 503, 504)
+        except Exception as e:
+            self.print_debug(f'Probe of {endpoint.url} failed: {e}')
+        finally:
+            self.endpoints.release(endpoint, healthy)
+            self.breaker.record(healthy, probe=True)
+        return healthy
+
+    def retry_delay(self) -> float:
+        """
+        Get the time to wait before retrying a failed request
+        :return: 0 if there is another healthy endpoint to fail over to, RETRY_DELAY otherwise
+        """
+        if len(self.endpoints) > 1 and self.endpoints.has_healthy():
+            return 0
+        return RETRY_DELAY
+
+    def retry_wait(self) -> None:
+        """
+        Wait before retrying a failed request, unless there is another healthy endpoint to fail over to
+        """
+        delay = self.retry_delay()
+        if delay:
+            time.sleep(delay)
+
+    def wfp_block_keys(self, wfp: str, context: str = None, url: str = None) -> Dict[str, Tuple[str, str]]:
+        """
+        Split the WFP into its individual file blocks, keyed by a hash of the block plus the request context
+        (SBOM, scan type, flags, format & identification context, plus the URL if specified)
+        :param wfp: WFP to split
+        :param context: Context to help with identification (optional)
+        :param url: API URL to include in the key (optional)
+        :return: dictionary of file name -> (key, WFP block)
+        """
+        prefix = f'{url or ""}\n{self._request_context}\n{context or ""}\n'.encode('utf-8')
+        starts = [m.start() for m in WFP_FILE_RE.finditer(wfp)]
+        blocks = {}
+        for i, start in enumerate(starts):
+            block = wfp[start:starts[i + 1]] if i + 1 < len(starts) else wfp[start:]
+            header = block.split('\n', 1)[0].rstrip('\r')
+            parts = header[len('file='):].split(',', 2)
+            file = parts[2] if len(parts) > 2 else header
+            blocks[file] = (hashlib.sha256(prefix + block.encode('utf-8')).hexdigest(), block)
+        return blocks
+
+    def cache_lookup(self, wfp: str, context: str = None):
+        """
+        Split the WFP into its individual files and look each of them up in the result cache
+        Files are keyed by a hash of their WFP block plus the request context (URL, SBOM, scan type, flags & format)
+        Cached results are also recorded to the archive (if recording), as they will not be requested from the API
+        :param wfp: WFP to look up
+        :param context: Context to help with identification (optional)
+        :return: cached results (file -> results) and cache misses (file -> (key, WFP block)), or None, None if
+                 caching is disabled
+        """
+        if not self.cache or 'xml' in self.scan_format:
+            return None, None
+        blocks = self.wfp_block_keys(wfp, context, self.url)
+        found = self.cache.get_many(key for key, _ in blocks.values())
+        cached = {}
+        misses = {}
+        for file, (key, block) in blocks.items():
+            if key in found:
+                cached[file] = found[key]
+            else:
+                misses[file] = (key, block)
+        self.print_trace(f'Result cache: {len(cached)} hits, {len(misses)} misses')
+        if cached and self.archive and not self.archive.replay:
+            self.record_scan(wfp, context, cached)
+        return cached, misses
+
+    def cache_update(self, scan_resp, cached: dict = None, misses: dict = None):
+        """
+        Store the results of the scanned (missed) files in the result cache and add back in the cached results
+        :param scan_resp: JSON scan response
+        :param cached: cached results from cache_lookup
+        :param misses: cache misses from cache_lookup
+        :return: complete scan response
+        """
+        if misses is None or not isinstance(scan_resp, dict):
+            return scan_resp
+        self.cache.put_many((misses[file][0], value) for file, value in scan_resp.items() if file in misses)
+        if cached:
+            scan_resp.update(cached)
+        return scan_resp
+
+    def record_scan(self, wfp: str, context: str, scan_resp) -> None:
+        """
+        Record the per file results of a scan request to the archive
+        :param wfp: WFP scanned
+        :param context: Context to help with identification
+        :param scan_resp: JSON scan response
+        """
+        if not isinstance(scan_resp, dict):
+            return
+        blocks = self.wfp_block_keys(wfp, context)
+        self.archive.add_scans((blocks[file][0], file, value) for file, value in scan_resp.items() if file in blocks)
+
+    def replay_scan(self, wfp: str, context: str = None) -> dict:
+        """
+        Answer a scan request from the results recorded in the archive
+        :param wfp: WFP to scan
+        :param context: Context to help with identification
+        :return: JSON result object
+        """
+        if 'xml' in self.scan_format:
+            raise Exception(f'ERROR: Replaying {self.scan_format} scan results is not supported')
+        blocks = self.wfp_block_keys(wfp, context)
+        found = self.archive.get_scans(key for key, _ in blocks.values())
+        missing = [file for file, (key, _) in blocks.items() if key not in found]
+        if missing:
+            raise Exception(f'ERROR: No recorded scan results for {len(missing)} file(s) (e.g. {missing[0]}) in '
+                            f'{self.archive.archive_file}')
+        return {file: found[key] for file, (key, _) in blocks.items()}
+
+    def get_form_data(self, context: str = None) -> dict:
+        """
+        Assemble the form data fields to send alongside a WFP scan request
+        :param context: Context to help with identification (optional)
+        :return: form data dictionary
+        """
+        form_data = {}
+        if self.sbom:
+            form_data['type'] = self.scan_type
+            form_data['assets'] = self.sbom
+        if self.scan_format:
+            form_data['format'] = self.scan_format
+        if self.flags:
+            form_data['flags'] = self.flags
+        if context:
+            form_data['context'] = context
+        return form_data
+
+    def save_bad_json_resp(self, scan_files, request_id, scan_id, text: str):
+        """
+        Save the given WFP and invalid JSON response to a bad_json file
+        :param scan_files: WFP
+        :param request_id: request ID
+        :param scan_id: scan thread id (optional)
+        :param text: response text that failed to parse
+        """
+        bad_json_file = f'bad_json-{scan_id}-{request_id}.txt' if scan_id else f'bad_json-{request_id}.txt'
+        self.print_stderr(f'Ignoring result. Please look in "{bad_json_file}" for more details.')
+        try:
+            with open(bad_json_file, 'w') as f:
+                f.write(f"---Request ID Begin---\n{request_id}\n---Request ID End---\n")
+                f.write(f"---WFP Begin---\n{scan_files}\n---WFP End---\n---Bad JSON Begin---\n")
+                f.write(text)
+                f.write("---Bad JSON End---\n")
+        except Exception as ee:
+            self.print_stderr(f'Warning: Issue writing bad json file - {bad_json_file} ({ee.__class__.__name__}):'
+                              f' {ee}')
+
     def save_bad_req_wfp(self, scan_files, request_id, scan_id):
         """
         Save the given WFP to a bad_request file
@@ -22,22 +22,33 @@
    THE SOFTWARE.
 """
 
+import hashlib
 import os
+import threading
 import uuid
 
 import grpc
 import json
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Tuple
+
 from google.protobuf.json_format import MessageToDict, ParseDict
 from pypac.parser import PACFile
 from pypac.resolver import ProxyResolver
 from urllib.parse import urlparse
 
+from .api.components.v2.scanoss_components_pb2_grpc import ComponentsStub
 from .api.cryptography.v2.scanoss_cryptography_pb2_grpc import CryptographyStub
 from .api.dependencies.v2.scanoss_dependencies_pb2_grpc import DependenciesStub
+from .api.vulnerabilities.v2.scanoss_vulnerabilities_pb2_grpc import VulnerabilitiesStub
+from .api.components.v2.scanoss_components_pb2 import CompSearchResponse, CompVersionResponse
 from .api.cryptography.v2.scanoss_cryptography_pb2 import AlgorithmResponse
 from .api.dependencies.v2.scanoss_dependencies_pb2 import DependencyRequest, DependencyResponse
+from .api.vulnerabilities.v2.scanoss_vulnerabilities_pb2 import VulnerabilityResponse, CpeResponse
 from .api.common.v2.scanoss_common_pb2 import EchoRequest, EchoResponse, StatusResponse, StatusCode, PurlRequest
+from .resultcache import ResultCache
+from .scanarchive import ScanArchive, ArchiveStub
 from .scanossbase import ScanossBase
 from . import __version__
 
@@ -45,16 +56,42 @@ from . import __version__
 DEFAULT_URL = "https://scanoss.com"
 SCANOSS_GRPC_URL = os.environ.get("SCANOSS_GRPC_URL") if os.environ.get("SCANOSS_GRPC_URL") else DEFAULT_URL
 SCANOSS_API_KEY = os.environ.get("SCANOSS_API_KEY") if os.environ.get("SCANOSS_API_KEY") else ''
+GRPC_MAX_MESSAGE_SIZE = 128 * 1024 * 1024  # Allow large dependency/crypto requests & responses (128MB)
+GRPC_KEEPALIVE_TIME = 5 * 60 * 1000        # Ping an idle connection every 5 minutes (server minimum ping interval)
+GRPC_KEEPALIVE_TIMEOUT = 20 * 1000         # Close the connection if a ping is not answered within 20 seconds
+GRPC_CHANNEL_OPTIONS = [
+    ('grpc.max_send_message_length', GRPC_MAX_MESSAGE_SIZE),
+    ('grpc.max_receive_message_length', GRPC_MAX_MESSAGE_SIZE),
+    ('grpc.keepalive_time_ms', GRPC_KEEPALIVE_TIME),
+    ('grpc.keepalive_timeout_ms', GRPC_KEEPALIVE_TIMEOUT),
+    ('grpc.http2.max_pings_without_data', 0),
+]
+DEPENDENCY_FILE_ERRORS = ('error', 'fail')  # Dependency file statuses reporting a failed decoration
+GRPC_MAX_PURLS = 500   # Maximum number of purls sent in each dependency/crypto request
+GRPC_THREADS = 5       # Maximum number of dependency/crypto requests sent concurrently
+# Response types of each service's methods (used to record/replay the gRPC traffic)
+GRPC_SERVICE_RESPONSES = {
+    'Dependencies': {'Echo': EchoResponse, 'GetDependencies': DependencyResponse},
+    'Cryptography': {'Echo': EchoResponse, 'GetAlgorithms': AlgorithmResponse},
+    'Components': {'Echo': EchoResponse, 'SearchComponents': CompSearchResponse,
+                   'GetComponentVersions': CompVersionResponse},
+    'Vulnerabilities': {'Echo': EchoResponse, 'GetCpes': CpeResponse, 'GetVulnerabilities': VulnerabilityResponse},
+}
 
 
 class ScanossGrpc(ScanossBase):
     """
     Client for gRPC functionality
+    All services share a single (lazily created) channel to the endpoint, with keepalive, large message
+    and gzip compression options. Each service stub is created on first use.
+    Large dependency/crypto requests are split into chunks of purls, sent concurrently and merged back together.
     """
 
     def __init__(self, url: str = None, debug: bool = False, trace: bool = False, quiet: bool = False,
                  ca_cert: str = None, api_key: str = None, ver_details: str = None, timeout: int = 600,
-                 proxy: str = None, grpc_proxy: str = None, pac: PACFile = None):
+                 proxy: str = None, grpc_proxy: str = None, pac: PACFile = None, archive: ScanArchive = None,
+                 compression: bool = True, cache: ResultCache = None, max_purls: int = GRPC_MAX_PURLS,
+                 nb_threads: int = GRPC_THREADS):
         """
 
         :param url:
@@ -62,6 +99,12 @@ class ScanossGrpc(ScanossBase):
         :param trace:
         :param quiet:
         :param ca_cert:
+        :param timeout: Default timeout (in seconds) of each dependency/crypto request (default 600)
+        :param archive: Archive to record the gRPC responses to, or replay them from (default None)
+        :param compression: gzip compress the gRPC messages (default True)
+        :param cache: Local cache of decorated dependencies, to only request unseen purls (default None)
+        :param max_purls: Maximum number of purls to send in each dependency/crypto request (default 500)
+        :param nb_threads: Maximum number of dependency/crypto requests to send concurrently (default 5)
 
         To set a custom certificate use:
             GRPC_DEFAULT_SSL_ROOTS_FILE_PATH=/path/to/certs/cert.pem
@@ -92,22 +135,78 @@ class ScanossGrpc(ScanossBase):
             if port is None:
                 port = 443 if u.scheme == 'https' else 80  # Set the default port number if it's not available
             self.url = f'{u.hostname}:{port}'
-        cert_data = None
+        self.secure = secure
+        self.cert_data = None
         if ca_cert is not None:
-            secure = True
-            cert_data = ScanossGrpc._load_cert(ca_cert)
-        self.print_debug(f'Setting up (secure: {secure}) connection to {self.url}...')
+            self.secure = True
+            self.cert_data = ScanossGrpc._load_cert(ca_cert)
+        self.compression = compression
+        self.archive = archive
+        self.cache = cache
+        self.max_purls = max_purls if max_purls and max_purls > 0 else GRPC_MAX_PURLS
+        self.nb_threads = nb_threads if nb_threads and nb_threads > 0 else GRPC_THREADS
+        self._channel = None
+        self._stubs = {}
         self._get_proxy_config()
-        if secure is False:  # insecure connection
-            self.dependencies_stub = DependenciesStub(grpc.insecure_channel(self.url))
-            self.crypto_stub = CryptographyStub(grpc.insecure_channel(self.url))
-        else:
-            if ca_cert is not None:
-                credentials = grpc.ssl_channel_credentials(cert_data)  # secure with specified certificate
+
+    @property
+    def channel(self) -> grpc.Channel:
+        """
+        Get the channel to the gRPC endpoint (shared by all services), creating it on first use
+        """
+        if self._channel is None:
+            self.print_debug(f'Setting up (secure: {self.secure}) connection to {self.url}...')
+            compression = grpc.Compression.Gzip if self.compression else None
+            if self.secure is False:  # insecure connection
+                self._channel = grpc.insecure_channel(self.url, options=GRPC_CHANNEL_OPTIONS, compression=compression)
             else:
-                credentials = grpc.ssl_channel_credentials()  # secure connection with default certificate
-            self.dependencies_stub = DependenciesStub(grpc.secure_channel(self.url, credentials))
-            self.crypto_stub = CryptographyStub(grpc.secure_channel(self.url, credentials))
+                if self.cert_data is not None:
+                    credentials = grpc.ssl_channel_credentials(self.cert_data)  # secure with specified certificate
+                else:
+                    credentials = grpc.ssl_channel_credentials()  # secure connection with default certificate
+                self._channel = grpc.secure_channel(self.url, credentials, options=GRPC_CHANNEL_OPTIONS,
+                                                    compression=compression)
+        return self._channel
+
+    def __stub(self, service: str, stub_class):
+        """
+        Get the stub for the given service, creating it on the shared channel on first use
+        :param service: service name
+        :param stub_class: generated stub class for the service
+        :return: service stub (wrapped to record/replay its traffic if requested)
+        """
+        stub = self._stubs.get(service)
+        if stub is None:
+            stub = stub_class(self.channel)
+            if self.archive:  # Record/replay the gRPC traffic
+                stub = ArchiveStub(self.archive, service, stub, GRPC_SERVICE_RESPONSES[service])
+            self._stubs[service] = stub
+        return stub
+
+    @property
+    def dependencies_stub(self) -> DependenciesStub:
+        return self.__stub('Dependencies', DependenciesStub)
+
+    @property
+    def crypto_stub(self) -> CryptographyStub:
+        return self.__stub('Cryptography', CryptographyStub)
+
+    @property
+    def components_stub(self) -> ComponentsStub:
+        return self.__stub('Components', ComponentsStub)
+
+    @property
+    def vulnerabilities_stub(self) -> VulnerabilitiesStub:
+        return self.__stub('Vulnerabilities', VulnerabilitiesStub)
+
+    def close(self) -> None:
+        """
+        Close the gRPC channel (if open)
+        """
+        if self._channel is not None:
+            self._channel.close()
+            self._channel = None
+            self._stubs = {}
 
     @classmethod
     def _load_cert(cls, cert_file: str) -> bytes:
@@ -169,38 +268,132 @@ class ScanossGrpc(ScanossBase):
             self.print_stderr(f'ERROR: Problem sending Echo request ({message}) to {self.url}. rqId: {request_id}')
         return None
 
-    def get_dependencies(self, dependencies: json, depth: int = 1) -> dict:
+    def get_dependencies(self, dependencies: json, depth: int = 1, timeout: int = None) -> dict:
         if not dependencies:
             self.print_stderr('ERROR: No dependency data supplied to submit to the API.')
             return None
-        resp = self.get_dependencies_json(dependencies, depth)
+        resp = self.get_dependencies_json(dependencies, depth, timeout)
         if not resp:
             self.print_stderr(f'ERROR: No response for dependency request: {dependencies}')
         return resp
 
-    def get_dependencies_json(self, dependencies: dict, depth: int = 1) -> dict:
+    def get_dependencies_json(self, dependencies: dict, depth: int = 1, timeout: int = None) -> dict:
         """
         Client function to call the rpc for GetDependencies
         :param dependencies: Message to send to the service
         :param depth: depth of sub-dependencies to search (default: 1)
+        :param timeout: timeout (in seconds) of each request (default: None - use the client timeout)
         :return: Server response or None
         """
         if not dependencies:
             self.print_stderr(f'ERROR: No message supplied to send to gRPC service.')
             return None
+        files_json = dependencies.get("files")
+        if files_json is None or len(files_json) == 0:
+            self.print_stderr(f'ERROR: No dependency data supplied to send to gRPC service.')
+            return None
+        if self.cache and not self.archive:  # Recorded/replayed traffic must contain the complete requests
+            return self.__get_dependencies_cached(dependencies, depth, timeout)
+        return self.__send_dependencies(dependencies, depth, timeout)
+
+    def __send_chunked(self, send: Callable[[dict], dict], requests: List[dict]) -> List[dict]:
+        """
+        Send the given requests concurrently (up to nb_threads at a time)
+        :param send: function to send a single request
+        :param requests: requests to send
+        :return: list of responses (in request order) or None if any request failed
+        As soon as one request fails, no more are sent and None is returned without waiting for those in flight
+        """
+        if len(requests) == 1:
+            resp = send(requests[0])
+            return [resp] if resp is not None else None
+        self.print_debug(f'Sending {len(requests)} requests ({min(self.nb_threads, len(requests))} concurrently)...')
+        abort = threading.Event()
+
+        def send_request(request: dict) -> dict:
+            return None if abort.is_set() else send(request)
+        executor = ThreadPoolExecutor(max_workers=min(self.nb_threads, len(requests)))
+        try:
+            futures = [executor.submit(send_request, request) for request in requests]
+            for future in as_completed(futures):
+                if future.result() is None:
+                    abort.set()  # No point sending the rest, the response would be incomplete
+                    for pending in futures:
+                        pending.cancel()
+                    return None
+            return [future.result() for future in futures]
+        finally:
+            executor.shutdown(wait=False)
+
+    def __chunk_dependencies(self, dependencies: dict) -> List[dict]:
+        """
+        Split the dependency request into requests of at most max_purls purls
+        Files with more than max_purls purls are split across requests
+        :param dependencies: dependency request
+        :return: list of dependency requests
+        """
+        chunks = [[]]
+        count = 0
+        for file in dependencies.get('files'):
+            purls = file.get('purls') or []
+            for start in range(0, len(purls) or 1, self.max_purls):
+                part = purls[start:start + self.max_purls]
+                if count and count + len(part) > self.max_purls:
+                    chunks.append([])
+                    count = 0
+                chunks[-1].append({**file, 'purls': part})
+                count += len(part)
+        return [{'files': files} for files in chunks]
+
+    @staticmethod
+    def __merge_dependencies(responses: List[dict]) -> dict:
+        """
+        Merge the chunked dependency responses back into a single response
+        :param responses: dependency responses
+        :return: merged dependency response
+        """
+        files = {}
+        for resp in responses:
+            for file in resp.get('files') or []:
+                merged = files.get(file.get('file'))
+                if merged is None:
+                    files[file.get('file')] = dict(file)
+                elif file.get('dependencies'):
+                    merged['dependencies'] = merged.get('dependencies', []) + file['dependencies']
+        return {'files': list(files.values()), 'status': responses[0].get('status')}
+
+    def __send_dependencies(self, dependencies: dict, depth: int, timeout: int = None) -> dict:
+        """
+        Send the given dependencies to the GetDependencies rpc for decoration (in chunks of max_purls)
+        :param dependencies: Message to send to the service
+        :param depth: depth of sub-dependencies to search
+        :param timeout: timeout (in seconds) of each request (default: None - use the client timeout)
+        :return: Server response or None
+        """
+        responses = self.__send_chunked(lambda request: self.__send_dependency_request(request, depth, timeout),
+                                        self.__chunk_dependencies(dependencies))
+        if responses is None:
+            return None
+        return responses[0] if len(responses) == 1 else self.__merge_dependencies(responses)
+
+    def __send_dependency_request(self, dependencies: dict, depth: int, timeout: int = None) -> dict:
+        """
+        Send a single request to the GetDependencies rpc
+        :param dependencies: Message to send to the service
+        :param depth: depth of sub-dependencies to search
+        :param timeout: timeout (in seconds) of the request (default: None - use the client timeout)
+        :return: Server response or None
+        """
         request_id = str(uuid.uuid4())
         resp: DependencyResponse
         try:
-            files_json = dependencies.get("files")
-            if files_json is None or len(files_json) == 0:
-                self.print_stderr(f'ERROR: No dependency data supplied to send to gRPC service.')
-                return None
             request = ParseDict(dependencies, DependencyRequest())  # Parse the JSON/Dict into the dependency object
             request.depth = depth
             metadata = self.metadata[:]
             metadata.append(('x-request-id', request_id))  # Set a Request ID
             self.print_debug(f'Sending dependency data for decoration (rqId: {request_id})...')
-            resp = self.dependencies_stub.GetDependencies(request, metadata=metadata, timeout=self.timeout)
+            resp = self.dependencies_stub.GetDependencies(request, metadata=metadata,
+                                                          timeout=timeout if timeout else self.timeout)
         except Exception as e:
             self.print_stderr(f'ERROR: {e.__class__.__name__} Problem encountered sending gRPC message '
                               f'(rqId: {request_id}): {e}')
@@ -211,15 +404,151 @@ class ScanossGrpc(ScanossBase):
                 return MessageToDict(resp, preserving_proto_field_name=True)  # Convert gRPC response to a dictionary
         return None
 
-    def get_crypto_json(self, purls: dict) -> dict:
+    def __dependency_key(self, purl: str, requirement: str, depth: int) -> str:
+        """
+        Get the cache key for the decoration of the given dependency
+        :param purl: dependency purl
+        :param requirement: version requirement (or '')
+        :param depth: depth of sub-dependencies requested
+        :return: cache key
+        """
+        return hashlib.sha256(f'dependencies\n{self.url}\n{depth}\n{purl}\n{requirement}'.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def __dependency_failed(status: str) -> bool:
+        """
+        Check if the status of a decorated dependency file reports a failure
+        :param status: file status
+        :return: True if it failed, False otherwise
+        """
+        status = status.lower() if status else ''
+        return any(error in status for error in DEPENDENCY_FILE_ERRORS)
+
+    def __get_dependencies_cached(self, dependencies: dict, depth: int, timeout: int = None) -> dict:
+        """
+        Decorate the given dependencies, only requesting those (purl, requirement) pairs not in the local cache
+        The uncached purls are requested under their original file entries, then each file's response is split back
+        into decorations per (purl, requirement) and reassembled with the cached ones
+        :param dependencies: dependencies to decorate
+        :param depth: depth of sub-dependencies to search
+        :param timeout: timeout (in seconds) of each request (default: None - use the client timeout)
+        :return: Server response (reassembled per file) or None
+        """
+        files = dependencies.get('files')
+        keys = {}  # (purl, requirement) -> cache key
+        for file in files:
+            for purl in file.get('purls') or []:
+                dep = ScanossGrpc.__dependency(purl)
+                if dep not in keys:
+                    keys[dep] = self.__dependency_key(dep[0], dep[1], depth)
+        found = self.cache.get_many(keys.values())
+        misses = set(dep for dep, key in keys.items() if key not in found)
+        self.print_debug(f'Dependency cache: {len(keys) - len(misses)} hits, {len(misses)} misses')
+        status = {'status': 'SUCCESS', 'message': 'Success'}
+        decorated = {}  # file -> (response file, decorations by (purl, requirement), unattributed dependencies)
+        if misses:
+            request_files = []
+            for file in files:
+                purls = [purl for purl in file.get('purls') or [] if ScanossGrpc.__dependency(purl) in misses]
+                if purls:
+                    request_files.append({**file, 'purls': purls})
+            resp = self.__send_dependencies({'files': request_files}, depth, timeout)
+            if not resp:
+                return None
+            status = resp.get('status', status)
+            cacheable = status.get('status') == 'SUCCESS'  # Don't cache (partial) results with warnings
+            resp_files = {f.get('file'): f for f in resp.get('files') or []}
+            entries = {}
+            for file in request_files:
+                resp_file = resp_files.get(file.get('file'))
+                if not resp_file:
+                    continue
+                values, unattributed = ScanossGrpc.__split_dependencies(file.get('purls'), resp_file)
+                decorated[file.get('file')] = (resp_file, values, unattributed)
+                # Only cache complete decorations that can be attributed to their purl, so the rest are requested again
+                if cacheable and not unattributed and not ScanossGrpc.__dependency_failed(resp_file.get('status')):
+                    for dep, value in values.items():
+                        entries.setdefault(keys[dep], value)
+            if len(entries) < len(misses):
+                self.print_debug(f'Not caching {len(misses) - len(entries)} incomplete dependency decorations')
+            self.cache.put_many(entries.items())
+        resp_files = []
+        for file in files:
+            resp_file, values, unattributed = decorated.get(file.get('file'), (None, {}, []))
+            empty = {'id': 'dependency', 'status': '', 'dependencies': []}
+            values = [values.get(dep) or found.get(keys[dep]) or empty
+                      for dep in (ScanossGrpc.__dependency(purl) for purl in file.get('purls') or [])]
+            source = resp_file if resp_file else (values[0] if values else {})
+            new_file = {'file': file.get('file'), 'id': source.get('id') or 'dependency'}
+            if source.get('status'):
+                new_file['status'] = source['status']
+            deps = [d for value in values for d in value['dependencies']] + unattributed
+            if deps:
+                new_file['dependencies'] = deps
+            resp_files.append(new_file)
+        return {'files': resp_files, 'status': status}
+
+    @staticmethod
+    def __dependency(purl: dict) -> Tuple[str, str]:
+        """
+        Get the (purl, requirement) pair of the given dependency request purl
+        :param purl: dependency request purl
+        :return: (purl, requirement) tuple
+        """
+        return purl.get('purl', ''), purl.get('requirement', '')
+
+    @staticmethod
+    def __split_dependencies(purls: List[dict], resp_file: dict) -> Tuple[dict, list]:
+        """
+        Split the decorated dependencies of a response file back into the requested (purl, requirement) pairs
+        :param purls: purls requested for the file
+        :param resp_file: response file
+        :return: decorations by (purl, requirement), and the dependencies that could not be attributed to a purl
+        """
+        values = {}
+        by_purl = {}
+        for purl in purls:
+            dep = ScanossGrpc.__dependency(purl)
+            values[dep] = {'id': resp_file.get('id', 'dependency'), 'status': resp_file.get('status', ''),
+                           'dependencies': []}
+            # The same purl requested with different requirements can't be told apart in the response
+            by_purl[dep[0]] = dep if by_purl.get(dep[0], dep) == dep else None
+        unattributed = []
+        for dependency in resp_file.get('dependencies') or []:
+            dep = by_purl.get(dependency.get('purl'))
+            if dep:
+                values[dep]['dependencies'].append(dependency)
+            else:
+                unattributed.append(dependency)  # i.e. sub-dependencies
+        return values, unattributed
+
+    def get_crypto_json(self, purls: dict, timeout: int = None) -> dict:
         """
         Client function to call the rpc for Cryptography GetAlgorithms
         :param purls: Message to send to the service
+        :param timeout: timeout (in seconds) of each request (default: None - use the client timeout)
         :return: Server response or None
         """
         if not purls:
             self.print_stderr(f'ERROR: No message supplied to send to gRPC service.')
             return None
+        items = purls.get('purls') or []
+        requests = [{**purls, 'purls': items[start:start + self.max_purls]}
+                    for start in range(0, len(items) or 1, self.max_purls)]
+        responses = self.__send_chunked(lambda request: self.__send_crypto_request(request, timeout), requests)
+        if responses is None:
+            return None
+        if len(responses) == 1:
+            return responses[0]
+        return {'purls': [purl for resp in responses for purl in resp.get('purls') or []]}
+
+    def __send_crypto_request(self, purls: dict, timeout: int = None) -> dict:
+        """
+        Send a single request to the Cryptography GetAlgorithms rpc
+        :param purls: Message to send to the service
+        :param timeout: timeout (in seconds) of the request (default: None - use the client timeout)
+        :return: Server response or None
+        """
         request_id = str(uuid.uuid4())
         resp: AlgorithmResponse
         try:
@@ -227,7 +556,8 @@ class ScanossGrpc(ScanossBase):
             metadata = self.metadata[:]
             metadata.append(('x-request-id', request_id))  # Set a Request ID
             self.print_debug(f'Sending crypto data for decoration (rqId: {request_id})...')
-            resp = self.crypto_stub.GetAlgorithms(request, metadata=metadata, timeout=self.timeout)
+            resp = self.crypto_stub.GetAlgorithms(request, metadata=metadata,
+                                                  timeout=timeout if timeout else self.timeout)
         except Exception as e:
             self.print_stderr(f'ERROR: {e.__class__.__name__} Problem encountered sending gRPC message '
                               f'(rqId: {request_id}): {e}')
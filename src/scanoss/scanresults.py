@@ -0,0 +1,137 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import json
+import threading
+from typing import Iterable, Iterator, List, Tuple, TextIO
+
+from .scanossbase import ScanossBase
+
+
+class ScanResults(ScanossBase):
+    """
+    In-memory model of scan results (file name -> list of results)
+    Scan responses are merged directly into the model as they arrive (reverting obfuscated file names),
+    so that every output format can be produced without serialising and re-parsing the results.
+    """
+
+    def __init__(self, debug: bool = False, trace: bool = False, quiet: bool = False):
+        """
+        Initialise the ScanResults class
+        :param debug: enable debug (default False)
+        :param trace: enable trace (default False)
+        :param quiet: enable quiet mode (default False)
+        """
+        super().__init__(debug, trace, quiet)
+        self._results = {}
+        self._order = None  # file name -> output position (if requested)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._results
+
+    def add(self, scan_resp: dict, file_map: dict = None) -> None:
+        """
+        Merge the results of a scan response into the model
+        Later results for the same file replace earlier ones
+        :param scan_resp: scan response dictionary (file name -> results)
+        :param file_map: mapping of obfuscated files back into originals (optional)
+        """
+        if not scan_resp:
+            return
+        with self._lock:
+            for key, value in scan_resp.items():
+                if file_map:  # We have a map for obfuscated files. Check if we can revert it
+                    key = file_map.get(key, key)
+                self._results[key] = value
+
+    def add_order(self, keys: Iterable[str]) -> None:
+        """
+        Record the order to output the given file names in, instead of sorted by file name
+        Recorded files are output in the order they were first recorded, followed by any others (sorted)
+        :param keys: file names in output order
+        """
+        with self._lock:
+            if self._order is None:
+                self._order = {}
+            for key in keys:
+                self._order.setdefault(key, len(self._order))
+
+    def _sorted_keys(self, keys: Iterable[str]) -> List[str]:
+        """
+        Sort the given file names into output order (caller must hold the lock)
+        :param keys: file names to sort
+        :return: sorted list of file names
+        """
+        if self._order is None:
+            return sorted(keys)
+        order = self._order
+        last = len(order)
+        return sorted(keys, key=lambda k: (order.get(k, last), k))
+
+    def items(self) -> Iterator[Tuple[str, list]]:
+        """
+        Iterate over all results (sorted by file name, unless an output order was recorded)
+        :return: iterator of (file name, results) tuples
+        """
+        with self._lock:
+            keys = self._sorted_keys(self._results)
+        for key in keys:
+            yield key, self._results[key]
+
+    def get_results(self) -> dict:
+        """
+        Get all results as a single (sorted) dictionary
+        :return: results dictionary
+        """
+        return dict(self.items())
+
+    def write_json(self, file: TextIO) -> None:
+        """
+        Write all results as a single JSON object (sorted & indented) to the given file
+        The output is identical to json.dumps(results, indent=2, sort_keys=True), written one file at a time
+        (files are written in the recorded output order instead, if any)
+        :param file: text file to write to
+        """
+        first = True
+        for key, value in self.items():
+            file.write('{\n  ' if first else ',\n  ')
+            file.write(f'{json.dumps(key)}: ')
+            file.write(json.dumps(value, indent=2, sort_keys=True).replace('\n', '\n  '))
+            first = False
+        file.write('{}' if first else '\n}')
+
+    def close(self) -> None:
+        """
+        Release all results
+        """
+        with self._lock:
+            self._results = {}
+            self._order = None
+
+#
+# End of ScanResults Class
+#
@@ -28,8 +28,8 @@ import hashlib
 import datetime
 import getpass
 import re
-import pkg_resources
 
+from .datafiles import read_data_file
 from . import __version__
 
 
@@ -298,9 +298,7 @@ class SpdxLite:
         :return: True if successful, False otherwise
         """
         try:
-            f_name = pkg_resources.resource_filename(__name__, filename)
-            with open(f_name, 'r') as f:
-                data = json.loads(f.read())
+            data = json.loads(read_data_file(filename))
         except Exception as e:
             self.print_stderr(f'ERROR: Problem parsing SPDX license input JSON: {e}')
             return False
@@ -24,7 +24,7 @@
 
 import threading
 import queue
-from typing import Dict
+from typing import Dict, List
 from dataclasses import dataclass
 
 from .scancodedeps import ScancodeDeps
@@ -37,8 +37,8 @@ class ThreadedDependencies(ScanossBase):
     """
 
     """
-    inputs: queue.Queue = queue.Queue()
-    output: queue.Queue = queue.Queue()
+    inputs: queue.Queue = None
+    output: queue.Queue = None
 
     def __init__(self, sc_deps: ScancodeDeps, grpc_api: ScanossGrpc, what_to_scan: str = None, debug: bool = False,
                  trace: bool = False, quiet: bool = False) -> None:
@@ -49,6 +49,8 @@ class ThreadedDependencies(ScanossBase):
         self.sc_deps = sc_deps
         self.grpc_api = grpc_api
         self.what_to_scan = what_to_scan
+        self.inputs = queue.Queue()  # Queues are per instance (not shared between dependency scanners)
+        self.output = queue.Queue()
         self._thread = None
         self._errors = False
 
@@ -64,18 +66,19 @@ class ThreadedDependencies(ScanossBase):
                 return resp
         return None
 
-    def run(self, what_to_scan: str = None, wait: bool = True) -> bool:
+    def run(self, what_to_scan: str = None, wait: bool = True, manifests: List[str] = None) -> bool:
         """
         Initiate a background scan for the specified file/dir
         :param what_to_scan: file/folder to scan
         :param wait: wait for completion
+        :param manifests: dependency manifests already found in the folder (optional - default search the folder)
         :return: True if successful, False if error encountered
         """
         what_to_scan = what_to_scan if what_to_scan else self.what_to_scan
         self._errors = False
         try:
             self.print_msg(f'Searching {what_to_scan} for dependencies...')
-            self.inputs.put(what_to_scan)   # Set up an input queue to enable the parent to wait for completion
+            self.inputs.put((what_to_scan, manifests))   # Set up an input queue to enable the parent to wait for completion
             self._thread = threading.Thread(target=self.scan_dependencies, daemon=True)
             self._thread.start()
         except Exception as e:
@@ -92,27 +95,26 @@ class ThreadedDependencies(ScanossBase):
         current_thread = threading.get_ident()
         self.print_trace(f'Starting dependency worker {current_thread}...')
         try:
-            what_to_scan = self.inputs.get(timeout=5)                # Begin processing the dependency request
-            if not self.sc_deps.run_scan(what_to_scan=what_to_scan):
+            what_to_scan, manifests = self.inputs.get(timeout=5)     # Begin processing the dependency request
+            if manifests is not None:  # Manifests already found by the (native) scanner
+                deps = self.sc_deps.produce_from_scan(what_to_scan, manifests=manifests)
+            else:
+                deps = self.sc_deps.produce_from_scan(what_to_scan)
+            if deps is None:
+                self.print_stderr(f'Problem searching for dependencies for: {what_to_scan}')
                 self._errors = True
+            elif not deps or not deps.get('files'):
+                self.print_trace(f'No dependencies found to decorate for: {what_to_scan}')
             else:
-                deps = self.sc_deps.produce_from_file()
-                if deps is None:
-                    self.print_stderr(f'Problem searching for dependencies for: {what_to_scan}')
+                decorated_deps = self.grpc_api.get_dependencies(deps)
+                if decorated_deps:
+                    self.output.put(decorated_deps)
+                else:
                     self._errors = True
-                elif not deps:
-                    self.print_trace(f'No dependencies found to decorate for: {what_to_scan}')
-                else:                         # TODO add API call to get dep data
-                    decorated_deps = self.grpc_api.get_dependencies(deps)
-                    if decorated_deps:
-                        self.output.put(decorated_deps)
-                    else:
-                        self._errors = True
         except Exception as e:
             self.print_stderr(f'ERROR: Problem encountered running dependency scan: {e}')
             self._errors = True
         finally:
-            self.sc_deps.remove_interim_file()
             self.inputs.task_done()
         self.print_trace(f'Dependency thread complete ({current_thread}).')
 
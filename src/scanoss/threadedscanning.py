@@ -25,32 +25,38 @@ import os
 import sys
 import threading
 import queue
-import time
 
 from typing import Dict, List
 from dataclasses import dataclass
 from progress.bar import Bar
 
+from .resultspool import ResultSpool
+from .scancheckpoint import ScanCheckpoint
 from .scanossapi import ScanossApi
 from .scanossbase import ScanossBase
 
 WFP_FILE_START = "file="
 MAX_ALLOWED_THREADS = int(os.environ.get("SCANOSS_MAX_ALLOWED_THREADS")) if os.environ.get("SCANOSS_MAX_ALLOWED_THREADS") else 30
+MAX_QUEUE_REQUESTS = 1000             # Maximum number of WFP requests waiting to be posted
+MAX_QUEUE_BYTES = 64 * 1024 * 1024    # Maximum size of WFP requests waiting to be posted (64MB)
 
 
 @dataclass
 class ThreadedScanning(ScanossBase):
     """
     Threaded class for running Scanning in parallel (from a queue)
-    WFP scan requests are loaded into the input queue.
-    Multiple threads pull messages off this queue, process the request and put the results into an output queue
+    WFP scan requests are loaded into the (bounded) input queue.
+    Multiple threads pull messages off this queue, process the request and spool the results to disk
+    Producers block adding requests while the input queue is full (by request count or size)
     """
-    inputs: queue.Queue = queue.Queue()
-    output: queue.Queue = queue.Queue()
+    inputs: queue.Queue = None
+    results: ResultSpool = None
+    checkpoint: ScanCheckpoint = None
     bar: Bar = None
 
     def __init__(self, scanapi: ScanossApi, debug: bool = False, trace: bool = False, quiet: bool = False,
-                 nb_threads: int = 5
+                 nb_threads: int = 5, max_queue_requests: int = MAX_QUEUE_REQUESTS,
+                 max_queue_bytes: int = MAX_QUEUE_BYTES, checkpoint: ScanCheckpoint = None
                  ) -> None:
         """
         Initialise the ThreadedScanning class
@@ -59,15 +65,26 @@ class ThreadedScanning(ScanossBase):
         :param trace: enable trace (default False)
         :param quiet: enable quiet mode (default False)
         :param nb_threads: Number of thread to run (default 5)
+        :param max_queue_requests: Maximum number of requests waiting in the input queue (default 1000)
+        :param max_queue_bytes: Maximum size of the requests waiting in the input queue (default 64MB)
+        :param checkpoint: Checkpoint to record completed requests in/resume from (default None)
         """
         super().__init__(debug, trace, quiet)
         self.scanapi = scanapi
         self.nb_threads = nb_threads
+        self.max_queue_requests = max_queue_requests if max_queue_requests and max_queue_requests > 0 \
+            else MAX_QUEUE_REQUESTS
+        self.max_queue_bytes = max_queue_bytes if max_queue_bytes and max_queue_bytes > 0 else MAX_QUEUE_BYTES
+        self.inputs = queue.Queue(maxsize=self.max_queue_requests)
+        self.checkpoint = checkpoint
+        self.results = checkpoint.results if checkpoint else ResultSpool(debug, trace, quiet)
+        self.file_map = None  # Mapping of obfuscated files back into originals
+        self._queue_bytes = 0  # Size of the requests currently waiting in the input queue
+        self._queue_cond = threading.Condition()
         self._isatty = sys.stderr.isatty()
         self._bar_count = 0
         self._errors = False
         self._lock = threading.Lock()
-        self._stop_event = threading.Event()  # Control when scanning threads should terminate
         self._stop_scanning = threading.Event()  # Control if the parent process should abort scanning
         self._threads = []
         if nb_threads > MAX_ALLOWED_THREADS:
@@ -75,7 +92,7 @@ class ThreadedScanning(ScanossBase):
             self.nb_threads = MAX_ALLOWED_THREADS
 
     @staticmethod
-    def __count_files_in_wfp(wfp: str):
+    def _count_files_in_wfp(wfp: str):
         """
         Count the number of files in the WFP that need to be processed
         :param wfp: WFP string
@@ -127,12 +144,70 @@ class ThreadedScanning(ScanossBase):
     def queue_add(self, wfp: str) -> None:
         """
         Add requests to the queue
+        Blocks while the queue is full, starting the worker threads first if they are not yet running
         :param wfp: WFP to add to queue
         """
         if wfp is None or wfp == '':
             self.print_stderr(f'Warning: empty WFP. Skipping from scan...')
+            return
+        wfp = self._pending_wfp(wfp)
+        if not wfp:
+            return
+        size = len(wfp)
+        with self._queue_cond:
+            if self.__queue_full(size) and not self._threads:
+                self.print_debug('Input queue full. Starting scanning threads...')
+                self._start_workers()
+            while self.__queue_full(size):
+                self._queue_cond.wait()
+            self._queue_bytes += size
+        self.inputs.put(wfp)
+
+    def __queue_full(self, size: int) -> bool:
+        """
+        Check if adding a request of the given size would exceed the input queue limits
+        :param size: size of the request to add
+        :return: True if full, False otherwise
+        """
+        if self.inputs.full():
+            return True
+        return self._queue_bytes > 0 and self._queue_bytes + size > self.max_queue_bytes
+
+    def queue_get(self) -> str:
+        """
+        Take the next request off the queue (blocking), releasing its space for producers
+        :return: WFP request or None (stop sentinel)
+        """
+        wfp = self.inputs.get()
+        if wfp:
+            with self._queue_cond:
+                self._queue_bytes -= len(wfp)
+                self._queue_cond.notify_all()
+        return wfp
+
+    def _pending_wfp(self, wfp: str) -> str:
+        """
+        Remove any files already completed in the checkpoint (if any) from the WFP request
+        :param wfp: WFP request
+        :return: WFP request still to be scanned (empty if none)
+        """
+        if not self.checkpoint:
+            return wfp
+        pending = self.checkpoint.pending(wfp, self.file_map)
+        if pending != wfp:
+            self.update_bar(self._count_files_in_wfp(wfp) - self._count_files_in_wfp(pending))
+        return pending
+
+    def _spool_results(self, resp: dict, wfp: str) -> None:
+        """
+        Spool the scan response for later collection (recording its files as complete in the checkpoint)
+        :param resp: scan response dictionary
+        :param wfp: WFP request the response was for
+        """
+        if self.checkpoint:
+            self.checkpoint.add(resp, wfp, self.file_map)
         else:
-            self.inputs.put(wfp)
+            self.results.add(resp, self.file_map)
 
     def get_queue_size(self) -> int:
         return self.inputs.qsize()
@@ -146,16 +221,21 @@ class ThreadedScanning(ScanossBase):
     @property
     def responses(self) -> List[Dict]:
         """
-        Get all responses back from the completed threads
+        Get all responses back from the completed threads (merged into a single JSON object)
         :return: List of JSON objects
         """
-        return list(self.output.queue)
+        return [self.results.get_results()] if len(self.results) else []
 
     def run(self, wait: bool = True) -> bool:
         """
         Initiate the threads and process all pending requests
         :return: True if successful, False if error encountered
         """
+        if self._threads:
+            self.print_trace('Scanning threads already running.')
+            if wait:
+                self.complete()
+            return False if self._errors else True
         qsize = self.inputs.qsize()
         if qsize < self.nb_threads:
             self.print_debug(f'Input queue ({qsize}) smaller than requested threads: {self.nb_threads}. '
@@ -163,6 +243,15 @@ class ThreadedScanning(ScanossBase):
             self.nb_threads = qsize
         else:
             self.print_debug(f'Starting {self.nb_threads} threads to process {qsize} requests...')
+        self._start_workers()
+        if wait:                    # Wait for all inputs to complete
+            self.complete()
+        return False if self._errors else True
+
+    def _start_workers(self) -> None:
+        """
+        Start the worker threads to process the input queue
+        """
         try:
             for i in range(0, self.nb_threads):
                 t = threading.Thread(target=self.worker_post, daemon=True)
@@ -171,16 +260,14 @@ class ThreadedScanning(ScanossBase):
         except Exception as e:
             self.print_stderr(f'ERROR: Problem running threaded scanning: {e}')
             self._errors = True
-        if wait:                    # Wait for all inputs to complete
-            self.complete()
-        return False if self._errors else True
 
     def complete(self) -> bool:
         """
         Wait for input queue to complete processing and complete the worker threads
         """
         self.inputs.join()
-        self._stop_event.set()       # Tell the worker threads to stop
+        for _ in self._threads:      # Tell the worker threads to stop (one sentinel each)
+            self.inputs.put(None)
         try:
             for t in self._threads:  # Complete the threads
                 t.join(timeout=5)
@@ -192,40 +279,33 @@ class ThreadedScanning(ScanossBase):
     def worker_post(self) -> None:
         """
         Take each request and process it
+        Blocks waiting for work until a None sentinel is received
         :return: None
         """
         current_thread = threading.get_ident()
         self.print_trace(f'Starting worker {current_thread}...')
-        api_error = False
-        while not self._stop_event.is_set():
-            wfp = None
-            if not self.inputs.empty():          # Only try to get a message if there is one on the queue
-                try:
-                    wfp = self.inputs.get(timeout=5)
-                    if api_error:  # API error encountered, so stop processing anymore requests
-                        self.inputs.task_done()  # remove request from the queue
-                    else:
-                        self.print_trace(f'Processing input request ({current_thread})...')
-                        count = self.__count_files_in_wfp(wfp)
-                        if wfp is None or wfp == '':
-                            self.print_stderr(f'Warning: Empty WFP in request input: {wfp}')
-                        resp = self.scanapi.scan(wfp, scan_id=current_thread)
-                        if resp:
-                            self.output.put(resp)  # Store the output response to later collection
-                        self.update_bar(count)
-                        self.inputs.task_done()
-                        self.print_trace(f'Request complete ({current_thread}).')
-                except queue.Empty:
-                    self.print_stderr(f'No message available to process ({current_thread}). Checking again...')
-                except Exception as e:
-                    self.print_stderr(f'ERROR: Problem encountered running scan: {e}. Aborting current thread.')
-                    self._errors = True
-                    if wfp:
-                        self.inputs.task_done()  # If there was a WFP being processed, remove it from the queue
-                    api_error = True  # Stop processing anymore work requests
-                    self._stop_scanning.set()  # Tell the parent process to abort scanning
-            else:
-                time.sleep(1)  # Sleep while waiting for the queue depth to build up
+        while True:
+            wfp = self.queue_get()  # Block until there is a request (or sentinel) to process
+            if wfp is None:          # Sentinel received, stop processing
+                self.inputs.task_done()
+                break
+            try:
+                if not self._stop_scanning.is_set():  # API error encountered, so stop processing anymore requests
+                    self.print_trace(f'Processing input request ({current_thread})...')
+                    count = self._count_files_in_wfp(wfp)
+                    if wfp == '':
+                        self.print_stderr(f'Warning: Empty WFP in request input: {wfp}')
+                    resp = self.scanapi.scan(wfp, scan_id=current_thread)
+                    if resp:
+                        self._spool_results(resp, wfp)  # Spool the output response for later collection
+                    self.update_bar(count)
+                    self.print_trace(f'Request complete ({current_thread}).')
+            except Exception as e:
+                self.print_stderr(f'ERROR: Problem encountered running scan: {e}. Aborting current thread.')
+                self._errors = True
+                self._stop_scanning.set()  # Tell all workers (and the parent process) to stop scanning
+            finally:
+                self.inputs.task_done()  # Remove request from the queue
         self.print_trace(f'Thread complete ({current_thread}).')
 
 #
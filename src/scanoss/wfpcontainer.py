@@ -0,0 +1,300 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import re
+import sys
+from typing import Iterable, Iterator
+
+from .scanossbase import ScanossBase
+
+WFP_CONTAINER_MAGIC = b'SCWFP'
+WFP_CONTAINER_VERSION = 1
+WFP_CONTAINER_HEADER_SIZE = len(WFP_CONTAINER_MAGIC) + 2  # magic, version, flags
+FLAG_ZSTD = 0x01           # Records are compressed in a single zstd frame
+REC_FILE = 0x01            # file= line: raw md5 (16 bytes), size (varint), path (varint length + bytes)
+REC_SNIPPET = 0x02         # snippet line: line number delta (varint), CRC count (varint), raw CRCs (4 bytes each)
+REC_RAW = 0x03             # any other line: length (varint) + bytes (including line terminator)
+READ_CHUNK_SIZE = 1024 * 1024
+
+FILE_LINE_RE = re.compile(rb'file=([0-9a-f]{32}),(0|[1-9][0-9]*),([^\n]*)\n')
+SNIPPET_LINE_RE = re.compile(rb'([1-9][0-9]*)=((?:[0-9a-f]{8},)*[0-9a-f]{8})\n')
+
+
+def encode_varint(value: int) -> bytes:
+    """
+    Encode an unsigned integer as a (LEB128) varint
+    :param value: value to encode
+    :return: encoded bytes
+    """
+    out = bytearray()
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+if sys.version_info >= (3, 8):
+    def crc_hex(crcs: bytes) -> bytes:
+        """
+        Format raw 4-byte CRCs as comma separated hex
+        """
+        return crcs.hex(',', 4).encode('ascii')
+else:
+    def crc_hex(crcs: bytes) -> bytes:
+        """
+        Format raw 4-byte CRCs as comma separated hex
+        """
+        h = crcs.hex()
+        return ','.join(h[i:i + 8] for i in range(0, len(h), 8)).encode('ascii')
+
+
+class WfpContainer(ScanossBase):
+    """
+    Compact binary container for WFP fingerprints
+    Each line of the textual WFP is stored as a record: file lines with a raw MD5 and varint size, snippet lines with
+    varint line number deltas and raw 4-byte CRCs, and anything else verbatim. The records can optionally be
+    compressed in a zstd frame (requires the zstandard package).
+    Conversion back to the textual WFP accepted by the API is lossless.
+    """
+
+    def __init__(self, debug: bool = False, trace: bool = False, quiet: bool = False):
+        """
+        Initialise the WfpContainer class
+        :param debug: enable debug (default False)
+        :param trace: enable trace (default False)
+        :param quiet: enable quiet mode (default False)
+        """
+        super().__init__(debug, trace, quiet)
+
+    @staticmethod
+    def is_container(wfp_file: str) -> bool:
+        """
+        Check if the given file is a binary WFP container
+        :param wfp_file: file to check
+        :return: True if it is a container, False otherwise
+        """
+        with open(wfp_file, 'rb') as f:
+            return f.read(len(WFP_CONTAINER_MAGIC)) == WFP_CONTAINER_MAGIC
+
+    @staticmethod
+    def encode_lines(lines: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Encode the given textual WFP lines into container records
+        :param lines: WFP lines (bytes, including line terminators)
+        :return: iterator of encoded records
+        """
+        last_line = 0
+        for line in lines:
+            m = SNIPPET_LINE_RE.fullmatch(line)
+            if m:
+                line_num = int(m.group(1))
+                if line_num >= last_line:
+                    crcs = bytes.fromhex(m.group(2).replace(b',', b'').decode('ascii'))
+                    yield b''.join([bytes([REC_SNIPPET]), encode_varint(line_num - last_line),
+                                    encode_varint(len(crcs) // 4), crcs])
+                    last_line = line_num
+                    continue
+            elif line.startswith(b'file='):
+                m = FILE_LINE_RE.fullmatch(line)
+                if m:
+                    path = m.group(3)
+                    yield b''.join([bytes([REC_FILE]), bytes.fromhex(m.group(1).decode('ascii')),
+                                    encode_varint(int(m.group(2))), encode_varint(len(path)), path])
+                    last_line = 0
+                    continue
+            yield bytes([REC_RAW]) + encode_varint(len(line)) + line
+
+    def write(self, wfp_file: str, wfps: Iterable[str], compress: bool = False) -> None:
+        """
+        Write the given textual fingerprints to a binary WFP container
+        :param wfp_file: container file to write
+        :param wfps: textual WFP blocks
+        :param compress: compress the records with zstd (default False)
+        """
+        self.write_lines(wfp_file, (line for wfp in wfps for line in wfp.encode('utf-8').splitlines(keepends=True)),
+                         compress)
+
+    def write_lines(self, wfp_file: str, lines: Iterable[bytes], compress: bool = False) -> None:
+        """
+        Write the given textual WFP lines to a binary WFP container
+        :param wfp_file: container file to write
+        :param lines: WFP lines (bytes, including line terminators)
+        :param compress: compress the records with zstd (default False)
+        """
+        zstandard = WfpContainer.__zstandard() if compress else None
+        self.print_debug(f'Writing WFP container to {wfp_file}...')
+        with open(wfp_file, 'wb') as f:
+            f.write(WFP_CONTAINER_MAGIC + bytes([WFP_CONTAINER_VERSION, FLAG_ZSTD if compress else 0]))
+            out = zstandard.ZstdCompressor().stream_writer(f, closefd=False) if compress else f
+            batch = []
+            for record in WfpContainer.encode_lines(lines):
+                batch.append(record)
+                if len(batch) >= 4096:
+                    out.write(b''.join(batch))
+                    batch = []
+            out.write(b''.join(batch))
+            if compress:
+                out.close()  # Finish the zstd frame
+
+    def lines(self, wfp_file: str) -> Iterator[bytes]:
+        """
+        Read the textual WFP lines back from a binary WFP container
+        :param wfp_file: container file to read
+        :return: iterator of WFP lines (bytes, including line terminators)
+        """
+        with open(wfp_file, 'rb') as f:
+            header = f.read(WFP_CONTAINER_HEADER_SIZE)
+            if len(header) != WFP_CONTAINER_HEADER_SIZE or not header.startswith(WFP_CONTAINER_MAGIC):
+                raise Exception(f'ERROR: Not a WFP container: {wfp_file}')
+            version, flags = header[-2], header[-1]
+            if version != WFP_CONTAINER_VERSION:
+                raise Exception(f'ERROR: Unsupported WFP container version {version}: {wfp_file}')
+            stream = f
+            if flags & FLAG_ZSTD:
+                stream = WfpContainer.__zstandard().ZstdDecompressor().stream_reader(f)
+            yield from WfpContainer.__decode(stream, wfp_file)
+
+    @staticmethod
+    def __zstandard():
+        """
+        Load the (optional) zstandard package, only needed for compressed containers
+        :return: zstandard module
+        """
+        try:
+            import zstandard
+        except (ModuleNotFoundError, ImportError):
+            raise Exception('ERROR: Compressed WFP containers require the zstandard package: '
+                            'pip3 install scanoss[zstd]')
+        return zstandard
+
+    @staticmethod
+    def __decode(stream, wfp_file: str) -> Iterator[bytes]:
+        """
+        Decode the container records read from the given stream into textual WFP lines
+        Records are decoded from a buffer of chunks read from the stream. If a record is split across the end of the
+        buffer, more data is read and it is decoded again.
+        :param stream: (decompressed) record stream
+        :param wfp_file: container file name (for error reporting)
+        :return: iterator of WFP lines (bytes, including line terminators)
+        """
+        buf = b''
+        pos = 0
+        eof = False
+        last_line = 0
+        while True:
+            if not eof and len(buf) - pos < READ_CHUNK_SIZE:
+                chunk = stream.read(READ_CHUNK_SIZE)
+                if chunk:
+                    buf = buf[pos:] + chunk
+                    pos = 0
+                else:
+                    eof = True
+            if pos >= len(buf):
+                break
+            start = pos
+            try:
+                rec_type = buf[pos]
+                if rec_type == REC_SNIPPET:
+                    delta, count = buf[pos + 1], buf[pos + 2]
+                    if delta < 0x80 and count < 0x80:  # Fast path: single byte varints
+                        pos += 3
+                    else:
+                        delta, pos = WfpContainer.__varint(buf, pos + 1)
+                        count, pos = WfpContainer.__varint(buf, pos)
+                    end = pos + count * 4
+                    if end > len(buf):
+                        raise IndexError('incomplete record')
+                    last_line += delta
+                    line = b'%d=%s\n' % (last_line, crc_hex(buf[pos:end]))
+                elif rec_type == REC_FILE:
+                    md5 = buf[pos + 1:pos + 17]
+                    size, pos = WfpContainer.__varint(buf, pos + 17)
+                    length, pos = WfpContainer.__varint(buf, pos)
+                    end = pos + length
+                    if end > len(buf):
+                        raise IndexError('incomplete record')
+                    line = b'file=%s,%d,%s\n' % (md5.hex().encode('ascii'), size, buf[pos:end])
+                    last_line = 0
+                elif rec_type == REC_RAW:
+                    length, pos = WfpContainer.__varint(buf, pos + 1)
+                    end = pos + length
+                    if end > len(buf):
+                        raise IndexError('incomplete record')
+                    line = buf[pos:end]
+                else:
+                    raise Exception(f'ERROR: Unknown WFP container record type {rec_type}: {wfp_file}')
+            except IndexError:
+                if eof:
+                    raise Exception(f'ERROR: Truncated WFP container: {wfp_file}')
+                chunk = stream.read(READ_CHUNK_SIZE)  # Record is split across the buffer end, so read more
+                if not chunk:
+                    eof = True
+                buf = buf[start:] + chunk
+                pos = 0
+                continue
+            pos = end
+            yield line
+
+    @staticmethod
+    def __varint(buf: bytes, pos: int):
+        """
+        Decode a (LEB128) varint from the buffer
+        :param buf: buffer to decode from
+        :param pos: position of the varint in the buffer
+        :return: tuple of (value, position after the varint)
+        """
+        byte = buf[pos]
+        value = byte & 0x7f
+        shift = 7
+        while byte & 0x80:
+            pos += 1
+            byte = buf[pos]
+            value |= (byte & 0x7f) << shift
+            shift += 7
+        return value, pos + 1
+
+    def to_text(self, wfp_file: str, text_file: str) -> None:
+        """
+        Convert a binary WFP container into a textual WFP file
+        :param wfp_file: container file to read
+        :param text_file: textual WFP file to write
+        """
+        self.print_debug(f'Converting WFP container {wfp_file} to {text_file}...')
+        with open(text_file, 'wb') as f:
+            for line in self.lines(wfp_file):
+                f.write(line)
+
+    def from_text(self, text_file: str, wfp_file: str, compress: bool = False) -> None:
+        """
+        Convert a textual WFP file into a binary WFP container
+        :param text_file: textual WFP file to read
+        :param wfp_file: container file to write
+        :param compress: compress the records with zstd (default False)
+        """
+        with open(text_file, 'rb') as f:
+            self.write_lines(wfp_file, f, compress)
+
+#
+# End of WfpContainer Class
+#
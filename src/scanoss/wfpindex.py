@@ -0,0 +1,194 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import os
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Tuple
+
+from .scanossbase import ScanossBase
+
+WFP_INDEX_SUFFIX = '.idx'
+WFP_INDEX_VERSION = 2
+WFP_INDEX_HEADER = 'wfp-index='
+
+
+@dataclass
+class WfpIndexEntry:
+    """
+    Location of a single file block in a WFP file
+    """
+    offset: int   # Byte offset of the block (file= line) in the WFP
+    length: int   # Length (in bytes) of the block
+    md5: str      # MD5 of the file contents
+    path: str     # File path
+
+
+class WfpIndex(ScanossBase):
+    """
+    Sidecar index of a WFP file (<wfp file>.idx)
+    Records the byte offset & length of each file block in the WFP, keyed by path and MD5, so that files can be
+    counted, looked up and extracted without parsing the whole WFP.
+    The index is a text file: a header line (wfp-index=version,wfp size,wfp mtime (ns),file count), followed by one
+    offset,length,md5,path line per file.
+    If the WFP no longer matches the index when it is read, the WFP is re-indexed.
+    """
+
+    def __init__(self, wfp_file: str, debug: bool = False, trace: bool = False, quiet: bool = False):
+        """
+        Initialise the WfpIndex class
+        :param wfp_file: WFP file being indexed
+        :param debug: enable debug (default False)
+        :param trace: enable trace (default False)
+        :param quiet: enable quiet mode (default False)
+        """
+        super().__init__(debug, trace, quiet)
+        self.wfp_file = wfp_file
+        self.index_file = WfpIndex.index_file_name(wfp_file)
+        self.entries: List[WfpIndexEntry] = []
+
+    @staticmethod
+    def index_file_name(wfp_file: str) -> str:
+        """
+        Get the name of the index file for the given WFP file
+        :param wfp_file: WFP file
+        :return: index file name
+        """
+        return wfp_file + WFP_INDEX_SUFFIX
+
+    @property
+    def count(self) -> int:
+        """
+        Number of files in the index
+        """
+        return len(self.entries)
+
+    def add(self, offset: int, block: bytes) -> None:
+        """
+        Add the given WFP file block to the index
+        :param offset: byte offset of the block in the WFP
+        :param block: WFP file block (starting with its file=md5,size,path line)
+        """
+        header = block.split(b'\n', 1)[0].rstrip(b'\r')
+        md5, _, path = header[5:].decode('utf-8').partition(',')
+        self.entries.append(WfpIndexEntry(offset, len(block), md5, path.partition(',')[2]))
+
+    def write(self) -> None:
+        """
+        Write the index to its sidecar file (the WFP file must already be complete)
+        """
+        wfp_stat = os.stat(self.wfp_file)
+        self.print_debug(f'Writing WFP index to {self.index_file}...')
+        with open(self.index_file, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(f'{WFP_INDEX_HEADER}{WFP_INDEX_VERSION},{wfp_stat.st_size},{wfp_stat.st_mtime_ns},'
+                    f'{len(self.entries)}\n')
+            for e in self.entries:
+                f.write(f'{e.offset},{e.length},{e.md5},{e.path}\n')
+
+    def load(self) -> bool:
+        """
+        Load the index from its sidecar file
+        :return: True if loaded, False if the index is missing, unsupported or out of date with its WFP file
+        """
+        if not os.path.isfile(self.index_file) or not os.path.isfile(self.wfp_file):
+            return False
+        entries = []
+        with open(self.index_file, encoding='utf-8') as f:
+            header = f.readline().rstrip('\n')
+            if not header.startswith(WFP_INDEX_HEADER):
+                self.print_debug(f'Warning: Ignoring invalid WFP index: {self.index_file}')
+                return False
+            fields = header[len(WFP_INDEX_HEADER):].split(',')
+            if len(fields) != 4 or int(fields[0]) != WFP_INDEX_VERSION:
+                self.print_debug(f'Warning: Ignoring unsupported WFP index: {self.index_file}')
+                return False
+            _, wfp_size, wfp_mtime, count = fields
+            wfp_stat = os.stat(self.wfp_file)
+            if int(wfp_size) != wfp_stat.st_size or int(wfp_mtime) != wfp_stat.st_mtime_ns:
+                self.print_debug(f'Warning: Ignoring out of date WFP index: {self.index_file}')
+                return False
+            for line in f:
+                offset, length, md5, path = line.rstrip('\n').split(',', 3)
+                entries.append(WfpIndexEntry(int(offset), int(length), md5, path))
+        if len(entries) != int(count):
+            self.print_debug(f'Warning: Ignoring incomplete WFP index: {self.index_file}')
+            return False
+        self.entries = entries
+        return True
+
+    def create(self, write: bool = True) -> None:
+        """
+        Create the index by reading through its WFP file
+        :param write: write the index to its sidecar file (default True)
+        """
+        from .wfpreader import WfpReader
+        self.print_debug(f'Indexing WFP file {self.wfp_file}...')
+        self.entries = []
+        for offset, _, block in WfpReader(self.wfp_file, self.debug, self.trace, self.quiet).blocks():
+            self.add(offset, block)
+        if write:
+            try:
+                self.write()
+            except OSError as e:
+                self.print_debug(f'Warning: Failed to write WFP index {self.index_file}: {e}')
+
+    def find(self, paths: Iterable[str] = None, md5s: Iterable[str] = None) -> List[WfpIndexEntry]:
+        """
+        Find the index entries matching the given paths and/or MD5s
+        :param paths: file paths to find (optional)
+        :param md5s: file MD5s to find (optional)
+        :return: matching entries (in WFP file order)
+        """
+        paths = set(paths) if paths is not None else None
+        md5s = set(md5s) if md5s is not None else None
+        return [e for e in self.entries
+                if (paths is None or e.path in paths) and (md5s is None or e.md5 in md5s)]
+
+    def read(self, entries: Iterable[WfpIndexEntry], reindex: bool = True) -> Iterator[Tuple[str, bytes]]:
+        """
+        Read the WFP blocks of the given entries directly from the WFP file
+        If a block does not match its entry, the WFP is re-indexed and the remaining files are read using the new index
+        :param entries: index entries to read
+        :param reindex: re-index the WFP if it does not match the index (default True)
+        :return: iterator of (file path, WFP block) tuples
+        """
+        entries = list(entries)
+        remaining = None
+        with open(self.wfp_file, 'rb') as f:
+            for i, e in enumerate(entries):
+                f.seek(e.offset)
+                block = f.read(e.length)
+                if not block.startswith(f'file={e.md5},'.encode('utf-8')):
+                    if not reindex:
+                        raise Exception(f'ERROR: WFP index {self.index_file} does not match its WFP file at {e.offset}')
+                    self.print_debug(f'Warning: WFP index {self.index_file} does not match its WFP file at {e.offset}.'
+                                     f' Re-indexing...')
+                    remaining = [r.path for r in entries[i:]]
+                    break
+                yield e.path, block
+        if remaining is not None:
+            self.create()
+            yield from self.read(self.find(paths=remaining), reindex=False)
+
+#
+# End of WfpIndex Class
+#
@@ -0,0 +1,178 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+from typing import Callable, Iterable, Iterator, List, Tuple
+
+from .scanossbase import ScanossBase
+from .wfpcontainer import WfpContainer
+from .wfpindex import WfpIndex
+
+WFP_FILE_START = b'file='
+
+
+class WfpReader(ScanossBase):
+    """
+    Streaming reader of WFP files
+    The WFP is read one line at a time (as bytes), producing the fingerprint block of each file along with its size,
+    so that arbitrarily large WFP files can be split into scan requests without holding (or re-encoding) them in memory.
+    If only selected files are requested, they are read directly using the WFP index (creating it if required).
+    Binary WFP containers are detected automatically and read back as the equivalent textual WFP.
+    """
+
+    def __init__(self, wfp_file: str, debug: bool = False, trace: bool = False, quiet: bool = False,
+                 paths: Iterable[str] = None):
+        """
+        Initialise the WfpReader class
+        :param wfp_file: WFP file to read
+        :param debug: enable debug (default False)
+        :param trace: enable trace (default False)
+        :param quiet: enable quiet mode (default False)
+        :param paths: only read the files with these paths (default None - all files)
+        """
+        super().__init__(debug, trace, quiet)
+        self.wfp_file = wfp_file
+        self.paths = set(paths) if paths is not None else None
+        self.binary = WfpContainer.is_container(wfp_file)
+        self._index = None
+
+    def __lines(self) -> Iterator[bytes]:
+        """
+        Iterate over the (textual) lines of the WFP
+        :return: iterator of WFP lines (bytes, including line terminators)
+        """
+        if self.binary:
+            yield from WfpContainer(self.debug, self.trace, self.quiet).lines(self.wfp_file)
+        else:
+            with open(self.wfp_file, 'rb') as f:
+                yield from f
+
+    def __get_index(self, create: bool = False):
+        """
+        Get the index of the WFP file (loading or creating it if required)
+        :param create: create the index if it does not exist (default False)
+        :return: WfpIndex object or None
+        """
+        if self._index is None and not self.binary:  # Only textual WFPs are indexed
+            index = WfpIndex(self.wfp_file, self.debug, self.trace, self.quiet)
+            if index.load():
+                self._index = index
+            elif create:
+                index.create()
+                self._index = index
+        return self._index
+
+    @staticmethod
+    def file_path(header: bytes) -> str:
+        """
+        Extract the file path from a WFP file header line (file=md5,size,path)
+        :param header: WFP file header line
+        :return: file path
+        """
+        return header.rstrip(b'\r\n').split(b',', 2)[-1].decode('utf-8')
+
+    def blocks(self) -> Iterator[Tuple[int, str, bytes]]:
+        """
+        Iterate over the fingerprint blocks of each file in the WFP (reading the whole WFP)
+        :return: iterator of (byte offset in the textual WFP, file path, WFP block) tuples
+        """
+        path = None
+        block = []
+        start = offset = 0
+        for line in self.__lines():
+            if line.startswith(WFP_FILE_START):
+                if block and path is not None:
+                    yield start, path, b''.join(block)
+                path = WfpReader.file_path(line)
+                block = [line]
+                start = offset
+            elif path is not None:
+                block.append(line)
+            else:
+                self.print_debug(f'Warning: Ignoring WFP data before the first file: {line}')
+            offset += len(line)
+        if block and path is not None:
+            yield start, path, b''.join(block)
+
+    def files(self) -> Iterator[Tuple[str, bytes]]:
+        """
+        Iterate over the fingerprint blocks of each (requested) file in the WFP
+        :return: iterator of (file path, WFP block) tuples
+        """
+        index = self.__get_index(create=True) if self.paths is not None else None
+        if index:
+            entries = index.find(paths=self.paths)
+            if len(entries) < len(self.paths):
+                missing = self.paths - set(e.path for e in entries)
+                self.print_stderr(f'Warning: {len(missing)} requested files not found in {self.wfp_file}')
+            yield from index.read(entries)
+            return
+        for _, path, block in self.blocks():
+            if self.paths is None or path in self.paths:
+                yield path, block
+
+    def batches(self, max_size: int, max_files: int = 0,
+                include: Callable[[str], bool] = None) -> Iterator[Tuple[str, List[str]]]:
+        """
+        Group the file blocks of the WFP into scan requests
+        Sizes are tracked incrementally, so each line is only read (and measured) once
+        :param max_size: maximum size (in bytes) of a request (a single file larger than this is sent on its own)
+        :param max_files: maximum number of files in a request (default 0 - unlimited)
+        :param include: only include the files whose path this returns True for (default None - all files)
+        :return: iterator of (WFP request, list of file paths) tuples
+        """
+        batch = []
+        paths = []
+        size = 0
+        for path, block in self.files():
+            if include and not include(path):
+                continue
+            if batch and (size + len(block) >= max_size or (0 < max_files <= len(batch))):
+                yield b''.join(batch).decode('utf-8'), paths
+                batch = []
+                paths = []
+                size = 0
+            batch.append(block)
+            paths.append(path)
+            size += len(block)
+        if batch:
+            yield b''.join(batch).decode('utf-8'), paths
+
+    def count(self) -> int:
+        """
+        Count the number of (requested) files in the WFP, using its index if available
+        :return: number of files
+        """
+        index = self.__get_index(create=self.paths is not None)
+        if index:
+            return len(index.find(paths=self.paths)) if self.paths is not None else index.count
+        if self.paths is not None:
+            return sum(1 for _ in self.files())
+        count = 0
+        for line in self.__lines():
+            if line.startswith(WFP_FILE_START):
+                count += 1
+        return count
+
+#
+# End of WfpReader Class
+#
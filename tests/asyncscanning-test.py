@@ -0,0 +1,80 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import asyncio
+import unittest
+
+from scanoss.mockserver import MockScanossServer
+
+try:
+    from scanoss.asyncscanossapi import AsyncScanossApi
+    from scanoss.asyncscanning import AsyncScanning
+    HAVE_AIOHTTP = True
+except ImportError:
+    HAVE_AIOHTTP = False
+
+
+@unittest.skipUnless(HAVE_AIOHTTP, 'aiohttp not installed')
+class MyTestCase(unittest.TestCase):
+    """
+    Exercise the AsyncScanning class against the mock SCANOSS server
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.mock = MockScanossServer(grpc_port=None)
+        cls.mock.start()
+        cls.url = cls.mock.url
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.mock.stop()
+
+    @staticmethod
+    def wfps(count: int) -> list:
+        return [f'file=cae3ae667a54d731ca934e2867b32aaa,948,test/file-{i}.c\n4=579be9fb\n' for i in range(count)]
+
+    def test_async_scan(self):
+        async def run():
+            async with AsyncScanossApi(url=self.url, retry=0) as api:
+                scanning = AsyncScanning(api, nb_tasks=50, quiet=True)
+                self.assertTrue(await scanning.scan(self.wfps(200)))
+                responses = scanning.responses
+                scanning.results.close()
+                return responses
+        responses = asyncio.run(run())
+        self.assertEqual(len(responses), 1)
+        self.assertEqual(len(responses[0]), 200)
+        self.assertIn('test/file-0.c', responses[0])
+
+    def test_async_queue(self):
+        scanning = AsyncScanning(AsyncScanossApi(url=self.url, retry=0), nb_tasks=10, quiet=True)
+        for wfp in self.wfps(25):
+            scanning.queue_add(wfp)
+        self.assertTrue(scanning.run(wait=True))
+        self.assertEqual(len(scanning.results), 25)
+        self.assertFalse(scanning.stop_scanning())
+        scanning.results.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
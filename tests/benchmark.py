@@ -0,0 +1,98 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from scanoss.mockserver import MockScanossServer  # noqa: E402
+from scanoss.scanner import Scanner  # noqa: E402
+
+
+def write_wfp(wfp_file: str, files: int, snippets: int) -> None:
+    """
+    Write a synthetic WFP file with the given number of files & snippet lines per file
+    """
+    with open(wfp_file, 'w') as f:
+        for i in range(files):
+            f.write(f'file={i:032x},{1000 + i},src/bench/file-{i}.c\n')
+            for line in range(snippets):
+                f.write(f'{line * 3 + 1}={(i * 7919 + line) & 0xffffffff:08x},{(i + line * 31) & 0xffffffff:08x}\n')
+
+
+def run(args) -> None:
+    """
+    Scan the synthetic WFP against the mock server for each thread/post size combination and report throughput
+    """
+    threads = [int(t) for t in args.threads.split(',')]
+    post_sizes = [int(p) for p in args.post_size.split(',')]
+    with tempfile.TemporaryDirectory() as tmp, \
+            MockScanossServer(grpc_port=None, latency=args.latency, error_rate=args.error_rate,
+                              match_rate=args.match_rate, results_per_file=args.results,
+                              payload_size=args.payload_size) as mock:
+        wfp_file = os.path.join(tmp, 'bench.wfp')
+        write_wfp(wfp_file, args.files, args.snippets)
+        print(f'Mock server: {mock.url} latency: {args.latency} files: {args.files} '
+              f'WFP size: {os.path.getsize(wfp_file)} bytes')
+        print(f'{"mode":>8} {"threads":>8} {"post(k)":>8} {"requests":>9} {"seconds":>9} {"files/s":>10}')
+        for nb_threads in threads:
+            for post_size in post_sizes:
+                output = os.path.join(tmp, 'results.json')
+                if os.path.exists(output):
+                    os.remove(output)
+                requests = mock.stats['requests']
+                scanner = Scanner(url=mock.url, nb_threads=nb_threads, post_size=post_size, scan_output=output,
+                                  quiet=True, retry=args.retry, async_scan=args.async_scan, scan_options=3)
+                start = time.perf_counter()
+                scanner.scan_wfp_file_threaded(wfp_file)
+                elapsed = time.perf_counter() - start
+                mode = 'async' if args.async_scan else 'threaded'
+                print(f'{mode:>8} {nb_threads:>8} {post_size:>8} {mock.stats["requests"] - requests:>9} '
+                      f'{elapsed:>9.2f} {args.files / elapsed:>10.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark scanning throughput against the mock SCANOSS server')
+    parser.add_argument('--files', type=int, default=5000, help='Number of synthetic files to scan (default 5000)')
+    parser.add_argument('--snippets', type=int, default=20, help='Snippet lines per file (default 20)')
+    parser.add_argument('--threads', '-T', type=str, default='1,5,10,20',
+                        help='Comma separated list of thread counts to try (default 1,5,10,20)')
+    parser.add_argument('--post-size', '-P', type=str, default='32',
+                        help='Comma separated list of post sizes (KB) to try (default 32)')
+    parser.add_argument('--latency', type=str, default='normal:100:30',
+                        help='Mock server latency distribution in ms (default normal:100:30)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests to fail with HTTP 500')
+    parser.add_argument('--match-rate', type=float, default=0.5, help='Fraction of files to match (default 0.5)')
+    parser.add_argument('--results', type=int, default=1, help='Results per matched file (default 1)')
+    parser.add_argument('--payload-size', type=int, default=0, help='Bytes of padding per result (default 0)')
+    parser.add_argument('--retry', type=int, default=5, help='Client retry limit (default 5)')
+    parser.add_argument('--async-scan', action='store_true', help='Use the async scanning client')
+    run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
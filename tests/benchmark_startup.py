@@ -0,0 +1,107 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+
+def cli_env() -> dict:
+    """
+    Environment to run the CLI from the source tree
+    """
+    env = os.environ.copy()
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [SRC_DIR, env.get('PYTHONPATH')]))
+    return env
+
+
+def time_command(cmd: list, runs: int, env: dict) -> list:
+    """
+    Run the given command the requested number of times and return the wall clock time (ms) of each run
+    """
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def import_times(args: list, env: dict, top: int) -> list:
+    """
+    Get the slowest (cumulative) module imports for the given CLI arguments
+    """
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-m', 'scanoss.cli'] + args, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=False)
+    imports = []
+    for line in proc.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, module = line.split('|', 2)
+            if cumulative.strip().isdigit():
+                imports.append((int(cumulative) / 1000, module.rstrip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def run(args) -> None:
+    """
+    Time the start-up of the CLI for a set of (local only) sub-commands
+    """
+    env = cli_env()
+    with tempfile.TemporaryDirectory() as tmp:
+        sample = os.path.join(tmp, 'sample.c')
+        with open(sample, 'w') as f:
+            for i in range(200):
+                f.write(f'int function_{i}(int a, int b) {{ return a * {i} + b; }}\n')
+        commands = {
+            'python': [sys.executable, '-c', 'pass'],
+            'version': [sys.executable, '-m', 'scanoss.cli', 'version'],
+            'help': [sys.executable, '-m', 'scanoss.cli', '--help'],
+            'wfp': [sys.executable, '-m', 'scanoss.cli', 'wfp', sample],
+        }
+        print(f'{"command":>10} {"runs":>5} {"min(ms)":>9} {"median(ms)":>11} {"max(ms)":>9}')
+        for name, cmd in commands.items():
+            times = time_command(cmd, args.runs, env)
+            print(f'{name:>10} {args.runs:>5} {min(times):>9.1f} {statistics.median(times):>11.1f} '
+                  f'{max(times):>9.1f}')
+        if args.imports:
+            print(f'\nSlowest imports (wfp):')
+            for elapsed, module in import_times(['wfp', sample], env, args.imports):
+                print(f'{elapsed:>9.1f} ms {module}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scanoss-py CLI start-up time')
+    parser.add_argument('--runs', '-n', type=int, default=10, help='Number of runs per command (default 10)')
+    parser.add_argument('--imports', type=int, default=10,
+                        help='Number of slowest module imports to report (default 10, 0 to disable)')
+    run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
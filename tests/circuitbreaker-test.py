@@ -0,0 +1,115 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import scanoss.scanossapi
+from scanoss.circuitbreaker import CircuitBreaker, CircuitOpenError, CIRCUIT_CLOSED, CIRCUIT_OPEN
+from scanoss.mockserver import MockScanossServer
+from scanoss.scanossapi import ScanossApi
+from scanoss.threadedscanning import ThreadedScanning
+
+
+class MyTestCase(unittest.TestCase):
+    """
+    Exercise the CircuitBreaker class
+    """
+    def setUp(self):
+        self.retry_delay = scanoss.scanossapi.RETRY_DELAY
+        scanoss.scanossapi.RETRY_DELAY = 0  # Don't wait between retries
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)  # Failed requests are saved to the current directory
+
+    def tearDown(self):
+        scanoss.scanossapi.RETRY_DELAY = self.retry_delay
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_breaker_states(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+        self.assertFalse(breaker.acquire())
+        breaker.record(False)
+        breaker.record(False)
+        self.assertEqual(breaker.state, CIRCUIT_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.acquire()
+        time.sleep(0.25)
+        self.assertTrue(breaker.acquire())  # Half-open, so this caller should probe
+        with self.assertRaises(CircuitOpenError):
+            breaker.acquire()  # Only one probe at a time
+        breaker.record(True, probe=True)
+        self.assertEqual(breaker.state, CIRCUIT_CLOSED)
+        self.assertFalse(breaker.acquire())
+
+    def test_breaker_wait(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.1, max_wait=5)
+        breaker.record(False)
+        probes = []
+
+        def worker():
+            if breaker.acquire():
+                probes.append(1)
+                breaker.record(True, probe=True)
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=5)
+        self.assertEqual(len(probes), 1)  # One probe, the other workers waited for the circuit to close
+        self.assertEqual(breaker.state, CIRCUIT_CLOSED)
+
+    def test_disabled(self):
+        breaker = CircuitBreaker(failure_threshold=0)
+        for _ in range(10):
+            breaker.record(False)
+        self.assertFalse(breaker.acquire())
+
+    def test_scan_fails_fast(self):
+        with MockScanossServer(grpc_port=None, error_rate=1.0) as mock:
+            api = ScanossApi(url=mock.url, retry=5, breaker_threshold=3, breaker_reset=60)
+            scanning = ThreadedScanning(api, nb_threads=4)
+            for i in range(20):
+                scanning.queue_add(f'file={i:032x},10,src/file-{i}.c\n')
+            self.assertFalse(scanning.run())
+            self.assertTrue(scanning.stop_scanning())
+            self.assertLessEqual(mock.stats['requests'], 3 + 4)  # Threshold plus those already in flight
+            scanning.results.close()
+
+    def test_scan_probe_recovers(self):
+        with MockScanossServer(grpc_port=None, error_rate=1.0) as mock:
+            api = ScanossApi(url=mock.url, retry=5, breaker_threshold=2, breaker_reset=0.2, breaker_wait=1)
+            with self.assertRaises(Exception):
+                api.scan('file=0123,10,src/a.c\n')
+            mock.error_rate = 0.0  # Service recovers
+            resp = api.scan('file=0123,10,src/a.c\n')
+            self.assertIn('src/a.c', resp)
+            self.assertEqual(api.breaker.state, CIRCUIT_CLOSED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import socket
+import time
+import unittest
+
+from scanoss.endpointpool import EndpointPool, LB_POWER_OF_TWO
+from scanoss.mockserver import MockScanossServer
+from scanoss.scanossapi import ScanossApi
+
+
+def unused_url() -> str:
+    with socket.socket() as s:  # Grab a free port, then release it so nothing is listening on it
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    return f'http://127.0.0.1:{port}/api/scan/direct'
+
+
+class MyTestCase(unittest.TestCase):
+    """
+    Exercise the EndpointPool class
+    """
+    def test_least_outstanding(self):
+        pool = EndpointPool(['http://a', 'http://b', 'http://a'])
+        self.assertEqual(len(pool), 2)
+        first = pool.acquire()
+        second = pool.acquire()
+        self.assertNotEqual(first.url, second.url)  # Spread across the endpoints
+        pool.release(first, True, 0.1)
+        self.assertEqual(pool.acquire().url, first.url)  # First is now the least loaded
+
+    def test_power_of_two(self):
+        pool = EndpointPool(['http://a', 'http://b', 'http://c'], strategy=LB_POWER_OF_TWO)
+        busy = pool.acquire()
+        for _ in range(20):
+            endpoint = pool.acquire()
+            self.assertIsNot(endpoint, busy)  # Never picks the busier of the two choices
+            pool.release(endpoint, True)
+        with self.assertRaises(Exception):
+            EndpointPool(['http://a'], strategy='round-robin')
+
+    def test_failover(self):
+        pool = EndpointPool(['http://a', 'http://b'])
+        endpoint = pool.acquire()
+        pool.release(endpoint, False)
+        self.assertTrue(pool.has_healthy())
+        for _ in range(5):
+            other = pool.acquire()
+            self.assertNotEqual(other.url, endpoint.url)  # Failed endpoint is avoided
+            pool.release(other, True)
+        pool.release(pool.acquire(), False)
+        self.assertFalse(pool.has_healthy())
+        self.assertEqual(pool.acquire().url, endpoint.url)  # All down, so use the one that recovers first
+
+    def test_api_failover(self):
+        with MockScanossServer(grpc_port=None) as mock:
+            api = ScanossApi(url=f'{unused_url()},{mock.url}', retry=2)
+            self.assertEqual(len(api.endpoints), 2)
+            start = time.monotonic()
+            for i in range(10):
+                resp = api.scan(f'file={i:032x},10,src/file-{i}.c\n')
+                self.assertIn(f'src/file-{i}.c', resp)
+            self.assertLess(time.monotonic() - start, 5)  # Failed over without waiting to retry
+            self.assertEqual(mock.stats['requests'], 10)
+            dead = api.endpoints.endpoints[0]
+            self.assertEqual(dead.errors, 1)  # Dead endpoint only tried once, then avoided
+
+
+if __name__ == '__main__':
+    unittest.main()
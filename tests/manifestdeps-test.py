@@ -0,0 +1,114 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import json
+import os
+import tempfile
+import unittest
+
+from scanoss.manifestdeps import ManifestDeps, is_manifest, manifest_parser
+from scanoss.scanner import Scanner
+
+
+class MyTestCase(unittest.TestCase):
+    """
+    Unit test cases for native dependency manifest parsing
+    """
+    MANIFESTS = {
+        'package.json': json.dumps({'dependencies': {'@scope/pkg': '^1.0.0'}, 'devDependencies': {'jest': '29.0.0'}}),
+        'requirements-dev.txt': '# dev\n-r requirements.txt\nrequests[socks]>=2.0 ; python_version < "3.8"\n'
+                                'Flask_Login==0.6.2\n',
+        'go.mod': 'module example.com/app\nrequire (\n\tgithub.com/pkg/errors v0.9.1 // indirect\n)\n',
+        'Gemfile.lock': 'GEM\n  specs:\n    rack (2.2.8)\n      ruby2_keywords (>= 0)\n\nPLATFORMS\n  ruby\n',
+        'composer.json': json.dumps({'require': {'php': '>=8.0', 'monolog/monolog': '^3.0'}}),
+        'pom.xml': '<project xmlns="http://maven.apache.org/POM/4.0.0"><properties><v>4.13.2</v></properties>'
+                   '<dependencies><dependency><groupId>junit</groupId><artifactId>junit</artifactId>'
+                   '<version>${v}</version></dependency></dependencies></project>',
+    }
+
+    def test_manifest_parser(self):
+        self.assertEqual(manifest_parser('requirements.txt'), '_parse_requirements')
+        self.assertEqual(manifest_parser('Cargo.lock'), '_parse_cargo_lock')
+        self.assertIsNone(manifest_parser('main.c'))
+        self.assertTrue(is_manifest('app/go.mod'))
+        self.assertFalse(is_manifest('app/node_modules/dep/package.json'))  # Vendored
+        self.assertFalse(is_manifest('app/yarn.lock'))  # Only parsed by scancode
+
+    def test_no_manifests(self):
+        self.assertEqual(ManifestDeps().produce_from_scan('.', manifests=[]), {'files': []})  # Folder not searched
+
+    def test_produce_from_scan(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, 'app', 'node_modules', 'dep'))
+            os.makedirs(os.path.join(tmp, '.hidden'))
+            for name, contents in self.MANIFESTS.items():
+                with open(os.path.join(tmp, 'app', name), 'w') as f:
+                    f.write(contents)
+            for folder in ('node_modules/dep', '../.hidden'):  # Vendored & hidden manifests are not searched
+                with open(os.path.join(tmp, 'app', folder, 'package.json'), 'w') as f:
+                    f.write(json.dumps({'dependencies': {'ignored': '1.0.0'}}))
+            deps = ManifestDeps().produce_from_scan(tmp)
+            purls = {f['file']: f['purls'] for f in deps['files']}
+            self.assertEqual(sorted(purls), sorted(f'app/{name}' for name in self.MANIFESTS))
+            self.assertEqual(purls['app/package.json'], [{'purl': 'pkg:npm/%40scope/pkg', 'requirement': '^1.0.0'},
+                                                         {'purl': 'pkg:npm/jest', 'requirement': '29.0.0'}])
+            self.assertEqual(purls['app/requirements-dev.txt'], [{'purl': 'pkg:pypi/requests', 'requirement': '>=2.0'},
+                                                                 {'purl': 'pkg:pypi/flask-login@0.6.2'}])
+            self.assertEqual(purls['app/go.mod'], [{'purl': 'pkg:golang/github.com/pkg/errors@v0.9.1'}])
+            self.assertEqual(purls['app/Gemfile.lock'], [{'purl': 'pkg:gem/rack@2.2.8'}])
+            self.assertEqual(purls['app/composer.json'], [{'purl': 'pkg:composer/monolog/monolog',
+                                                           'requirement': '^3.0'}])
+            self.assertEqual(purls['app/pom.xml'], [{'purl': 'pkg:maven/junit/junit@4.13.2'}])
+
+    def test_invalid_manifest(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, 'package.json'), 'w') as f:
+                f.write('{not json')
+            deps = ManifestDeps(quiet=True).produce_from_scan(tmp)
+            self.assertEqual(deps, {'files': []})
+
+    def test_scan_folder_deps(self):
+        class StubDeps:
+            def run(self, what_to_scan=None, wait=True, manifests=None):
+                calls.append(('deps', manifests))
+                return True
+
+        def scan_folder(scan_dir):
+            calls.append(('files', None))
+            if scanner._manifests is not None:
+                scanner._manifests.append(os.path.join(scan_dir, 'package.json'))
+            return True
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = os.path.join(tmp, 'package.json')
+            for native, expected in ((False, [('deps', None), ('files', None)]),  # scancode runs while fingerprinting
+                                     (True, [('files', None), ('deps', [manifest])])):  # Native needs the manifests
+                calls = []
+                scanner = Scanner(scan_options=7, nb_threads=0, native_deps=native, quiet=True)
+                scanner._threaded_deps = StubDeps()
+                scanner.scan_folder = scan_folder
+                self.assertTrue(scanner.scan_folder_with_options(tmp))
+                self.assertEqual(calls, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,255 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import os
+import stat
+import sys
+import tempfile
+import time
+import unittest
+
+from google.protobuf.json_format import MessageToDict
+
+import scanoss.scanossapi
+from scanoss.api.common.v2.scanoss_common_pb2 import EchoRequest
+from scanoss.mockserver import MockScanossServer, latency_distribution
+from scanoss.resultcache import ResultCache
+from scanoss.scanarchive import ScanArchive
+from scanoss.scancodedeps import ScancodeDeps
+from scanoss.scanossapi import ScanossApi
+from scanoss.scanossgrpc import ScanossGrpc
+from scanoss.threadeddependencies import ThreadedDependencies
+from scanoss.threadedscanning import ThreadedScanning
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def make_wfp(start: int, count: int) -> str:
+    return ''.join(f'file={i:032x},{i},src/file-{i}.c\n4=0123abcd\n' for i in range(start, start + count))
+
+
+class MyTestCase(unittest.TestCase):
+    """
+    Exercise the scanning clients against the mock SCANOSS server
+    """
+    def setUp(self):
+        self.retry_delay = scanoss.scanossapi.RETRY_DELAY
+        scanoss.scanossapi.RETRY_DELAY = 0  # Don't wait between retries
+
+    def tearDown(self):
+        scanoss.scanossapi.RETRY_DELAY = self.retry_delay
+
+    def test_latency_distribution(self):
+        self.assertEqual(latency_distribution('20')(), 0.02)
+        self.assertEqual(latency_distribution('fixed:20')(), 0.02)
+        self.assertTrue(0.01 <= latency_distribution('uniform:10:20')() <= 0.02)
+        self.assertGreaterEqual(latency_distribution('normal:10:5')(), 0.0)
+        with self.assertRaises(ValueError):
+            latency_distribution('bogus:1:2:3')
+
+    def test_threaded_scan(self):
+        with MockScanossServer(grpc_port=None, latency='uniform:1:5', match_rate=0.5, results_per_file=2) as mock:
+            api = ScanossApi(url=mock.url, retry=0)
+            scanning = ThreadedScanning(api, nb_threads=8)
+            for i in range(50):
+                scanning.queue_add(make_wfp(i * 10, 10))
+            self.assertTrue(scanning.run())
+            self.assertEqual(len(scanning.results), 500)
+            self.assertEqual(mock.stats['requests'], 50)
+            self.assertEqual(mock.stats['files'], 500)
+            scanning.results.close()
+
+    def test_api_retry(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)  # Failed requests are saved to the current directory
+            try:
+                self.check_api_retry()
+            finally:
+                os.chdir(cwd)
+
+    def check_api_retry(self):
+        with MockScanossServer(grpc_port=None, error_rate=1.0) as mock:
+            api = ScanossApi(url=mock.url, retry=2)
+            with self.assertRaises(Exception):
+                api.scan(make_wfp(0, 1))
+            self.assertEqual(mock.stats['requests'], 3)  # Initial request plus two retries
+        with MockScanossServer(grpc_port=None, busy_rate=1.0) as mock:
+            api = ScanossApi(url=mock.url, retry=2)
+            with self.assertRaises(Exception):
+                api.scan(make_wfp(0, 1))
+            self.assertEqual(mock.stats['requests'], 1)  # Service limits exceeded are not retried
+
+    def test_grpc_services(self):
+        with MockScanossServer() as mock:
+            grpc_api = ScanossGrpc(url=mock.grpc_url)
+            self.assertEqual(grpc_api.deps_echo('mock'), 'mock')
+            deps = ScancodeDeps().produce_from_file(os.path.join(DATA_DIR, 'scancode-deps.json'))
+            resp = grpc_api.get_dependencies(deps)
+            self.assertIsNotNone(resp)
+            self.assertEqual(len(resp.get('files')), len(deps.get('files')))
+            resp = grpc_api.get_crypto_json({'purls': [{'purl': 'pkg:github/scanoss/engine'}]})
+            self.assertEqual(resp['purls'][0]['algorithms'][0]['algorithm'], 'sha256')
+            self.assertNotIn('Vulnerabilities', grpc_api._stubs)  # Stubs are only created on first use
+            resp = grpc_api.vulnerabilities_stub.Echo(EchoRequest(message='vulns'), timeout=3)
+            self.assertEqual(resp.message, 'vulns')
+            channel = grpc_api.channel  # All services share the one channel
+            self.assertIsNotNone(grpc_api.crypto_echo('crypto'))
+            self.assertIs(grpc_api.channel, channel)
+            grpc_api.close()
+            self.assertEqual(grpc_api.deps_echo('again'), 'again')  # Re-opened on demand
+            grpc_api.close()
+
+    def test_grpc_timeout(self):
+        with MockScanossServer(latency='1500') as mock:
+            grpc_api = ScanossGrpc(url=mock.grpc_url)
+            purls = {'purls': [{'purl': 'pkg:github/scanoss/engine'}]}
+            self.assertIsNone(grpc_api.get_crypto_json(purls, timeout=1))  # Per call timeout
+            self.assertIsNotNone(grpc_api.get_crypto_json(purls))
+            grpc_api.close()
+
+    def test_dependency_cache(self):
+        with MockScanossServer() as mock, tempfile.TemporaryDirectory() as tmp:
+            deps = ScancodeDeps().produce_from_file(os.path.join(DATA_DIR, 'scancode-deps.json'))
+            expected = ScanossGrpc(url=mock.grpc_url).get_dependencies(deps)
+            cache = ResultCache(tmp)
+            grpc_api = ScanossGrpc(url=mock.grpc_url, cache=cache)
+            resp = grpc_api.get_dependencies(deps)
+            self.assertEqual(resp.get('files'), expected.get('files'))
+            requests = mock.stats['grpc_requests']
+            resp = grpc_api.get_dependencies(deps)  # All purls now decorated from the cache
+            self.assertEqual(resp.get('files'), expected.get('files'))
+            self.assertEqual(mock.stats['grpc_requests'], requests)
+            cache.close()
+
+    def test_dependency_cache_incomplete(self):
+        with MockScanossServer() as mock, tempfile.TemporaryDirectory() as tmp:
+            deps = ScancodeDeps().produce_from_file(os.path.join(DATA_DIR, 'scancode-deps.json'))
+            cache = ResultCache(tmp)
+            grpc_api = ScanossGrpc(url=mock.grpc_url, cache=cache)
+            stub = grpc_api.dependencies_stub
+
+            class DroppingStub:  # Leaves the first file out of each response
+                @staticmethod
+                def GetDependencies(request, **kwargs):
+                    resp = stub.GetDependencies(request, **kwargs)
+                    del resp.files[0]
+                    return resp
+            grpc_api._stubs['Dependencies'] = DroppingStub()
+            self.assertIsNotNone(grpc_api.get_dependencies(deps))
+            grpc_api._stubs['Dependencies'] = stub
+            requests = mock.stats['grpc_requests']
+            resp = grpc_api.get_dependencies(deps)  # Only the dropped file's purls are requested again
+            self.assertEqual(mock.stats['grpc_requests'], requests + 1)
+            self.assertEqual(resp.get('files'), ScanossGrpc(url=mock.grpc_url).get_dependencies(deps).get('files'))
+            cache.close()
+
+    def test_dependency_cache_requests(self):
+        with MockScanossServer() as mock, tempfile.TemporaryDirectory() as tmp:
+            deps = ScancodeDeps().produce_from_file(os.path.join(DATA_DIR, 'scancode-deps.json'))
+            expected = ScanossGrpc(url=mock.grpc_url).get_dependencies(deps)
+            cache = ResultCache(tmp)
+            grpc_api = ScanossGrpc(url=mock.grpc_url, cache=cache)
+            grpc_api.get_dependencies({'files': deps['files'][:1]})  # Cache the purls of the first file
+            stub = grpc_api.dependencies_stub
+            requests = []
+
+            class RecordingStub:  # Records the requests and adds a sub-dependency to each response file
+                @staticmethod
+                def GetDependencies(request, **kwargs):
+                    requests.append(MessageToDict(request, preserving_proto_field_name=True))
+                    resp = stub.GetDependencies(request, **kwargs)
+                    for file in resp.files:
+                        file.dependencies.add(component='sub', purl='pkg:pypi/sub', version='1.0.0')
+                    return resp
+            grpc_api._stubs['Dependencies'] = RecordingStub()
+            resp = grpc_api.get_dependencies(deps)
+            cached = set((p['purl'], p.get('requirement')) for p in deps['files'][0]['purls'])
+            self.assertEqual(requests[0]['files'], [{**deps['files'][1], 'purls': [  # Original file, uncached purls
+                p for p in deps['files'][1]['purls'] if (p['purl'], p.get('requirement')) not in cached]}])
+            sub = {'component': 'sub', 'purl': 'pkg:pypi/sub', 'version': '1.0.0'}
+            self.assertEqual(resp['files'][0], expected['files'][0])
+            self.assertEqual(resp['files'][1], {**expected['files'][1],
+                                                'dependencies': expected['files'][1]['dependencies'] + [sub]})
+            grpc_api.get_dependencies(deps)  # Not cached, as the sub-dependency can't be attributed to a purl
+            self.assertEqual(len(requests), 2)
+            cache.close()
+
+    def test_dependency_cache_record_replay(self):
+        with MockScanossServer() as mock, tempfile.TemporaryDirectory() as tmp:
+            deps = ScancodeDeps().produce_from_file(os.path.join(DATA_DIR, 'scancode-deps.json'))
+            cache = ResultCache(os.path.join(tmp, 'cache'))
+            ScanossGrpc(url=mock.grpc_url, cache=cache).get_dependencies(deps)  # Cache all the purls
+            archive = ScanArchive(os.path.join(tmp, 'archive.jsonl'))
+            expected = ScanossGrpc(url=mock.grpc_url, cache=cache, archive=archive).get_dependencies(deps)
+            archive.close()
+            archive = ScanArchive(os.path.join(tmp, 'archive.jsonl'), replay=True)
+            resp = ScanossGrpc(url=mock.grpc_url, archive=archive).get_dependencies(deps)  # Replayed without the cache
+            self.assertEqual(resp, expected)
+            cache.close()
+
+    def test_chunked_requests(self):
+        with MockScanossServer() as mock:
+            deps = ScancodeDeps().produce_from_file(os.path.join(DATA_DIR, 'scancode-deps.json'))
+            expected = ScanossGrpc(url=mock.grpc_url).get_dependencies(deps)
+            requests = mock.stats['grpc_requests']
+            grpc_api = ScanossGrpc(url=mock.grpc_url, max_purls=2, nb_threads=3)
+            resp = grpc_api.get_dependencies(deps)
+            self.assertEqual(resp.get('files'), expected.get('files'))
+            self.assertGreater(mock.stats['grpc_requests'] - requests, 1)
+            purls = [{'purl': f'pkg:github/scanoss/engine-{i}'} for i in range(5)]
+            resp = grpc_api.get_crypto_json({'purls': purls})
+            self.assertEqual([p['purl'] for p in resp['purls']], [p['purl'] for p in purls])
+
+    def test_chunked_request_failure(self):
+        grpc_api = ScanossGrpc(url='http://localhost:1', max_purls=1, nb_threads=2)
+
+        class FailingStub:  # Fails the first request straight away, while the others are slow
+            @staticmethod
+            def GetDependencies(request, **kwargs):
+                if request.files[0].file == 'a':
+                    raise Exception('Failed (mock)')
+                time.sleep(3)
+        grpc_api._stubs['Dependencies'] = FailingStub()
+        deps = {'files': [{'file': name, 'purls': [{'purl': f'pkg:npm/{name}'}]} for name in 'abcde']}
+        start = time.monotonic()
+        self.assertIsNone(grpc_api.get_dependencies_json(deps))
+        self.assertLess(time.monotonic() - start, 2)  # Didn't wait for the slow request in flight
+
+    @unittest.skipIf(sys.platform.startswith('win'), 'requires an executable script')
+    def test_threaded_dependencies(self):
+        with MockScanossServer() as mock, tempfile.TemporaryDirectory() as tmp:
+            sc_command = os.path.join(tmp, 'scancode')  # Stand-in for scancode producing canned output
+            with open(sc_command, 'w') as f:
+                f.write(f'#!{sys.executable}\nimport shutil, sys\n'
+                        f'shutil.copy({os.path.join(DATA_DIR, "scancode-deps.json")!r}, sys.argv[-2])\n')
+            os.chmod(sc_command, os.stat(sc_command).st_mode | stat.S_IEXEC)
+            sc_deps = ScancodeDeps(sc_command=sc_command, output_file=os.path.join(tmp, 'deps.json'))
+            threaded_deps = ThreadedDependencies(sc_deps, ScanossGrpc(url=mock.grpc_url))
+            self.assertTrue(threaded_deps.run(what_to_scan=tmp))
+            self.assertIsNotNone(threaded_deps.responses)
+            self.assertEqual(mock.stats['grpc_requests'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
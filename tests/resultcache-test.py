@@ -0,0 +1,90 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import tempfile
+import time
+import unittest
+
+from scanoss.resultcache import ResultCache
+from scanoss.scanossapi import ScanossApi
+
+
+class MyTestCase(unittest.TestCase):
+    """
+    Exercise the ResultCache class
+    """
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cache_put_get(self):
+        cache = ResultCache(self.tmp.name)
+        cache.put('a', [{'id': 'none'}])
+        self.assertEqual(cache.get('a'), [{'id': 'none'}])
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.close()
+        cache = ResultCache(self.tmp.name)  # Entries persist across instances
+        self.assertEqual(cache.get_many(['a', 'b']), {'a': [{'id': 'none'}]})
+        cache.close()
+
+    def test_cache_ttl(self):
+        cache = ResultCache(self.tmp.name, ttl=1)
+        cache.put('a', 1)
+        cache._db.execute('UPDATE results SET created = ?', (time.time() - 5,))
+        self.assertIsNone(cache.get('a'))
+        cache.close()
+
+    def test_cache_lru_eviction(self):
+        cache = ResultCache(self.tmp.name, max_size=80)
+        cache.put_many([('a', 'x' * 30), ('b', 'x' * 30)])
+        cache.get('a')  # Make 'b' the least recently used entry
+        cache.put('c', 'x' * 30)
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+        cache.close()
+
+    def test_api_cache_lookup(self):
+        cache = ResultCache(self.tmp.name)
+        api = ScanossApi(cache=cache)
+        wfp = 'file=1234,10,src/a.c\n4=abcd\nfile=5678,20,src/b,c.c\n'
+        cached, misses = api.cache_lookup(wfp)
+        self.assertEqual(cached, {})
+        self.assertEqual(list(misses.keys()), ['src/a.c', 'src/b,c.c'])
+        self.assertEqual(misses['src/a.c'][1], 'file=1234,10,src/a.c\n4=abcd\n')
+        resp = api.cache_update({'src/a.c': [{'id': 'none'}]}, cached, misses)
+        self.assertEqual(resp, {'src/a.c': [{'id': 'none'}]})
+        cached, misses = api.cache_lookup(wfp)
+        self.assertEqual(cached, {'src/a.c': [{'id': 'none'}]})
+        self.assertEqual(list(misses.keys()), ['src/b,c.c'])
+        api._request_context = 'changed'  # A different request context must not reuse the results
+        cached, misses = api.cache_lookup(wfp)
+        self.assertEqual(cached, {})
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import os
+import tempfile
+import unittest
+
+from scanoss.api.common.v2.scanoss_common_pb2 import EchoRequest, EchoResponse
+from scanoss.resultcache import ResultCache
+from scanoss.scanarchive import ScanArchive, ArchiveStub
+from scanoss.scanossapi import ScanossApi
+
+
+class EchoStub:
+    """
+    Simple Echo service stub answering locally
+    """
+    def __init__(self):
+        self.calls = 0
+
+    def Echo(self, request, metadata=None, timeout=None):
+        self.calls += 1
+        return EchoResponse(message=f'echo: {request.message}')
+
+
+class MyTestCase(unittest.TestCase):
+    """
+    Exercise the ScanArchive class
+    """
+    WFP = 'file=1234,10,src/a.c\n4=abcd\nfile=5678,20,src/b.c\n'
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.archive_file = os.path.join(self.tmp.name, 'archive.jsonl')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_scan_record_replay(self):
+        archive = ScanArchive(self.archive_file)
+        api = ScanossApi(archive=archive)
+        api.record_scan(self.WFP, None, {'src/a.c': [{'id': 'none'}], 'src/b.c': [{'id': 'file'}]})
+        archive.close()
+        archive = ScanArchive(self.archive_file, replay=True)
+        api = ScanossApi(archive=archive)
+        resp = api.scan('file=5678,20,src/b.c\n')  # Replayed regardless of how the files were batched
+        self.assertEqual(resp, {'src/b.c': [{'id': 'file'}]})
+        with self.assertRaises(Exception):
+            api.scan('file=9999,30,src/c.c\n')
+        with self.assertRaises(Exception):
+            api.scan(self.WFP, context='other')  # Different request context
+
+    def test_scan_record_cached(self):
+        cache = ResultCache(os.path.join(self.tmp.name, 'cache'))
+        api = ScanossApi(cache=cache)
+        results = {'src/a.c': [{'id': 'none'}], 'src/b.c': [{'id': 'file'}]}
+        api.cache_update(dict(results), *api.cache_lookup(self.WFP))
+        archive = ScanArchive(self.archive_file)
+        api = ScanossApi(cache=cache, archive=archive)
+        self.assertEqual(api.scan(self.WFP), results)  # Answered from the cache, but still recorded
+        archive.close()
+        api = ScanossApi(archive=ScanArchive(self.archive_file, replay=True))
+        self.assertEqual(api.scan(self.WFP), results)
+        cache.close()
+
+    def test_grpc_record_replay(self):
+        archive = ScanArchive(self.archive_file)
+        stub = EchoStub()
+        recorder = ArchiveStub(archive, 'Test', stub, {'Echo': EchoResponse})
+        self.assertEqual(recorder.Echo(EchoRequest(message='hi'), timeout=3).message, 'echo: hi')
+        archive.close()
+        archive = ScanArchive(self.archive_file, replay=True)
+        replayer = ArchiveStub(archive, 'Test', stub, {'Echo': EchoResponse})
+        self.assertEqual(replayer.Echo(EchoRequest(message='hi')).message, 'echo: hi')
+        self.assertEqual(stub.calls, 1)
+        with self.assertRaises(Exception):
+            replayer.Echo(EchoRequest(message='bye'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import os
+import tempfile
+import unittest
+
+from scanoss.mockserver import MockScanossServer
+from scanoss.scancheckpoint import ScanCheckpoint, CHECKPOINT_COMPLETED, CHECKPOINT_RESULTS
+from scanoss.scanossapi import ScanossApi
+from scanoss.threadedscanning import ThreadedScanning
+
+
+def make_wfp(start: int, count: int) -> str:
+    return ''.join(f'file={i:032x},{i},src/file-{i}.c\n4=0123abcd\n' for i in range(start, start + count))
+
+
+class MyTestCase(unittest.TestCase):
+    """
+    Exercise the scan checkpoint/resume functionality
+    """
+    def scan(self, url: str, checkpoint: ScanCheckpoint) -> dict:
+        scanning = ThreadedScanning(ScanossApi(url=url, retry=0), nb_threads=4, checkpoint=checkpoint)
+        for i in range(20):
+            scanning.queue_add(make_wfp(i * 10, 10))
+        self.assertTrue(scanning.run())
+        results = scanning.results.get_results()
+        checkpoint.close()
+        return results
+
+    def test_checkpoint_resume(self):
+        with tempfile.TemporaryDirectory() as tmp, MockScanossServer(grpc_port=None) as mock:
+            expected = self.scan(mock.url, ScanCheckpoint(tmp, target='src'))
+            self.assertEqual(len(expected), 200)
+            with self.assertRaises(Exception):
+                ScanCheckpoint(tmp, target='src')  # Should not overwrite an existing checkpoint
+            # Simulate an interrupted scan: only the first 55 files recorded complete, last result partially written
+            with open(os.path.join(tmp, CHECKPOINT_COMPLETED)) as f:
+                completed = f.readlines()
+            with open(os.path.join(tmp, CHECKPOINT_COMPLETED), 'w') as f:
+                f.writelines(completed[:55])
+                f.write('0123')
+            with open(os.path.join(tmp, CHECKPOINT_RESULTS), 'a') as f:
+                f.write('["src/file-0.c",[{"id":')
+            mock.stats['files'] = 0
+            checkpoint = ScanCheckpoint(tmp, resume=True, target='src')
+            self.assertEqual(checkpoint.completed, 55)
+            self.assertEqual(self.scan(mock.url, checkpoint), expected)
+            self.assertEqual(mock.stats['files'], 145)  # Only the unfinished files are sent again
+            mock.stats['files'] = 0
+            self.assertEqual(self.scan(mock.url, ScanCheckpoint(tmp, resume=True)), expected)
+            self.assertEqual(mock.stats['files'], 0)
+
+    def test_resume_missing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with self.assertRaises(Exception):
+                ScanCheckpoint(os.path.join(tmp, 'missing'), resume=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
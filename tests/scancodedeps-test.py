@@ -21,9 +21,15 @@
    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
    THE SOFTWARE.
 """
+import json
 import os
+import stat
+import sys
+import tempfile
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
+from scanoss.jsonstream import JsonStream
 from scanoss.scancodedeps import ScancodeDeps
 from scanoss.scanossgrpc import ScanossGrpc
 from scanoss.threadeddependencies import ThreadedDependencies
@@ -45,6 +51,60 @@ class MyTestCase(unittest.TestCase):
         print(f'Dependency JSON: {deps}')
         self.assertIsNotNone(deps)
 
+    def test_deps_stream(self):
+        """
+        Stream the saved scancode dependency data file and compare it to parsing the whole document
+        """
+        dep_file = "data/scancode-deps.json"
+        with open(dep_file) as f:
+            data = json.load(f)
+        with open(dep_file) as f:
+            self.assertEqual(list(JsonStream(f, chunk_size=7).iter_array('files')), data['files'])
+        sc_deps = ScancodeDeps()
+        self.assertEqual(sc_deps.produce_from_file(dep_file), sc_deps.produce_from_json(data))
+
+    @unittest.skipIf(sys.platform.startswith('win'), 'requires an executable script')
+    def test_concurrent_scans(self):
+        """
+        Run concurrent dependency scans (each with its own interim file) from the same folder
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            sc_command = os.path.join(tmp, 'scancode')  # Stand-in for scancode producing canned output (slowly)
+            with open(sc_command, 'w') as f:
+                f.write(f'#!{sys.executable}\nimport shutil, sys, time\n'
+                        f'out = sys.argv[sys.argv.index("--json") + 1]\ntime.sleep(0.2)\n'
+                        f'shutil.copy({os.path.abspath("data/scancode-deps.json")!r}, out)\n')
+            os.chmod(sc_command, os.stat(sc_command).st_mode | stat.S_IEXEC)
+            sc_deps = ScancodeDeps(sc_command=sc_command)
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                results = list(executor.map(lambda _: sc_deps.produce_from_scan(tmp), range(4)))
+            for deps in results:
+                self.assertIsNotNone(deps)
+                self.assertEqual(len(deps.get('files')), 2)
+            self.assertEqual(os.listdir(tmp), ['scancode'])  # Interim files removed
+
+    @unittest.skipIf(sys.platform.startswith('win'), 'requires an executable script')
+    def test_scan_processes(self):
+        """
+        Pass the number of processes through to scancode (-n)
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            sc_command = os.path.join(tmp, 'scancode')  # Stand-in for scancode recording its arguments
+            args_file = os.path.join(tmp, 'args.json')
+            with open(sc_command, 'w') as f:
+                f.write(f'#!{sys.executable}\nimport json, shutil, sys\n'
+                        f'json.dump(sys.argv[1:], open({args_file!r}, "w"))\n'
+                        f'shutil.copy({os.path.abspath("data/scancode-deps.json")!r}, '
+                        f'sys.argv[sys.argv.index("--json") + 1])\n')
+            os.chmod(sc_command, os.stat(sc_command).st_mode | stat.S_IEXEC)
+            for processes, options in ((1, []), (3, ['-n', '3'])):
+                deps = ScancodeDeps(sc_command=sc_command, processes=processes).produce_from_scan(tmp)
+                self.assertEqual(len(deps.get('files')), 2)
+                with open(args_file) as f:
+                    args = json.load(f)
+                self.assertEqual(args[4:-3], options)
+                self.assertEqual(args[-1], tmp)
+
     def test_scan_dir(self):
         """
         Run a dependency scan of the current directory, then parse those results
@@ -0,0 +1,94 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from scanoss.resultspool import ResultSpool
+from scanoss.scanner import Scanner
+from scanoss.scanresults import ScanResults
+
+
+class MyTestCase(unittest.TestCase):
+    """
+    Exercise the ScanResults & ResultSpool classes
+    """
+    RESPONSES = [
+        {'b/file.c': [{'id': 'none'}], 'a/obf-1.c': [{'id': 'file', 'component': 'x', 'purl': ['pkg:x/x']}]},
+        {'c/file.py': [{'id': 'snippet', 'lines': '1-10', 'matched': '50%'}], 'b/file.c': [{'id': 'file'}]},
+    ]
+    FILE_MAP = {'a/obf-1.c': 'a/real.c'}
+
+    def check_results(self, results: ScanResults):
+        for resp in self.RESPONSES:
+            results.add(resp, self.FILE_MAP)
+        self.assertEqual(len(results), 3)
+        data = results.get_results()
+        self.assertEqual(list(data.keys()), ['a/real.c', 'b/file.c', 'c/file.py'])
+        self.assertEqual(data['b/file.c'], [{'id': 'file'}])  # Later results win
+        out = io.StringIO()
+        results.write_json(out)
+        self.assertEqual(out.getvalue(), json.dumps(data, indent=2, sort_keys=True))
+        results.close()
+        self.assertEqual(len(results), 0)
+
+    def test_scan_results(self):
+        self.check_results(ScanResults())
+
+    def test_result_spool(self):
+        self.check_results(ResultSpool())
+
+    def test_output_order(self):
+        for results in [ScanResults(), ResultSpool()]:
+            results.add_order(['c/file.py', 'a/real.c'])
+            for resp in self.RESPONSES:
+                results.add(resp, self.FILE_MAP)
+            self.assertEqual([key for key, _ in results.items()], ['c/file.py', 'a/real.c', 'b/file.c'])
+            results.close()
+
+    def test_empty_results(self):
+        out = io.StringIO()
+        ScanResults().write_json(out)
+        self.assertEqual(out.getvalue(), '{}')
+
+    def test_merge_results_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            files = []
+            for i, resp in enumerate(self.RESPONSES):  # Results of two (overlapping) shards
+                files.append(os.path.join(tmp, f'shard-{i}.json'))
+                with open(files[-1], 'w') as f:
+                    json.dump(resp, f)
+            output = os.path.join(tmp, 'merged.json')
+            scanner = Scanner(scan_output=output, nb_threads=0, quiet=True)
+            self.assertTrue(scanner.merge_results_files(files))
+            with open(output) as f:
+                merged = json.load(f)
+            self.assertEqual(list(merged.keys()), ['a/obf-1.c', 'b/file.c', 'c/file.py'])
+            self.assertEqual(merged['b/file.c'], [{'id': 'file'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
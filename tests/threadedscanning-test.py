@@ -0,0 +1,75 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import threading
+import time
+import unittest
+
+from scanoss.threadedscanning import ThreadedScanning
+
+
+class StubApi:
+    """
+    Scanning API stand-in recording when each request arrives
+    """
+    def __init__(self):
+        self.received = []
+        self.event = threading.Event()
+
+    def scan(self, wfp: str, scan_id: int = None) -> dict:
+        self.received.append(time.monotonic())
+        self.event.set()
+        path = wfp.split('\n')[0].split(',', 2)[2]
+        return {path: [{'id': 'none'}]}
+
+
+def make_wfp(i: int) -> str:
+    return f'file={i:032x},{i},src/file-{i}.c\n4=0123abcd\n'
+
+
+class MyTestCase(unittest.TestCase):
+    """
+    Exercise the ThreadedScanning worker threads
+    """
+    def test_idle_workers(self):
+        api = StubApi()
+        scanning = ThreadedScanning(api, nb_threads=2, quiet=True)
+        scanning.queue_add(make_wfp(0))
+        scanning.queue_add(make_wfp(1))
+        self.assertTrue(scanning.run(wait=False))
+        scanning.inputs.join()
+        time.sleep(0.2)  # Let the workers go idle on an empty queue
+        api.event.clear()
+        queued = time.monotonic()
+        scanning.queue_add(make_wfp(2))
+        self.assertTrue(api.event.wait(timeout=5))
+        self.assertLess(api.received[-1] - queued, 0.5)  # Picked up straight away, not after a polling sleep
+        self.assertTrue(scanning.complete())
+        self.assertFalse(any(t.is_alive() for t in scanning._threads))  # Stopped by their sentinels
+        self.assertEqual(scanning.get_queue_size(), 0)
+        self.assertEqual(len(scanning.results), 3)
+        scanning.results.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
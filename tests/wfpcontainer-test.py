@@ -0,0 +1,90 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import os
+import tempfile
+import unittest
+
+import scanoss.wfpcontainer
+from scanoss.wfpcontainer import WfpContainer
+from scanoss.wfpreader import WfpReader
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except (ModuleNotFoundError, ImportError):
+    ZSTD_AVAILABLE = False
+
+WFP = ('file=5b3d0f2b5e0c0aa2c9f1d1bd2bdd8b6a,1201,src/main.c\n'
+       'hpsm=0123456789abcdef\n'
+       '3=0a1b2c3d\n'
+       '7=d5e54c33,b03faabe,00000000\n'
+       '200=ffffffff\n'
+       'file=0123,12,not-canonical.c\r\n'
+       '9=23bfe641\n'
+       '5=12345678\n'
+       'file=d41d8cd98f00b204e9800998ecf8427e,0,src/empty, with comma.c\n'
+       'unknown line without terminator')
+
+
+class MyTestCase(unittest.TestCase):
+    """
+    Exercise the binary WFP container
+    """
+    def check_round_trip(self, compress: bool):
+        with tempfile.TemporaryDirectory() as tmp:
+            text_file = os.path.join(tmp, 'scan.wfp')
+            bin_file = os.path.join(tmp, 'scan.wfpb')
+            with open(text_file, 'wb') as f:
+                f.write(WFP.encode('utf-8'))
+            container = WfpContainer()
+            container.from_text(text_file, bin_file, compress=compress)
+            self.assertTrue(WfpContainer.is_container(bin_file))
+            self.assertFalse(WfpContainer.is_container(text_file))
+            self.assertEqual(b''.join(container.lines(bin_file)).decode('utf-8'), WFP)
+            chunk_size = scanoss.wfpcontainer.READ_CHUNK_SIZE
+            scanoss.wfpcontainer.READ_CHUNK_SIZE = 3  # Split records across reads
+            try:
+                self.assertEqual(b''.join(container.lines(bin_file)).decode('utf-8'), WFP)
+            finally:
+                scanoss.wfpcontainer.READ_CHUNK_SIZE = chunk_size
+            paths = [path for path, _ in WfpReader(bin_file).files()]
+            self.assertEqual(paths, ['src/main.c', 'not-canonical.c', 'src/empty, with comma.c'])
+            with open(bin_file, 'rb') as f:
+                data = f.read()
+            with open(bin_file, 'wb') as f:
+                f.write(data[:-5])
+            with self.assertRaises(Exception):
+                list(container.lines(bin_file))
+
+    def test_round_trip(self):
+        self.check_round_trip(compress=False)
+
+    @unittest.skipIf(not ZSTD_AVAILABLE, 'requires zstandard')
+    def test_round_trip_compressed(self):
+        self.check_round_trip(compress=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
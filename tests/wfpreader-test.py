@@ -0,0 +1,99 @@
+"""
+ SPDX-License-Identifier: MIT
+
+   Copyright (c) 2023, SCANOSS
+
+   Permission is hereby granted, free of charge, to any person obtaining a copy
+   of this software and associated documentation files (the "Software"), to deal
+   in the Software without restriction, including without limitation the rights
+   to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+   copies of the Software, and to permit persons to whom the Software is
+   furnished to do so, subject to the following conditions:
+
+   The above copyright notice and this permission notice shall be included in
+   all copies or substantial portions of the Software.
+
+   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+   THE SOFTWARE.
+"""
+import os
+import tempfile
+import unittest
+
+from scanoss.wfpindex import WfpIndex
+from scanoss.wfpreader import WfpReader
+
+
+class MyTestCase(unittest.TestCase):
+    """
+    Exercise the streaming WFP reader
+    """
+    def test_batches(self):
+        blocks = [f'file={i:032x},{i},src/file,{i}.c\n4=0123abcd\n7=89abcdef\n' for i in range(10)]
+        with tempfile.TemporaryDirectory() as tmp:
+            wfp_file = os.path.join(tmp, 'scan.wfp')
+            with open(wfp_file, 'w') as f:
+                f.write(''.join(blocks))
+            reader = WfpReader(wfp_file)
+            self.assertEqual(reader.count(), 10)
+            files = list(reader.files())
+            self.assertEqual([path for path, _ in files], [f'src/file,{i}.c' for i in range(10)])
+            self.assertEqual(b''.join(block for _, block in files).decode('utf-8'), ''.join(blocks))
+            size = len(blocks[0])
+            batches = list(reader.batches(size * 3 + 1))  # Three files per request
+            self.assertEqual([len(paths) for _, paths in batches], [3, 3, 3, 1])
+            self.assertEqual(''.join(wfp for wfp, _ in batches), ''.join(blocks))
+            batches = list(reader.batches(size * 10, max_files=4))
+            self.assertEqual([len(paths) for _, paths in batches], [4, 4, 2])
+            batches = list(reader.batches(1))  # Files larger than the max size are sent on their own
+            self.assertEqual(len(batches), 10)
+            batches = list(reader.batches(size * 10, include=lambda p: p.endswith('1.c')))
+            self.assertEqual(batches, [(blocks[1], ['src/file,1.c'])])
+
+    def test_index(self):
+        blocks = [f'file={i:032x},{i},src/file,{i}.c\n4=0123abcd\n' for i in range(10)]
+        with tempfile.TemporaryDirectory() as tmp:
+            wfp_file = os.path.join(tmp, 'scan.wfp')
+            with open(wfp_file, 'w') as f:
+                f.write(''.join(blocks))
+            self.assertFalse(WfpIndex(wfp_file).load())
+            WfpIndex(wfp_file).create()
+            index = WfpIndex(wfp_file)
+            self.assertTrue(index.load())
+            self.assertEqual(index.count, 10)
+            entries = index.find(paths=['src/file,7.c', 'src/file,2.c'])
+            self.assertEqual([e.path for e in entries], ['src/file,2.c', 'src/file,7.c'])
+            self.assertEqual(index.find(md5s=[f'{3:032x}'])[0].path, 'src/file,3.c')
+            self.assertEqual(list(index.read(entries)), [('src/file,2.c', blocks[2].encode()),
+                                                         ('src/file,7.c', blocks[7].encode())])
+            reader = WfpReader(wfp_file, paths=['src/file,7.c', 'src/file,2.c', 'missing.c'])
+            self.assertEqual(reader.count(), 2)
+            self.assertEqual(list(reader.batches(1024)), [(blocks[2] + blocks[7], ['src/file,2.c', 'src/file,7.c'])])
+            with open(wfp_file, 'a') as f:  # Changing the WFP makes the index out of date
+                f.write(blocks[0])
+            self.assertFalse(WfpIndex(wfp_file).load())
+            WfpIndex(wfp_file).create()
+            wfp_stat = os.stat(wfp_file)
+            os.utime(wfp_file, ns=(wfp_stat.st_atime_ns, wfp_stat.st_mtime_ns + 1000))
+            self.assertFalse(WfpIndex(wfp_file).load())  # So does touching it
+            WfpIndex(wfp_file).create()
+            wfp_stat = os.stat(wfp_file)
+            with open(wfp_file, 'w') as f:  # Regenerate the WFP with the same size and modification time
+                f.write(''.join(reversed(blocks)) + blocks[0])
+            os.utime(wfp_file, ns=(wfp_stat.st_atime_ns, wfp_stat.st_mtime_ns))
+            self.assertTrue(WfpIndex(wfp_file).load())
+            reader = WfpReader(wfp_file, paths=['src/file,7.c', 'src/file,2.c'])
+            self.assertEqual(list(reader.files()), [('src/file,7.c', blocks[7].encode()),
+                                                    ('src/file,2.c', blocks[2].encode())])  # Re-indexed
+            index = WfpIndex(wfp_file)
+            self.assertTrue(index.load())
+            self.assertEqual(index.find(paths=['src/file,9.c'])[0].offset, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()